@@ -0,0 +1,137 @@
+"""
+local web server with synthetic pages for the benchmarks, nothing leaves 127.0.0.1
+
+pages:
+    /list?n=1000            <ul> with n items, each a link wrapping an image and a title
+    /delayed?ms=500&n=1     n nodes inserted ms milliseconds after load
+    /subresources?n=100     n images, scripts and style sheets served by this server
+    /popup?n=1              buttons that window.open() a small list page
+    /asset/<name>?size=N    N bytes, content type guessed from the extension
+"""
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+_TYPES = {"png": "image/png", "js": "application/javascript",
+          "css": "text/css", "woff2": "font/woff2"}
+
+
+def _page(title: str, body: str) -> bytes:
+    return f"""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>{body}</body></html>""".encode()
+
+
+def list_page(n: int) -> bytes:
+    items = "".join(
+        f'<li id="item_{i}" class="item"><a href="/list?n=1&i={i}" data-idx="{i}">'
+        f'<img src="/asset/{i % 20}.png?size=64" alt="item {i}">'
+        f'<span class="title">Item {i}</span></a></li>'
+        for i in range(n))
+    return _page("list", f'<ul id="list">{items}</ul>')
+
+
+def delayed_page(ms: int, n: int) -> bytes:
+    script = f"""<script>
+setTimeout(function () {{
+    for (var i = 0; i < {n}; i++) {{
+        var div = document.createElement("div");
+        div.className = "late";
+        div.id = i ? "late_" + i : "late";
+        div.textContent = "late " + i;
+        document.body.appendChild(div);
+    }}
+}}, {ms});
+</script>"""
+    return _page("delayed", "<p>waiting</p>" + script)
+
+
+def subresources_page(n: int) -> bytes:
+    body = "".join(f'<img src="/asset/{i}.png?size=2048">' for i in range(n))
+    head = "".join(f'<link rel="stylesheet" href="/asset/{i}.css?size=512">' for i in range(n // 10))
+    scripts = "".join(f'<script src="/asset/{i}.js?size=1024"></script>' for i in range(n // 10))
+    return _page("subresources", head + body + scripts)
+
+
+def popup_page(n: int) -> bytes:
+    buttons = "".join(
+        f'<button id="popup_{i}" onclick="window.open(\'/list?n=10&popup={i}\')">open {i}</button>'
+        for i in range(n))
+    return _page("popup", buttons)
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        n = int(query.get("n", 1))
+        ctype = "text/html; charset=utf-8"
+        if url.path in ("/", "/list"):
+            body = list_page(n)
+        elif url.path == "/delayed":
+            body = delayed_page(int(query.get("ms", 500)), n)
+        elif url.path == "/subresources":
+            body = subresources_page(n)
+        elif url.path == "/popup":
+            body = popup_page(n)
+        elif url.path.startswith("/asset/"):
+            ext = url.path.rsplit(".", 1)[-1]
+            ctype = _TYPES.get(ext, "application/octet-stream")
+            body = b"\0" * int(query.get("size", 1024))
+            if ext in ("js", "css"):
+                body = b" " * len(body)
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+
+class FixtureServer:
+    """
+    Serve the synthetic pages from a background thread.
+
+    Attributes:
+        host (str): Interface to bind, loopback only by default.
+        port (int): Port to bind, 0 picks a free one.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url(self, path: str = "/") -> str:
+        return f"http://{self.host}:{self.port}{path}"
+
+    def start(self) -> "FixtureServer":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    with FixtureServer(port=8000) as server:
+        print(f"serving fixtures on {server.url()}, ctrl+c to stop")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,281 @@
+"""
+benchmark browser operations against the local fixture server
+
+    python benchmarks/run.py                          # run and print a table
+    python benchmarks/run.py --save baseline.json     # store results as a baseline
+    python benchmarks/run.py --compare baseline.json  # flag regressions, exit code 1 if any
+    python benchmarks/run.py --memory --browsers 4    # firefox memory per browser, with and without the dense preset
+
+per operation it reports the median wall time, webdriver round trips (commands sent to
+geckodriver) and the peak python memory allocated while it ran
+"""
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter, sleep
+from typing import Callable, Dict, List, Optional
+
+from fixtures import FixtureServer
+
+from pombo_correio import FirefoxBrowser
+
+
+class BenchBrowser(FirefoxBrowser):
+    """ FirefoxBrowser that lets selenium-wire see traffic to the loopback fixture server"""
+
+    def create_options(self, profile_dir: Optional[str] = None):
+        options = super().create_options(profile_dir)
+        options.set_preference("network.proxy.allow_hijacking_localhost", True)
+        return options
+
+
+class Bench:
+    """
+    A named operation, setup runs before every repetition and is not measured.
+    """
+
+    def __init__(self, name: str, run: Callable, setup: Optional[Callable] = None) -> None:
+        self.name = name
+        self.run = run
+        self.setup = setup
+
+
+def _open_tabs(b: FirefoxBrowser, server: FixtureServer):
+    b.reset()
+    for i in range(5):
+        b.open_new_tab(server.url(f"/list?n=10&tab={i}"), switch=False)
+
+
+def _switch_tabs(b: FirefoxBrowser, server: FixtureServer):
+    for tab in b.open_tabs:
+        b.switch_to_tab(tab)
+
+
+def _popup(b: FirefoxBrowser, server: FixtureServer):
+    b.find_and_click_css_selector("#popup_0")
+    b.wait_until_ready()
+    b.switch_to_tab(b.open_tabs[-1])
+    return b.tab2url
+
+
+def _drain_requests(b: FirefoxBrowser, server: FixtureServer):
+    return sum(1 for _ in b.iterate_requests())
+
+
+def benches(server: FixtureServer) -> List[Bench]:
+    def goto(path):
+        return lambda b, s: b.goto_url(s.url(path))
+
+    def reset_and_goto(path):
+        def _setup(b, s):
+            b.reset()
+            b.goto_url(s.url(path))
+        return _setup
+
+    return [
+        Bench("goto_url", goto("/list?n=100")),
+        Bench("search_css[1000]", lambda b, s: list(b.search_css("li.item a")),
+              reset_and_goto("/list?n=1000")),
+        Bench("search_css_bulk[1000]", lambda b, s: list(b.search_css("li.item a", bulk=True)),
+              reset_and_goto("/list?n=1000")),
+        Bench("extract_records[1000]", lambda b, s: b.extract_records(
+            "li.item", {"title": ".title", "url": "a@href", "image": "img@src"}),
+              reset_and_goto("/list?n=1000")),
+        Bench("wait_for_css[500ms]", lambda b, s: b.wait_for_css_selector("#late", timeout=10),
+              reset_and_goto("/delayed?ms=500")),
+        Bench("wait_for_css[present]", lambda b, s: b.wait_for_css_selector("#list", timeout=10),
+              reset_and_goto("/list?n=10")),
+        Bench("open_new_tab[5]", _open_tabs),
+        Bench("switch_to_tab[6]", _switch_tabs, _open_tabs),
+        Bench("sync_tab2url[6]", lambda b, s: b.sync_tab2url(), _open_tabs),
+        Bench("tab2url[6]", lambda b, s: b.tab2url, _open_tabs),
+        Bench("popup", _popup, reset_and_goto("/popup")),
+        Bench("iterate_requests[100]", _drain_requests,
+              lambda b, s: (b.reset(), b.goto_url(s.url("/subresources?n=100")))),
+    ]
+
+
+def measure(fn: Callable, browser: Optional[FirefoxBrowser] = None) -> Dict:
+    """ wall time, webdriver round trips and peak python memory of a single call"""
+    if browser is not None and browser.metrics is not None:
+        browser.metrics.reset()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    start = perf_counter()
+    fn()
+    wall = perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] - before
+    commands = browser.metrics_snapshot().get("command", {}) if browser is not None else {}
+    return {"wall": wall,
+            "round_trips": sum(c["count"] for c in commands.values()),
+            "memory": max(peak, 0)}
+
+
+def summarize(samples: List[Dict]) -> Dict:
+    return {"wall": statistics.median(s["wall"] for s in samples),
+            "wall_min": min(s["wall"] for s in samples),
+            "round_trips": statistics.median(s["round_trips"] for s in samples),
+            "memory": max(s["memory"] for s in samples),
+            "repeat": len(samples)}
+
+
+def run(repeat: int = 5, only: Optional[List[str]] = None, headless: bool = True) -> Dict[str, Dict]:
+    results = {}
+    extensions = tempfile.mkdtemp(prefix="pombo_correio_bench_ext_")  # no downloads
+    tracemalloc.start()
+    with FixtureServer() as server:
+        def new_browser():
+            return BenchBrowser(headless=headless, homepage=server.url("/list?n=10"),
+                                extensions_folder=extensions)
+
+        if not only or "new_session" in only:
+            samples = []
+            for _ in range(repeat):
+                b = new_browser()
+                b.enable_metrics()
+                samples.append(measure(b.new_session, b))
+                b.stop()
+            results["new_session"] = summarize(samples)
+
+        browser = new_browser()
+        browser.new_session()
+        browser.enable_metrics()
+        try:
+            for bench in benches(server):
+                if only and bench.name not in only:
+                    continue
+                samples = []
+                for _ in range(repeat):
+                    if bench.setup:
+                        bench.setup(browser, server)
+                    samples.append(measure(lambda: bench.run(browser, server), browser))
+                results[bench.name] = summarize(samples)
+        finally:
+            browser.stop()
+    tracemalloc.stop()
+    return results
+
+
+def memory(browsers: int = 3, presets=(None, "dense"), headless: bool = True,
+           settle: float = 2) -> Dict[str, Dict]:
+    """
+    Firefox process tree RSS per browser, browsers running side by side as on a crawl host.
+
+    Every browser loads the same pages, memory is read once they settled.
+    """
+    results = {}
+    extensions = tempfile.mkdtemp(prefix="pombo_correio_bench_ext_")
+    with FixtureServer() as server:
+        for preset in presets:
+            running = []
+            try:
+                for _ in range(browsers):
+                    b = BenchBrowser(headless=headless, homepage=server.url("/list?n=10"),
+                                     extensions_folder=extensions, preset=preset)
+                    running.append(b)
+                    b.new_session()
+                for b in running:
+                    for path in ("/list?n=1000", "/subresources?n=100", "/delayed?ms=100&n=100"):
+                        b.goto_url(server.url(path))
+                sleep(settle)
+                rss = [b.memory_usage() for b in running]
+            finally:
+                for b in running:
+                    b.stop()
+            if None in rss:
+                raise RuntimeError("can not read process memory, pip install psutil")
+            results[preset or "default"] = {"rss_mean": statistics.mean(rss),
+                                            "rss_max": max(rss),
+                                            "rss_total": sum(rss),
+                                            "browsers": browsers}
+    return results
+
+
+def print_memory_table(results: Dict[str, Dict]) -> None:
+    print(f"{'preset':<16}{'browsers':>10}{'MiB each':>10}{'MiB max':>10}{'MiB total':>11}{'vs default':>12}")
+    base = results.get("default")
+    for name, r in results.items():
+        delta = ""
+        if base and name != "default":
+            delta = f"{(r['rss_mean'] / base['rss_mean'] - 1) * 100:+.0f}%"
+        print(f"{name:<16}{r['browsers']:>10}{r['rss_mean'] / 2 ** 20:>10.1f}{r['rss_max'] / 2 ** 20:>10.1f}"
+              f"{r['rss_total'] / 2 ** 20:>11.1f}{delta:>12}")
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """
+    List operations that got slower, chattier or hungrier than the baseline allows.
+
+    Args:
+        results: This run.
+        baseline: A previous run saved with --save.
+        tolerance: Allowed relative increase, 0.2 means 20%.
+    """
+    regressions = []
+    for name, now in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("wall", "round_trips", "memory"):
+            # small absolute noise floors so tiny numbers do not flap
+            floor = {"wall": 0.005, "round_trips": 1, "memory": 64 * 1024}[metric]
+            if now[metric] > base[metric] * (1 + tolerance) + floor:
+                regressions.append(f"{name}: {metric} {base[metric]:.4g} -> {now[metric]:.4g}")
+    return regressions
+
+
+def print_table(results: Dict[str, Dict], baseline: Optional[Dict[str, Dict]] = None) -> None:
+    print(f"{'operation':<24}{'wall ms':>10}{'min ms':>10}{'trips':>8}{'mem KiB':>10}{'vs base':>10}")
+    for name, r in results.items():
+        delta = ""
+        if baseline and name in baseline and baseline[name]["wall"]:
+            delta = f"{(r['wall'] / baseline[name]['wall'] - 1) * 100:+.0f}%"
+        print(f"{name:<24}{r['wall'] * 1000:>10.1f}{r['wall_min'] * 1000:>10.1f}"
+              f"{r['round_trips']:>8.0f}{r['memory'] / 1024:>10.1f}{delta:>10}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="pombo_correio offline benchmarks")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="operation names to run")
+    parser.add_argument("--headful", action="store_true", help="show the browser window")
+    parser.add_argument("--save", help="write results to this baseline file")
+    parser.add_argument("--compare", help="compare against this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--memory", action="store_true",
+                        help="measure firefox memory per browser instead, with and without the dense preset")
+    parser.add_argument("--browsers", type=int, default=3, help="browsers running at once in --memory mode")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        results = memory(args.browsers, headless=not args.headful)
+        print_memory_table(results)
+        if args.save:
+            with open(args.save, "w") as f:
+                json.dump({"python": sys.version.split()[0], "memory": results}, f, indent=2)
+        return 0
+
+    results = run(args.repeat, args.only, headless=not args.headful)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_table(results, baseline)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"python": sys.version.split()[0], "results": results}, f, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for r in regressions:
+            print(f"REGRESSION: {r}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
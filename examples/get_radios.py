@@ -47,12 +47,11 @@ class Scraper(FirefoxBrowser):
             self.click_element(button)
         time.sleep(1)
         if "openPopUp" in action:
-            for r in self.iterate_requests():
-                if "/embed/" in r.url:
-                    self.radios[r.url] = self.radios[url]
-                    self.radios.store()
-                    print("   Parsing PopUp")
-                    return self.extract_radio_stream(r.url)
+            for r in self.iterate_requests(url_pattern="/embed/"):
+                self.radios[r.url] = self.radios[url]
+                self.radios.store()
+                print("   Parsing PopUp")
+                return self.extract_radio_stream(r.url)
             else:
                 return None
         candidates = []
@@ -81,18 +80,16 @@ class Scraper(FirefoxBrowser):
         for p in range(start_page, self.N_PAGES):
             print(f"Parsing page {p}")
             self.goto_url(self.homepage + f"/?page={p}")
-            for i in range(1, self.N_PER_PAGE):
-                try:
-                    picture = self.wait_for_css_selector(
-                        f"#radio_list_li_{i} > a:nth-child(1) > div:nth-child(1) > img:nth-child(1)",
-                        timeout=2 if i > 1 else 10)
-                    img = self.get_element_attribute(picture, "src")
-                    name = self.get_element_attribute(picture, "alt")
-                    entry = self.wait_for_css_selector(f"#radio_list_li_{i} > a:nth-child(1)")
-                    radio_page = self.get_element_attribute(entry, "href")
-                    yield name, img, radio_page
-                except:
-                    continue
+            picture = ":scope > a:nth-child(1) > div:nth-child(1) > img:nth-child(1)"
+            records = self.extract_records(
+                "[id^='radio_list_li_']",
+                {"name": f"{picture}@alt",
+                 "image": f"{picture}@src",
+                 "url": ":scope > a:nth-child(1)@href"},
+                min_records=1, timeout=10)
+            for r in records[:self.N_PER_PAGE - 1]:
+                if r["url"] and r["image"]:
+                    yield r["name"], r["image"], r["url"]
 
     def iter_radios(self, check_status: bool = False) -> Iterable[Tuple[str, Dict]]:
         self.index_radios()
@@ -1,13 +1,22 @@
+import hashlib
 import json
 import os
+import re
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
 from enum import IntEnum
+import shutil
 from os.path import join, exists
 from tempfile import gettempdir
-from time import sleep
-from typing import Optional, Dict, Callable, Union, List
+from time import sleep, monotonic, perf_counter
+from typing import Optional, Dict, Callable, Union, List, Set, Iterable, Tuple
+from urllib.parse import urlsplit, urlunsplit, urljoin
 
 import requests
-from selenium.common.exceptions import NoSuchWindowException
+from selenium.common.exceptions import NoSuchWindowException, NoSuchElementException, \
+    StaleElementReferenceException, JavascriptException, NoSuchFrameException, WebDriverException
 from selenium.webdriver import FirefoxOptions
 from selenium.webdriver.common.by import By
 from selenium.webdriver.firefox.firefox_profile import FirefoxProfile
@@ -17,12 +26,31 @@ from selenium.webdriver.support.ui import WebDriverWait
 # from selenium import webdriver
 from seleniumwire import webdriver
 
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
 from pombo_correio.exceptions import NoSession, ElementNotFound, \
     FireFoxCrashed, InvalidElement, InvalidTabID, TorNotFound, DriverNotSet, \
-    PreferencesFileNotFound, PreferencesParseError, TabDiscarded
-from pombo_correio.exceptions import NoSession, ElementNotFound, \
-    FireFoxCrashed, InvalidElement, InvalidTabID, TorNotFound, DriverNotSet, \
-    PreferencesFileNotFound, PreferencesParseError, TabDiscarded
+    PreferencesFileNotFound, PreferencesParseError, TabDiscarded, \
+    ExtensionNotCached, ExtensionChecksumMismatch
+from pombo_correio.blocking import BlockRule, RequestBlocker, resolve_rules
+from pombo_correio.bus import EventBus, BLOCK
+from pombo_correio.cache import ResponseCache
+from pombo_correio.capture import RequestCursor, CapturePolicy, CaptureStorage, NavigationLog, \
+    capture_storage
+from pombo_correio.elements import ElementCache
+from pombo_correio.fastpath import HttpFetcher, FetchRoute, FetchResult
+from pombo_correio.filters import compile_filter
+from pombo_correio.metrics import Metrics, instrument_driver, uninstrument_driver, timed, process_tree_rss
+from pombo_correio.presets import preset_preferences
+from pombo_correio.profiles import ProfileSnapshot
+from pombo_correio.screenshots import Screenshot, ScreenshotEncoder, FORMATS
+from pombo_correio.scripts import BULK_SEARCH, ADDONS_ACTIVE, WAIT_VISIBLE, EXTRACT_RECORDS, \
+    NAVIGATE, LOAD_STATE, FIND_FILTERED
+from pombo_correio.supervisor import Supervisor, Watchdog, supervised, kill_driver, COOKIE_OPS, \
+    ASYNC_SCRIPT_COMMANDS
 from pombo_correio.utils import Keys
 
 
@@ -34,6 +62,7 @@ class BrowserEvents(IntEnum):
     WEBPAGE_OPEN = 10
     OPEN_URL = 11
     NEW_TAB = 12
+    HTTP_FETCH = 13
     SWITCH_TAB = 20
     TAB_CLOSED = 25
     SEARCH_CSS = 30
@@ -42,58 +71,162 @@ class BrowserEvents(IntEnum):
     WAIT_FOR_XPATH = 41
     CSS_FOUND = 50
     XPATH_FOUND = 51
+    RECORDS_FOUND = 52
     CSS_NOT_FOUND = 60
     XPATH_NOT_FOUND = 61
     ELEMENT_CLICKED = 70
     ELEMENT_SEND_KEYS = 71
     ELEMENT_SUBMIT = 72
     SCREENSHOT = 80
+    BROWSER_RESET = 90
+    METRICS = 95
     BROWSER_CLOSED = 100
+    BROWSER_CRASHED = 101
+    BROWSER_RECOVERED = 102
 
 
 class DefaultExtensions:
     """
     A class to manage default browser extensions, such as ad blockers and cookie managers, for Firefox.
 
+    Downloads are cached on disk and recorded in a manifest keyed by URL with their sha256,
+    files already in the cache are only re-downloaded if they no longer match.
+
     Attributes:
         COOKIES (str): URL to download the cookie management extension.
         ADBLOCK (str): URL to download the adblock extension.
+        MANIFEST (str): Name of the cache manifest file inside path.
         path (str): Directory path to save the downloaded extensions.
+        offline (bool): Never touch the network, only use cached files.
+        checksums (Dict[str, str]): Expected sha256 per URL, overrides the manifest.
     """
 
     COOKIES: str = "https://addons.mozilla.org/firefox/downloads/file/4202634/i_dont_care_about_cookies-3.5.0.xpi"
     ADBLOCK: str = "https://addons.mozilla.org/firefox/downloads/file/4328681/ublock_origin-1.59.0.xpi"
+    MANIFEST: str = ".manifest.json"
+    _lock = threading.Lock()
 
-    def __init__(self, path: Optional[str] = None, adblock: bool = True) -> None:
+    def __init__(self, path: Optional[str] = None, adblock: bool = True, offline: bool = False,
+                 checksums: Optional[Dict[str, str]] = None) -> None:
         """
-        Initialize the DefaultExtensions instance, downloading the extensions to the specified path.
+        Initialize the DefaultExtensions instance, making sure the extensions are cached in the specified path.
 
         Args:
             path (Optional[str]): Directory path where extensions will be saved. Defaults to a temp directory.
             adblock (bool): Flag indicating whether to download the adblock extension. Defaults to True.
+            offline (bool): Only use cached files, raise ExtensionNotCached instead of downloading. Defaults to False.
+            checksums (Optional[Dict[str, str]]): Expected sha256 per URL.
         """
         self.path = path or f"{gettempdir()}/ff_extensions"
+        self.offline = offline
+        self.checksums = checksums or {}
         os.makedirs(self.path, exist_ok=True)
-        data = requests.get(self.COOKIES).content
-        with open(f"{self.path}/{self.COOKIES.split('/')[-1]}", "wb") as f:
-            f.write(data)
+        urls = [self.COOKIES]
         if adblock:
-            data = requests.get(self.ADBLOCK).content
-            with open(f"{self.path}/{self.ADBLOCK.split('/')[-1]}", "wb") as f:
-                f.write(data)
+            urls.append(self.ADBLOCK)
+        with self._locked():
+            manifest = self._load_manifest()
+            for url in urls:
+                self._ensure(url, manifest)
+            self._save_manifest(manifest)
+
+    @contextmanager
+    def _locked(self):
+        """ serialize cache access between threads and processes sharing the folder"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(join(self.path, ".lock"), "w") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        try:
+            with open(join(self.path, self.MANIFEST)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_manifest(self, manifest: Dict[str, Dict]) -> None:
+        tmp = join(self.path, self.MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, join(self.path, self.MANIFEST))
+
+    @staticmethod
+    def _sha256(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _ensure(self, url: str, manifest: Dict[str, Dict]) -> str:
+        """
+        Make sure the extension for url is cached and valid, downloading it if needed.
+
+        Args:
+            url (str): The extension download URL.
+            manifest (Dict[str, Dict]): The cache manifest, updated in place.
+
+        Returns:
+            str: Path of the cached file.
+
+        Raises:
+            ExtensionNotCached: If the file is missing or invalid in offline mode.
+            ExtensionChecksumMismatch: If the download does not match the expected checksum.
+        """
+        filename = url.split('/')[-1]
+        dest = join(self.path, filename)
+        entry = manifest.get(url, {})
+        expected = self.checksums.get(url) or entry.get("sha256")
+
+        if exists(dest):
+            st = os.stat(dest)
+            if entry.get("size") == st.st_size and entry.get("mtime") == st.st_mtime \
+                    and entry.get("sha256") == expected:
+                return dest  # unchanged since it was last verified
+            digest = self._sha256(dest)
+            if expected is None or digest == expected:
+                manifest[url] = {"file": filename, "sha256": digest,
+                                 "size": st.st_size, "mtime": st.st_mtime}
+                return dest
+
+        if self.offline:
+            raise ExtensionNotCached(url)
+
+        r = requests.get(url, timeout=60)
+        r.raise_for_status()
+        digest = hashlib.sha256(r.content).hexdigest()
+        if self.checksums.get(url) and digest != self.checksums[url]:
+            raise ExtensionChecksumMismatch(url)
+        # write next to the destination and rename, readers never see partial files
+        with tempfile.NamedTemporaryFile(dir=self.path, prefix=".", suffix=".part",
+                                         delete=False) as f:
+            f.write(r.content)
+        os.replace(f.name, dest)
+        st = os.stat(dest)
+        manifest[url] = {"file": filename, "sha256": digest,
+                         "size": st.st_size, "mtime": st.st_mtime}
+        return dest
 
     @classmethod
-    def get(cls, path: Optional[str] = None) -> str:
+    def get(cls, path: Optional[str] = None, offline: bool = False) -> str:
         """
         Get the path where the extensions are stored.
 
         Args:
             path (Optional[str]): Optional path to store the extensions.
+            offline (bool): Only use cached files, never download. Defaults to False.
 
         Returns:
             str: The directory path where the extensions are stored.
         """
-        ext = DefaultExtensions(path)
+        ext = DefaultExtensions(path, offline=offline)
         return ext.path
 
 
@@ -107,11 +240,38 @@ class _AbstractBrowser:
         homepage (str): URL of the homepage to load at the start of the session.
         debug (bool): Enables debug mode with verbose logging.
         event_handlers (Dict[BrowserEvents, List[Callable]]): Dictionary to store event handlers for browser events.
-        tab_elements (Dict[str, Dict[str, List[WebElement]]]): Cache of webpage elements identified by CSS or XPath selectors.
-        _tab2url (Dict[str, str]): Mapping of tab IDs to their respective URLs.
-        _req_idx (int): Index to track the current request in the request queue.
+        _handler_fields (Dict[BrowserEvents, Dict[Callable, Optional[Set[str]]]]): Payload fields each handler declared it needs, None means all.
+        tab_elements (ElementCache): Bounded cache of webpage elements identified by CSS or XPath selectors, tab id -> {selector -> [WebElement]}.
+        _tab2url (Dict[str, str]): Mapping of tab IDs to their respective URLs, updated incrementally.
+        _current_tab (Optional[str]): Tab focused through this class, avoids asking the driver.
+        _navigated (Dict[str, str]): Tabs that navigated on their own since the last tab2url read, with the captured url.
+        _opening (Dict[str, str]): URLs opened in a tab that were not seen as a request yet, normalized url -> tab ID.
+        request_cursor (Optional[RequestCursor]): Streams captured requests newer than the last one seen.
+        capture_policy (Optional[CapturePolicy]): Limits and filters applied when selenium-wire stores traffic.
+        startup_time (Optional[float]): Seconds the last new_session() took.
+        startup_timings (Dict[str, float]): Per phase breakdown of the last new_session().
+        startup_timeout (float): Upper bound in seconds to wait for the session to report ready.
+        request_interceptors (List[Callable]): selenium-wire request interceptors, run in order until one answers the request.
+        response_interceptors (List[Callable]): selenium-wire response interceptors, run in order.
+        blocker (RequestBlocker): Enforces the request blocking rules set with set_blocking().
+        response_cache (Optional[ResponseCache]): Disk cache answering requests, set with set_response_cache().
+        metrics (Optional[Metrics]): Latency histograms, None unless enable_metrics() was called.
+        event_bus (Optional[EventBus]): Runs handlers on worker threads, None unless enable_async_events() was called.
+        _sync_handlers (Dict[BrowserEvents, Set[Callable]]): Handlers that always run inline, even with an event bus.
+        supervisor (Optional[Supervisor]): Restarts a dead browser and retries the operation, None unless enable_supervision() was called.
+        _cookie_jar (Dict[str, List[Dict]]): Cookies remembered by the supervisor, origin -> cookies.
+        _tab_aliases (Dict[str, str]): Tab IDs from before a recovery -> the tab restored in their place.
+        screenshot_encoder (Optional[ScreenshotEncoder]): Thread pool encoding JPEG/WebP captures, None shares ScreenshotEncoder.default().
     """
 
+    # selector kind -> (event data key, By locator, search event, wait event, found event, not found event)
+    _SELECTORS = {
+        "css": ("css_selector", By.CSS_SELECTOR, BrowserEvents.SEARCH_CSS,
+                BrowserEvents.WAIT_FOR_CSS, BrowserEvents.CSS_FOUND, BrowserEvents.CSS_NOT_FOUND),
+        "xpath": ("xpath", By.XPATH, BrowserEvents.SEARCH_XPATH,
+                  BrowserEvents.WAIT_FOR_XPATH, BrowserEvents.XPATH_FOUND, BrowserEvents.XPATH_NOT_FOUND)
+    }
+
     def __init__(self, headless: bool = False, homepage: str = "https://openvoiceos.org", debug: bool = False) -> None:
         """
         Initialize the browser session with specified options.
@@ -128,22 +288,118 @@ class _AbstractBrowser:
         self._driver: Optional[webdriver.Firefox] = None
         self.homepage: str = homepage
         self.event_handlers: Dict[BrowserEvents, List[Callable]] = {}
-        self.tab_elements: Dict[str, Dict[str, List]] = {}
+        self._handler_fields: Dict[BrowserEvents, Dict[Callable, Optional[Set[str]]]] = {}
+        self.tab_elements: ElementCache = ElementCache()
         self._tab2url: Dict[str, str] = {}
+        self._current_tab: Optional[str] = None
+        self._navigated: Dict[str, str] = {}
+        self._opening: Dict[str, str] = {}
         self.debug: bool = debug
-        self._req_idx: int = -1
-
-    def add_event_handler(self, event: BrowserEvents, handler: Callable) -> None:
+        self.request_cursor: Optional[RequestCursor] = None
+        self.capture_policy: Optional[CapturePolicy] = None
+        self.startup_time: Optional[float] = None
+        self.startup_timings: Dict[str, float] = {}
+        self.startup_timeout: float = 10
+        self.request_interceptors: List[Callable] = []
+        self.response_interceptors: List[Callable] = []
+        self.blocker: RequestBlocker = RequestBlocker()
+        self.response_cache: Optional[ResponseCache] = None
+        self._script_timeout: Optional[float] = None
+        self.metrics: Optional[Metrics] = None
+        self.event_bus: Optional[EventBus] = None
+        self._sync_handlers: Dict[BrowserEvents, Set[Callable]] = {}
+        self.supervisor: Optional[Supervisor] = None
+        self._cookie_jar: Dict[str, List[Dict]] = {}
+        self._tab_aliases: Dict[str, str] = {}
+        self.screenshot_encoder: Optional[ScreenshotEncoder] = None
+
+    def add_event_handler(self, event: BrowserEvents, handler: Callable,
+                          fields: Optional[Iterable[str]] = None, sync: bool = False) -> None:
         """
         Add an event handler for a specific browser event.
 
+        Payload fields that cost webdriver round trips (urls, tab ids, element text...)
+        are only computed if some handler of that event needs them.
+
         Args:
             event (BrowserEvents): The event to handle.
             handler (Callable): The function to handle the event.
+            fields (Optional[Iterable[str]]): Payload fields the handler reads, None means all of them.
+            sync (bool): Always run the handler inline on the browser thread, even when an event bus
+                is enabled, for handlers that must finish before the action continues.
         """
         if event not in self.event_handlers:
             self.event_handlers[event] = []
         self.event_handlers[event].append(handler)
+        if event not in self._handler_fields:
+            self._handler_fields[event] = {}
+        self._handler_fields[event][handler] = set(fields) if fields is not None else None
+        if sync:
+            self._sync_handlers.setdefault(event, set()).add(handler)
+
+    def remove_event_handler(self, event: BrowserEvents, handler: Callable) -> None:
+        """
+        Remove a previously added event handler.
+
+        Args:
+            event (BrowserEvents): The event the handler was registered for.
+            handler (Callable): The handler to remove.
+        """
+        if handler in self.event_handlers.get(event, []):
+            self.event_handlers[event].remove(handler)
+        self._handler_fields.get(event, {}).pop(handler, None)
+        self._sync_handlers.get(event, set()).discard(handler)
+
+    def has_handlers(self, *events: BrowserEvents) -> bool:
+        """
+        Check if anyone is listening to any of the given events.
+
+        Args:
+            *events (BrowserEvents): The events to check.
+
+        Returns:
+            bool: True if at least one event has a handler, always True in debug mode.
+        """
+        if self.debug:
+            return True
+        return any(self.event_handlers.get(event) for event in events)
+
+    def _wanted_fields(self, *events: BrowserEvents) -> Optional[Set[str]]:
+        """ union of payload fields the handlers of these events need, None means all"""
+        if self.debug:
+            return None
+        wanted = set()
+        for event in events:
+            declared = self._handler_fields.get(event, {})
+            for handler in self.event_handlers.get(event, []):
+                fields = declared.get(handler)
+                if fields is None:
+                    return None
+                wanted |= fields
+        return wanted
+
+    def _event_data(self, events: tuple, data: Optional[Dict] = None,
+                    **getters: Callable) -> Dict:
+        """
+        Build an event payload, expensive fields are given as getters and only
+        evaluated if a handler of one of the events needs them.
+
+        Args:
+            events (tuple): The events this payload will be emitted with.
+            data (Optional[Dict]): Fields that are free to compute.
+            **getters (Callable): field name -> zero argument callable.
+
+        Returns:
+            Dict: The event payload.
+        """
+        data = data if data is not None else {}
+        if not self.has_handlers(*events):
+            return data
+        wanted = self._wanted_fields(*events)
+        for k, getter in getters.items():
+            if wanted is None or k in wanted:
+                data[k] = getter()
+        return data
 
     def handle_event(self, event: BrowserEvents, data: Dict) -> None:
         """
@@ -157,17 +413,330 @@ class _AbstractBrowser:
             print(event, data)
         if event not in self.event_handlers:
             return
-        for handler in self.event_handlers[event]:
+        handlers = self.event_handlers[event]
+        if self.event_bus is not None:
+            inline = self._sync_handlers.get(event, ())
+            queued = [h for h in handlers if h not in inline]
+            handlers = [h for h in handlers if h in inline]
+            self.event_bus.submit(event, data, queued)
+        for handler in handlers:
+            start = perf_counter()
             try:
                 handler(data)
             except Exception as e:
                 print("ERROR: exception in event handler")
                 print(str(e))
+            self._observe_handler(event, handler, perf_counter() - start)
+
+    def _observe_handler(self, event: BrowserEvents, handler: Callable, seconds: float) -> None:
+        metrics = self.metrics
+        if metrics is not None:
+            name = getattr(handler, "__qualname__", None) or repr(handler)
+            metrics.observe("handler", f"{event.name}:{name}", seconds)
+
+    def enable_async_events(self, workers: int = 2, max_queue: int = 1000, overflow: str = BLOCK,
+                            sample_every: int = 10, block_timeout: Optional[float] = None) -> EventBus:
+        """
+        Run event handlers on worker threads so slow handlers do not stall the browser.
+
+        Each handler keeps seeing events in order and gets a copy of the payload,
+        handlers added with sync=True still run inline.
+
+        Args:
+            workers (int): Number of handler threads.
+            max_queue (int): Capacity of each worker queue.
+            overflow (str): What happens when a queue is full, "block", "drop-oldest" or "sample".
+            sample_every (int): With "sample", keep one in this many overflowing events.
+            block_timeout (Optional[float]): With "block", drop the event after waiting this long. None waits forever.
+
+        Returns:
+            EventBus: The bus dispatching events.
+        """
+        self.disable_async_events()
+        self.event_bus = EventBus(workers, max_queue, overflow, sample_every,
+                                  block_timeout, observe=self._observe_handler)
+        return self.event_bus
+
+    def disable_async_events(self, wait: bool = True) -> None:
+        """
+        Go back to running every handler inline.
+
+        Args:
+            wait (bool): Handle the events already queued first, otherwise drop them.
+        """
+        bus, self.event_bus = self.event_bus, None
+        if bus is not None:
+            bus.close(wait)
+
+    def enable_metrics(self, interval: Optional[float] = None) -> Metrics:
+        """
+        Start recording latency histograms per webdriver command, per browser method and per event handler.
+
+        Args:
+            interval (Optional[float]): Emit a METRICS event with a snapshot at most every interval seconds,
+                checked when an instrumented method returns. None never emits it.
+
+        Returns:
+            Metrics: The metrics being recorded.
+        """
+        if self.metrics is None:
+            self.metrics = Metrics(interval)
+        self.metrics.interval = interval
+        if self._driver is not None:
+            instrument_driver(self._driver, self.metrics)
+        return self.metrics
+
+    def disable_metrics(self) -> None:
+        if self._driver is not None:
+            uninstrument_driver(self._driver)
+        self.metrics = None
+
+    def metrics_snapshot(self) -> Dict:
+        """
+        Returns:
+            Dict: Histogram summaries (count, total, mean, min, max, p50, p90, p99 in seconds)
+                under "command", "method" and "handler", empty if metrics are disabled.
+        """
+        if self.metrics is None:
+            return {}
+        snap = self.metrics.snapshot()
+        if self.event_bus is not None:
+            snap["event_bus"] = self.event_bus.stats
+        return snap
+
+    def emit_metrics(self) -> None:
+        if self.metrics is not None and self.has_handlers(BrowserEvents.METRICS):
+            self.handle_event(BrowserEvents.METRICS, self.metrics_snapshot())
+
+    # crash supervision
+    def enable_supervision(self, max_retries: int = 2, command_timeout: Optional[float] = 120,
+                           backoff: float = 0.5, cookies: bool = True,
+                           replay: Iterable[str] = ()) -> Supervisor:
+        """
+        Recover from browser crashes instead of failing the operation.
+
+        When a supervised operation (navigation, searches, waits, clicks...) fails and the
+        browser no longer answers, the session is restarted, the open tabs are reloaded with
+        their last known URLs, remembered cookies are restored and the operation is retried.
+        Tab IDs from before the crash keep working, they are translated to the restored tabs.
+        Element objects from before the crash are gone, operations on them are not retried.
+        Clicks and submits (find_and_click_*, find_and_submit_*) may have reached the site
+        before the crash, the browser is recovered but they are not run again, FireFoxCrashed
+        is raised instead unless they are listed in replay.
+        A BROWSER_CRASHED event is emitted per failure and a BROWSER_RECOVERED event, with
+        the cost of the recovery, per restart.
+
+        Args:
+            max_retries (int): Restarts tried for a single operation before FireFoxCrashed is raised.
+            command_timeout (Optional[float]): Seconds a single webdriver command may run before the
+                browser is considered hung and killed, page loads included. None disables the watchdog.
+            backoff (float): Seconds to wait before restarting, doubled for each further restart of the same operation.
+            cookies (bool): Remember cookies after page loads, one extra round trip per load, and restore them.
+            replay (Iterable[str]): Click and submit operations to retry after a recovery anyway,
+                e.g. {"find_and_click_css_selector"} when clicking twice is harmless.
+
+        Returns:
+            Supervisor: The recovery policy and its counters.
+        """
+        self.disable_supervision()
+        watchdog = Watchdog(command_timeout, self._on_hang) if command_timeout else None
+        self.supervisor = Supervisor(max_retries, backoff, cookies, watchdog, replay)
+        if watchdog is not None:
+            for command in ASYNC_SCRIPT_COMMANDS:
+                watchdog.slack[command] = self._script_timeout or 0
+            if self._driver is not None:
+                watchdog.watch(self._driver)
+        return self.supervisor
+
+    def disable_supervision(self) -> None:
+        supervisor, self.supervisor = self.supervisor, None
+        if supervisor is not None:
+            supervisor.close()
+        self._cookie_jar = {}
+
+    def _on_hang(self, command: str) -> None:
+        """ watchdog callback, runs on the watchdog thread while the browser thread is blocked"""
+        if self._driver is not None:
+            kill_driver(self._driver)
+
+    def _is_crash(self, error: Exception) -> bool:
+        if isinstance(error, (NoSession, ElementNotFound, InvalidElement, InvalidTabID)):
+            return False  # raised by us, not by a dying browser
+        watchdog = self.supervisor.watchdog
+        if watchdog is not None and watchdog.hung:
+            return True
+        return not self.is_alive()
+
+    def _supervised_call(self, method: Callable, args: tuple, kwargs: dict):
+        supervisor = self.supervisor
+        supervisor.active = True
+        attempt = 0
+        try:
+            while True:
+                try:
+                    result = method(self, *args, **kwargs)
+                except Exception as e:
+                    if not self._is_crash(e):
+                        raise
+                    error = e
+                    while True:  # a restart can crash too, it counts as an attempt
+                        attempt += 1
+                        hung = supervisor.watchdog.hung if supervisor.watchdog is not None else None
+                        event_data = {"operation": method.__name__,
+                                      "error": repr(error),
+                                      "hung_command": hung,
+                                      "attempt": attempt,
+                                      "tab2url": dict(self._tab2url)}
+                        self.handle_event(BrowserEvents.BROWSER_CRASHED, event_data)
+                        if attempt > supervisor.max_retries:
+                            raise FireFoxCrashed(
+                                f"{method.__name__} failed after {supervisor.max_retries} restarts") from error
+                        sleep(supervisor.backoff * 2 ** (attempt - 1))
+                        try:
+                            self._recover(method.__name__, attempt)
+                            break
+                        except Exception as e:
+                            error = e
+                    if not supervisor.replays(method.__name__):
+                        raise FireFoxCrashed(f"{method.__name__} crashed the browser, it was recovered "
+                                             f"but the operation was not run again") from error
+                    continue
+                if supervisor.cookies and method.__name__ in COOKIE_OPS:
+                    self._remember_cookies()
+                return result
+        finally:
+            supervisor.active = False
+
+    def _remember_cookies(self) -> None:
+        """ cookies can only be read for the focused page, keep them per origin"""
+        url = self._tab2url.get(self._current_tab)
+        if not url or not url.startswith("http"):
+            return
+        parts = urlsplit(url)
+        try:
+            self._cookie_jar[f"{parts.scheme}://{parts.netloc}"] = self._driver.get_cookies()
+        except Exception:
+            pass  # a crash will be noticed by the next operation
+
+    def _restore_cookies(self) -> int:
+        """
+        Add remembered cookies to the new session, answering a placeholder page per origin
+        from a request interceptor so no real page has to load first.
+
+        Returns:
+            int: Cookies restored.
+        """
+        seeds = {f"{origin}/pombo-correio-restore-cookies" for origin in self._cookie_jar}
+
+        def answer(request):
+            if request.url in seeds:
+                request.create_response(status_code=200, headers=[("Content-Type", "text/html")],
+                                        body=b"<html></html>")
+
+        self.request_interceptors.insert(0, answer)
+        self._install_interceptors()
+        restored = 0
+        try:
+            for origin, cookies in self._cookie_jar.items():
+                self._driver.get(f"{origin}/pombo-correio-restore-cookies")
+                for cookie in cookies:
+                    try:
+                        self._driver.add_cookie(cookie)
+                        restored += 1
+                    except Exception:
+                        pass  # e.g. a cookie of a parent domain the browser refuses
+        finally:
+            self.request_interceptors.remove(answer)
+            self._install_interceptors()
+        return restored
+
+    def _recover(self, operation: str, attempt: int) -> None:
+        """ replace the dead browser with a new session holding the same tabs and cookies"""
+        started = phase = perf_counter()
+        timings = {}
+
+        def _phase(name):
+            nonlocal phase
+            now = perf_counter()
+            timings[name] = now - phase
+            phase = now
+
+        # the last known state, the dead driver can not be asked
+        tabs = dict(self._tab2url)
+        tabs.update((tab, url) for tab, url in self._navigated.items() if tab in tabs)
+        focused = self._current_tab
+        aliases = dict(self._tab_aliases)
+        cookies = self._cookie_jar
+
+        if self._driver is not None:
+            kill_driver(self._driver)
+            try:
+                self._driver.quit()  # fails fast now, frees the selenium-wire proxy
+            except Exception:
+                pass
+            self._driver = None
+        _phase("kill")
+
+        self.new_session()
+        _phase("restart")
+
+        self._cookie_jar = cookies
+        restored_cookies = self._restore_cookies() if cookies else 0
+        _phase("cookies")
+
+        # reopen the tabs, the first one reuses the tab of the new session
+        first = self._current_tab
+        restored = {}
+        urls = [(tab, url) for tab, url in tabs.items() if url]
+        for tab, url in urls[1:]:
+            known = set(self._driver.window_handles)
+            self._driver.execute_script("window.open(arguments[0], '_blank');", url)
+            new = [h for h in self._driver.window_handles if h not in known]
+            if new:
+                restored[tab] = new[0]
+                self._tab2url[new[0]] = url
+                self._expect_navigation(url, new[0])
+        if urls:
+            restored[urls[0][0]] = first
+            self._driver.get(urls[0][1])
+            self._tab2url[first] = urls[0][1]
+        # tabs restored earlier keep following their new tab
+        self._tab_aliases = {old: restored.get(new, new) for old, new in aliases.items()}
+        self._tab_aliases.update(restored)
+        target = self._tab_aliases.get(focused)
+        if target and target != self._current_tab:
+            self._driver.switch_to.window(target)
+            self._current_tab = target
+        _phase("tabs")
+
+        cost = perf_counter() - started
+        timings["total"] = cost
+        self.supervisor.restarts += 1
+        self.supervisor.total_cost += cost
+        if self.metrics is not None:
+            self.metrics.observe("recovery", operation, cost)
+        event_data = {"operation": operation,
+                      "attempt": attempt,
+                      "cost": cost,
+                      "timings": timings,
+                      "tabs": restored,
+                      "cookies": restored_cookies,
+                      "tab_id": self._current_tab}
+        self.handle_event(BrowserEvents.BROWSER_RECOVERED, event_data)
+
+    def _resolve_tab(self, tab_id: Optional[str]) -> Optional[str]:
+        """ tab IDs from before a recovery point to the tab restored in their place"""
+        return self._tab_aliases.get(tab_id, tab_id) if self._tab_aliases else tab_id
 
     # browser properties
-    def _sync_tab2url(self) -> Dict[str, str]:
+    @timed
+    @supervised
+    def sync_tab2url(self) -> Dict[str, str]:
         """
-        Sync the internal mapping of tab IDs to their current URLs.
+        Fully resync the mapping of tab IDs to URLs by visiting every open tab.
+
+        This costs a few round trips per tab, the mapping is otherwise kept up to date
+        incrementally, call this only to pick up tabs opened by the page itself (popups, extensions).
 
         Returns:
             Dict[str, str]: A dictionary mapping tab IDs to their current URLs.
@@ -175,6 +744,7 @@ class _AbstractBrowser:
         if not self._driver:
             return self._tab2url
         current = self.current_tab_id
+        self._current_tab = current
         switched = False
         self._tab2url = {}
         for tab in self.open_tabs:
@@ -187,11 +757,79 @@ class _AbstractBrowser:
                 pass
         if switched:
             self.switch_to_tab(current)
+        self._track_navigations()
+        self._navigated = {}
+        self._opening = {}
         return self._tab2url
 
+    def _sync_tab2url(self) -> Dict[str, str]:
+        return self.sync_tab2url()
+
+    @staticmethod
+    def _url_key(url: str) -> str:
+        """ url as the browser requests it, no fragment, lowercase scheme and host, "/" for an empty path"""
+        try:
+            parts = urlsplit(url)
+        except ValueError:
+            return url
+        netloc = parts.netloc.lower()
+        default_port = {"http": ":80", "https": ":443"}.get(parts.scheme.lower())
+        if default_port and netloc.endswith(default_port):
+            netloc = netloc[:-len(default_port)]
+        path = parts.path or ("/" if netloc else "")
+        return urlunsplit((parts.scheme.lower(), netloc, path, parts.query, ""))
+
+    def _expect_navigation(self, url: str, tab: str) -> None:
+        """ the next main frame request for url belongs to tab, not to the focused one"""
+        self._opening[self._url_key(url)] = tab
+
+    def _forget_navigations(self, tab: str) -> None:
+        """ drop pending navigations of a tab that finished loading or was closed"""
+        self._opening = {url: t for url, t in self._opening.items() if t != tab}
+
+    def _note_navigation(self, url: str, status: int, location: Optional[str]) -> None:
+        """
+        A main frame response in a tab we did not navigate ourselves (link click,
+        form submit, redirect) marks that tab as navigated.
+        """
+        key = self._url_key(url)
+        if 300 <= status < 400:
+            # a tab waiting for this url now waits for the redirect target
+            tab = self._opening.pop(key, None)
+            if tab is not None and location:
+                self._expect_navigation(urljoin(url, location), tab)
+            return
+        tab = self._opening.pop(key, None) or self._current_tab
+        if tab is not None:
+            self._navigated[tab] = url
+
+    def _track_navigations(self) -> None:
+        """ apply the main frame responses seen since the last call, without loading captured requests"""
+        log = getattr(getattr(self._driver, "backend", None), "storage", None)
+        if isinstance(log, NavigationLog):
+            for url, status, location in log.drain():
+                self._note_navigation(url, status, location)
+
     @property
     def tab2url(self) -> Dict[str, str]:
-        """Returns the current mapping of tab IDs to URLs."""
+        """
+        Returns the current mapping of tab IDs to URLs.
+
+        Only tabs that navigated on their own since the last read are refreshed,
+        the focused one from the driver and the others from the captured request.
+        """
+        self._track_navigations()
+        for tab, url in self._navigated.items():
+            if tab not in self._tab2url:
+                continue
+            if tab == self._current_tab:
+                try:
+                    url = self.current_url
+                except TabDiscarded:
+                    self._tab2url.pop(tab)
+                    continue
+            self._tab2url[tab] = url
+        self._navigated = {}
         return self._tab2url
 
     @property
@@ -259,85 +897,217 @@ class _AbstractBrowser:
             raise ElementNotFound
         # lookup xpath/css reference
         if isinstance(element, str):
-            tab_id = self.current_tab_id
-            if tab_id in self.tab_elements:
-                if element in self.tab_elements[tab_id]:
-                    elements = self.tab_elements[tab_id][element]
-                    if len(elements) < idx + 1:
-                        raise InvalidElement
-                    element = elements[idx]
-                else:
-                    raise InvalidElement
-            else:
+            tab_id = self._current_tab or self.current_tab_id
+            entry = self.tab_elements.lookup(tab_id, element)
+            if entry is None:
+                raise InvalidElement
+            elements = list(entry.elements.values())
+            if len(elements) < idx + 1:
                 raise InvalidElement
+            if self._is_stale(elements[idx]):
+                elements = self._resolve_again(tab_id, element, entry.by)
+                if len(elements) < idx + 1:
+                    raise ElementNotFound
+            element = elements[idx]
         return element
 
+    @staticmethod
+    def _is_stale(element) -> bool:
+        try:
+            element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+
+    def _resolve_again(self, tab_id: str, selector: str, by: Optional[str]) -> List:
+        """ search a selector whose cached elements went stale, elements found inside other elements can not be searched again"""
+        if by is None:
+            self.tab_elements.invalidate(tab_id, selector)
+            raise InvalidElement
+        elements = self._driver.find_elements(self._SELECTORS[by][1], selector)
+        if elements:
+            self.tab_elements.replace(tab_id, selector, elements)
+        else:
+            self.tab_elements.invalidate(tab_id, selector)
+        return elements
+
+    @timed
     def get_element_attribute(self, element, attr):
         element = self._validate_element(element)
         return element.get_attribute(attr)
 
+    @staticmethod
+    def _element_href(element) -> Optional[str]:
+        return element.get_attribute("href") or element.get_attribute("src")
+
+    def _element_event_data(self, event: BrowserEvents, element,
+                            event_data: Optional[Dict] = None) -> Dict:
+        return self._event_data((event,), event_data or {},
+                                element_text=lambda: element.text,
+                                tab_id=lambda: self.current_tab_id,
+                                url=lambda: self.current_url,
+                                href=lambda: self._element_href(element))
+
+    @timed
     def click_element(self, element, event_data=None):
         element = self._validate_element(element)
 
         # TODO type check for element and exception
-        event_data = event_data or {}
-        event_data["element_text"] = element.text
-        event_data["tab_id"] = self.current_tab_id
-        event_data["url"] = self.current_url
-        href = element.get_attribute("href") or element.get_attribute("src")
-        event_data["href"] = href
+        event_data = self._element_event_data(BrowserEvents.ELEMENT_CLICKED,
+                                              element, event_data)
         element.click()
         self.handle_event(BrowserEvents.ELEMENT_CLICKED, event_data)
 
+    @timed
     def send_keys_element(self, keys, element, event_data=None):
         element = self._validate_element(element)
-        event_data = event_data or {}
+        event_data = self._element_event_data(BrowserEvents.ELEMENT_SEND_KEYS,
+                                              element, event_data)
         event_data["keys"] = keys
-        event_data["element_text"] = element.text
-        event_data["tab_id"] = self.current_tab_id
-        event_data["url"] = self.current_url
-        href = element.get_attribute("href") or element.get_attribute("src")
-        event_data["href"] = href
         element.send_keys(keys)
         self.handle_event(BrowserEvents.ELEMENT_SEND_KEYS, event_data)
 
+    @timed
     def submit_element(self, element, event_data=None):
         element = self._validate_element(element)
-        event_data = event_data or {}
-        event_data["element_text"] = element.text
-        event_data["tab_id"] = self.current_tab_id
-        event_data["url"] = self.current_url
-        href = element.get_attribute("href") or element.get_attribute("src")
-        event_data["href"] = href
+        event_data = self._element_event_data(BrowserEvents.ELEMENT_SUBMIT,
+                                              element, event_data)
         element.submit()
         self.handle_event(BrowserEvents.ELEMENT_SUBMIT, event_data)
 
     def clear_elements(self, tab_id=None):
         if tab_id:
             if tab_id in self.tab_elements:
-                self.tab_elements.pop(tab_id)
+                self.tab_elements.invalidate(tab_id)
             else:
                 raise InvalidTabID
         else:
-            self.tab_elements = {}
+            self.tab_elements.clear()
 
-    def _cache_element(self, element, element_id):
+    def _cache_element(self, element, element_id, by: Optional[str] = None):
         if element:
-            if self.current_tab_id not in self.tab_elements:
-                self.tab_elements[self.current_tab_id] = {}
-            if element_id in self.tab_elements[self.current_tab_id]:
-                self.tab_elements[self.current_tab_id][element_id].append(
-                    element)
-            else:
-                self.tab_elements[self.current_tab_id][element_id] = [element]
+            self.tab_elements.add(self._current_tab or self.current_tab_id,
+                                  element_id, element, by)
 
     # element search
-    def search_xpath(self, xpath, source_element=None, filter=None):
-        event_data = {"xpath": xpath,
-                      "tab_id": self.current_tab_id,
-                      "filter": filter,
-                      "url": self.current_url}
+    def _find_filtered(self, by: str, selector: str, source_element, filter) -> List:
+        """
+        Find the elements matching a selector and a filter, in a single round trip.
+
+        Args:
+            by (str): "css" or "xpath".
+            selector (str): The CSS selector or XPath expression.
+            source_element: The driver to search the document, or a WebElement to search inside it.
+            filter (Union[str, list, dict], optional): Attribute and text constraints, see pombo_correio.filters.
+
+        Returns:
+            List[WebElement]: The matching elements, in document order.
+        """
+        query, residual = compile_filter(by, selector, filter)
+        if residual is None:  # the browser does all the filtering
+            if by == "xpath":
+                return source_element.find_elements_by_xpath(query)
+            return source_element.find_elements_by_css_selector(query)
+        root = None if source_element is self._driver else source_element
+        return self._driver.execute_script(FIND_FILTERED, by, query, root, residual) or []
+
+    def _bulk_search(self, by: str, selector: str, source_element=None,
+                     filter=None, attributes: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Search elements and extract their data with a single execute_script call.
+
+        Args:
+            by (str): "css" or "xpath".
+            selector (str): The CSS selector or XPath expression.
+            source_element (Union[WebElement, str], optional): Search inside this element.
+            filter (Union[str, list, dict], optional): Attribute and text constraints, see pombo_correio.filters.
+            attributes (Optional[List[str]]): Extra attributes to return for each match.
+
+        Returns:
+            List[Dict]: One dict per match with "element", "text", "href" and "attributes" keys.
+        """
+        key, _, search_evt, _, found_evt, not_found_evt = self._SELECTORS[by]
+        query, residual = compile_filter(by, selector, filter)
+
+        event_data = self._event_data((search_evt, found_evt, not_found_evt),
+                                      {key: selector, "filter": filter},
+                                      tab_id=lambda: self.current_tab_id,
+                                      url=lambda: self.current_url)
+
+        # only selectors searched from the document root can re-resolve stale elements
+        root_by = by if source_element is None else None
+        if source_element is not None:
+            source_element = self._validate_element(source_element)
+            event_data["source_element"] = source_element.id
+
+        self.handle_event(search_evt, event_data)
+
+        matches = self._driver.execute_script(
+            BULK_SEARCH, by, query, source_element,
+            list(attributes or []), residual) or []
+
+        for match in matches:
+            element = match["element"]
+            event_data["element_text"] = match["text"]
+            event_data["href"] = match["href"]
+            event_data["element_id"] = element.id
+            event_data["attributes"] = match["attributes"]
+            self.handle_event(found_evt, event_data)
+            self._cache_element(element, selector, root_by)
+
+        if not matches:
+            self.handle_event(not_found_evt, event_data)
+        return matches
+
+    @timed
+    @supervised
+    def bulk_search_xpath(self, xpath, source_element=None, filter=None,
+                          attributes: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Search an XPath and return every match with its text and attributes in one round trip.
 
+        Args:
+            xpath (str): The XPath expression.
+            source_element (Union[WebElement, str], optional): Search inside this element.
+            filter (Union[str, list, dict], optional): Attribute and text constraints, see pombo_correio.filters.
+            attributes (Optional[List[str]]): Extra attributes to return for each match.
+
+        Returns:
+            List[Dict]: One dict per match with "element", "text", "href" and "attributes" keys.
+        """
+        return self._bulk_search("xpath", xpath, source_element, filter, attributes)
+
+    @timed
+    @supervised
+    def bulk_search_css(self, css_selector, source_element=None, filter=None,
+                        attributes: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Search a CSS selector and return every match with its text and attributes in one round trip.
+
+        Args:
+            css_selector (str): The CSS selector.
+            source_element (Union[WebElement, str], optional): Search inside this element.
+            filter (Union[str, list, dict], optional): Attribute and text constraints, see pombo_correio.filters.
+            attributes (Optional[List[str]]): Extra attributes to return for each match.
+
+        Returns:
+            List[Dict]: One dict per match with "element", "text", "href" and "attributes" keys.
+        """
+        return self._bulk_search("css", css_selector, source_element, filter, attributes)
+
+    def search_xpath(self, xpath, source_element=None, filter=None, bulk=False):
+        if bulk:
+            for match in self.bulk_search_xpath(xpath, source_element, filter):
+                yield match["element"]
+            return
+
+        events = (BrowserEvents.SEARCH_XPATH, BrowserEvents.XPATH_FOUND,
+                  BrowserEvents.XPATH_NOT_FOUND)
+        event_data = self._event_data(events, {"xpath": xpath, "filter": filter},
+                                      tab_id=lambda: self.current_tab_id,
+                                      url=lambda: self.current_url)
+
+        root_by = "xpath" if source_element is None else None
         if source_element is None:
             source_element = self._driver
         else:
@@ -347,57 +1117,33 @@ class _AbstractBrowser:
         self.handle_event(BrowserEvents.SEARCH_XPATH, event_data)
 
         found = False
-        for element in source_element.find_elements_by_xpath(xpath):
-            skip = False
-
-            if not filter:
-                pass
-            elif isinstance(filter, str):
-                # contains attribute
-                if not self.get_element_attribute(element, filter):
-                    skip = True
-            elif isinstance(filter, list):
-                # contains all attributes
-                if not all([self.get_element_attribute(element, f) for f in
-                            filter]):
-                    skip = True
-            elif isinstance(filter, dict):
-                for k in filter:
-                    if isinstance(filter[k], str):
-                        # requite attribute value
-                        if self.get_element_attribute(
-                                element, k) != filter[k]:
-                            skip = True
-                    elif isinstance(filter[k], list):
-                        # requite attribute value in value list
-                        if self.get_element_attribute(
-                                element, k) not in filter[k]:
-                            skip = True
-                    else:
-                        raise ValueError
-
-            if skip:
-                continue
-            event_data["element_text"] = element.text
-            href = element.get_attribute("href") or \
-                   element.get_attribute("src")
-            event_data["href"] = href
+        for element in self._find_filtered("xpath", xpath, source_element, filter):
             event_data["element_id"] = element.id
+            self._event_data((BrowserEvents.XPATH_FOUND,), event_data,
+                             element_text=lambda: element.text,
+                             href=lambda: self._element_href(element))
             self.handle_event(BrowserEvents.XPATH_FOUND, event_data)
 
-            self._cache_element(element, xpath)
+            self._cache_element(element, xpath, root_by)
             yield element
             found = True
 
         if not found:
             self.handle_event(BrowserEvents.XPATH_NOT_FOUND, event_data)
 
-    def search_css(self, css_selector, source_element=None, filter=None):
-        event_data = {"css_selector": css_selector,
-                      "tab_id": self.current_tab_id,
-                      "filter": filter,
-                      "url": self.current_url}
+    def search_css(self, css_selector, source_element=None, filter=None, bulk=False):
+        if bulk:
+            for match in self.bulk_search_css(css_selector, source_element, filter):
+                yield match["element"]
+            return
+
+        events = (BrowserEvents.SEARCH_CSS, BrowserEvents.CSS_FOUND,
+                  BrowserEvents.CSS_NOT_FOUND)
+        event_data = self._event_data(events, {"css_selector": css_selector, "filter": filter},
+                                      tab_id=lambda: self.current_tab_id,
+                                      url=lambda: self.current_url)
 
+        root_by = "css" if source_element is None else None
         if source_element is None:
             source_element = self._driver
         else:
@@ -407,46 +1153,14 @@ class _AbstractBrowser:
         self.handle_event(BrowserEvents.SEARCH_CSS, event_data)
 
         found = False
-        for element in source_element.find_elements_by_css_selector(
-                css_selector):
-            skip = False
-
-            if not filter:
-                pass
-            elif isinstance(filter, str):
-                # contains attribute
-                if not self.get_element_attribute(element, filter):
-                    skip = True
-            elif isinstance(filter, list):
-                # contains all attributes
-                if not all([self.get_element_attribute(element, f) for f in
-                            filter]):
-                    skip = True
-            elif isinstance(filter, dict):
-                for k in filter:
-                    if isinstance(filter[k], str):
-                        # requite attribute value
-                        if self.get_element_attribute(
-                                element, k) != filter[k]:
-                            skip = True
-                    elif isinstance(filter[k], list):
-                        # requite attribute value in value list
-                        if self.get_element_attribute(
-                                element, k) not in filter[k]:
-                            skip = True
-                    else:
-                        raise ValueError
-
-            if skip:
-                continue
-            event_data["element_text"] = element.text
-            href = element.get_attribute("href") or \
-                   element.get_attribute("src")
-            event_data["href"] = href
+        for element in self._find_filtered("css", css_selector, source_element, filter):
             event_data["element_id"] = element.id
+            self._event_data((BrowserEvents.CSS_FOUND,), event_data,
+                             element_text=lambda: element.text,
+                             href=lambda: self._element_href(element))
             self.handle_event(BrowserEvents.CSS_FOUND, event_data)
 
-            self._cache_element(element, css_selector)
+            self._cache_element(element, css_selector, root_by)
             yield element
             found = True
 
@@ -454,6 +1168,8 @@ class _AbstractBrowser:
             self.handle_event(BrowserEvents.CSS_NOT_FOUND, event_data)
 
     # element selection
+    @timed
+    @supervised
     def get_xpath(self, xpath, timeout=10, wait=False):
         if self._driver is None:
             print("[ERROR] please call new_session() first")
@@ -463,6 +1179,8 @@ class _AbstractBrowser:
         for elem in self.search_xpath(xpath):
             return elem
 
+    @timed
+    @supervised
     def get_css_selector(self, css_selector, timeout=10, wait=False):
         if self._driver is None:
             print("[ERROR] please call new_session() first")
@@ -472,66 +1190,248 @@ class _AbstractBrowser:
         for element in self.search_css(css_selector):
             return element
 
-    def wait_for_xpath(self, xpath, timeout=30):
-        if self._driver is None:
-            print("[ERROR] please call new_session() first")
-            raise NoSession
-
-        event_data = {"xpath": xpath,
-                      "timeout": timeout,
-                      "tab_id": self.current_tab_id,
-                      "url": self.current_url}
-        self.handle_event(BrowserEvents.WAIT_FOR_XPATH, event_data)
-
+    def _wait_started(self, by: str, selector: str, timeout: float) -> Dict:
+        """ emit WAIT_FOR_* and return the event payload shared with the result events"""
+        key, _, _, wait_evt, found_evt, not_found_evt = self._SELECTORS[by]
+        event_data = self._event_data((wait_evt, found_evt, not_found_evt),
+                                      {key: selector, "timeout": timeout},
+                                      tab_id=lambda: self.current_tab_id,
+                                      url=lambda: self.current_url)
+        self.handle_event(wait_evt, event_data)
+        return event_data
+
+    def _poll_visible(self, by: str, selector: str):
+        """ single non blocking check, returns the element if present and visible"""
+        locator = self._SELECTORS[by][1]
         try:
-            element = WebDriverWait(self._driver, timeout).until(
-                ec.visibility_of_element_located(
-                    (By.XPATH, xpath)))
-        except Exception as e:
-            element = None
+            return ec.visibility_of_element_located((locator, selector))(self._driver) or None
+        except (NoSuchElementException, StaleElementReferenceException):
+            return None
 
+    def _wait_finished(self, by: str, selector: str, element, event_data: Dict):
+        """ emit *_FOUND/*_NOT_FOUND and cache the element"""
+        _, _, _, _, found_evt, not_found_evt = self._SELECTORS[by]
         if element:
-            event_data["element_text"] = element.text
-            href = element.get_attribute("href") or element.get_attribute(
-                "src")
-            event_data["href"] = href
             event_data["element_id"] = element.id
-            self.handle_event(BrowserEvents.XPATH_FOUND, event_data)
+            self._event_data((found_evt,), event_data,
+                             element_text=lambda: element.text,
+                             href=lambda: self._element_href(element))
+            self.handle_event(found_evt, event_data)
         else:
-            self.handle_event(BrowserEvents.XPATH_NOT_FOUND, event_data)
-
-        self._cache_element(element, xpath)
+            self.handle_event(not_found_evt, event_data)
+        self._cache_element(element, selector, by)
         return element
 
-    def wait_for_css_selector(self, css_selector, timeout=30):
+    def _set_script_timeout(self, timeout: float) -> None:
+        """ only talk to the driver when the async script timeout changes"""
+        if self._script_timeout != timeout:
+            self._driver.set_script_timeout(timeout)
+            self._script_timeout = timeout
+            if self.supervisor is not None and self.supervisor.watchdog is not None:
+                for command in ASYNC_SCRIPT_COMMANDS:
+                    self.supervisor.watchdog.slack[command] = timeout
+
+    @staticmethod
+    def _is_unload(error: Exception) -> bool:
+        """ the document or frame the script ran in went away, e.g. the page navigated"""
+        if isinstance(error, NoSuchFrameException):
+            return True
+        return isinstance(error, JavascriptException) and "unload" in str(error).lower()
+
+    def _run_until_loaded(self, script: str, timeout: float, *args):
+        """
+        Run an async page script, again in the new document if the page navigates away meanwhile.
+
+        The remaining time in milliseconds is passed to the script as its last argument.
+
+        Args:
+            script (str): The async script, answering "unload" when its document goes away.
+            timeout (float): Upper bound in seconds over every attempt.
+            *args: Script arguments before the timeout.
+
+        Returns:
+            The script result, "unload" if the page kept navigating until the timeout or the last attempt.
+
+        Raises:
+            WebDriverException: Any error other than the document unloading.
+        """
+        deadline = monotonic() + timeout
+        for _ in range(3):
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                break
+            # leave the in-page timer room to fire before the driver gives up
+            self._set_script_timeout(int(timeout) + 2)
+            try:
+                result = self._driver.execute_async_script(script, *args, int(remaining * 1000))
+            except (JavascriptException, NoSuchFrameException) as e:
+                if not self._is_unload(e):
+                    raise
+                result = "unload"
+            if result != "unload":
+                return result
+        return "unload"
+
+    def _wait_visible(self, specs: List[Tuple[str, str]], mode: str, timeout: float) -> List:
+        """
+        Block until the selectors become visible, notified by an in-page MutationObserver.
+
+        Args:
+            specs (List[Tuple[str, str]]): (by, selector) pairs, by is "css" or "xpath".
+            mode (str): "any" returns once one selector is visible, "all" once every one is.
+            timeout (float): Upper bound in seconds.
+
+        Returns:
+            List: The first visible element of each selector, None for the ones not visible.
+        """
+        deadline = monotonic() + timeout
+        try:
+            found = self._run_until_loaded(WAIT_VISIBLE, timeout, [list(s) for s in specs], mode)
+        except WebDriverException:
+            if not self.is_alive():
+                raise  # a crash, not a failed search
+            return [None] * len(specs)  # e.g. an invalid selector, reported as not found
+        if found != "unload":
+            return found or [None] * len(specs)
+
+        # the page keeps navigating, fall back to polling
+        def _check(driver):
+            found = [self._poll_visible(by, selector) for by, selector in specs]
+            done = all(found) if mode == "all" else any(found)
+            return found if done else False
+
+        try:
+            return WebDriverWait(self._driver, max(deadline - monotonic(), 0)).until(_check)
+        except Exception:
+            return [self._poll_visible(by, selector) for by, selector in specs]
+
+    def _wait_for(self, by: str, selector: str, timeout: float):
         if self._driver is None:
             print("[ERROR] please call new_session() first")
             raise NoSession
 
-        event_data = {"css_selector": css_selector, "timeout": timeout,
-                      "tab_id": self.current_tab_id, "url": self.current_url}
-        self.handle_event(BrowserEvents.WAIT_FOR_CSS, event_data)
+        event_data = self._wait_started(by, selector, timeout)
+        element = self._wait_visible([(by, selector)], "any", timeout)[0]
+        return self._wait_finished(by, selector, element, event_data)
 
-        try:
-            element = WebDriverWait(self._driver, timeout).until(
-                ec.visibility_of_element_located(
-                    (By.CSS_SELECTOR, css_selector)))
-        except Exception as e:
-            element = None
+    def _wait_for_many(self, selectors: List[Tuple[str, str]], mode: str, timeout: float) -> List:
+        if self._driver is None:
+            print("[ERROR] please call new_session() first")
+            raise NoSession
+        for by, _ in selectors:
+            if by not in self._SELECTORS:
+                raise ValueError(f"unknown selector kind: {by}")
+
+        started = [self._wait_started(by, selector, timeout) for by, selector in selectors]
+        found = self._wait_visible(selectors, mode, timeout)
+        if mode == "all" and not all(found):
+            found = [None] * len(selectors)
+        return [self._wait_finished(by, selector, element, event_data)
+                for (by, selector), element, event_data in zip(selectors, found, started)]
+
+    @timed
+    @supervised
+    def wait_for_any(self, selectors: List[Tuple[str, str]], timeout=30) -> List:
+        """
+        Wait until at least one of several selectors is visible.
 
-        if element:
-            event_data["element_text"] = element.text
-            href = element.get_attribute("href") or element.get_attribute(
-                "src")
-            event_data["href"] = href
-            event_data["element_id"] = element.id
-            self.handle_event(BrowserEvents.CSS_FOUND, event_data)
-        else:
-            self.handle_event(BrowserEvents.CSS_NOT_FOUND, event_data)
-        self._cache_element(element, css_selector)
-        return element
+        Args:
+            selectors (List[Tuple[str, str]]): (kind, selector) pairs, kind is "css" or "xpath".
+            timeout (float): Upper bound in seconds.
+
+        Returns:
+            List: The visible element for each selector, None for the ones that are not.
+        """
+        return self._wait_for_many(selectors, "any", timeout)
+
+    @timed
+    @supervised
+    def wait_for_all(self, selectors: List[Tuple[str, str]], timeout=30) -> List:
+        """
+        Wait until every one of several selectors is visible.
+
+        Args:
+            selectors (List[Tuple[str, str]]): (kind, selector) pairs, kind is "css" or "xpath".
+            timeout (float): Upper bound in seconds.
+
+        Returns:
+            List: The visible element for each selector, all None if they were not all visible in time.
+        """
+        return self._wait_for_many(selectors, "all", timeout)
+
+    @timed
+    @supervised
+    def wait_for_xpath(self, xpath, timeout=30):
+        return self._wait_for("xpath", xpath, timeout)
+
+    @timed
+    @supervised
+    def wait_for_css_selector(self, css_selector, timeout=30):
+        return self._wait_for("css", css_selector, timeout)
+
+    @classmethod
+    def _compile_fields(cls, fields: Dict[str, Union[str, Dict]]) -> List[List]:
+        """ normalize a field schema into [name, by, selector, attribute, all] rows for EXTRACT_RECORDS"""
+        compiled = []
+        for name, spec in fields.items():
+            if isinstance(spec, str):
+                selector, sep, attr = spec.rpartition("@")
+                if not sep or not re.fullmatch(r"[\w:-]+", attr):  # no "@", or it belongs to the selector
+                    selector, attr = spec, "text"
+                spec = {"css": selector, "attr": attr}
+            if not isinstance(spec, dict):
+                raise ValueError(f"invalid field spec for {name}: {spec}")
+            by = "xpath" if "xpath" in spec else "css"
+            selector = spec.get(by) or None  # no selector reads the container itself
+            compiled.append([name, by, selector, spec.get("attr", "text"), bool(spec.get("all", False))])
+        return compiled
+
+    @timed
+    @supervised
+    def extract_records(self, container_selector: str, fields: Dict[str, Union[str, Dict]],
+                        min_records: int = 0, timeout: float = 10, by: str = "css") -> List[Dict]:
+        """
+        Extract repeated records (list items, table rows, cards) with a single script call.
+
+        Each field is searched inside every container, either as a string "selector@attribute"
+        (CSS, the attribute defaults to the text, "@href" alone reads the container) or as a dict
+        {"css" or "xpath": selector, "attr": name, "all": bool}. Attributes "text" and "html"
+        return the element text and inner HTML, href/src are returned resolved.
+
+        Args:
+            container_selector (str): Selector matching one container per record.
+            fields (Dict[str, Union[str, Dict]]): Field name -> field spec.
+            min_records (int): Wait until at least this many containers exist. Defaults to 0, no wait.
+            timeout (float): Upper bound in seconds for the wait, whatever exists then is returned.
+            by (str): "css" or "xpath" for the container selector.
+
+        Returns:
+            List[Dict]: One dict per container, missing fields are None ([] for "all" fields).
+        """
+        if self._driver is None:
+            print("[ERROR] please call new_session() first")
+            raise NoSession
+        if by not in self._SELECTORS:
+            raise ValueError(f"unknown selector kind: {by}")
+        compiled = self._compile_fields(fields)
+
+        records = self._run_until_loaded(EXTRACT_RECORDS, timeout, by, container_selector,
+                                         compiled, min_records)
+        if records == "unload":
+            records = []  # the page kept navigating, nothing to extract
+
+        event_data = self._event_data((BrowserEvents.RECORDS_FOUND,),
+                                      {self._SELECTORS[by][0]: container_selector,
+                                       "fields": list(fields),
+                                       "count": len(records)},
+                                      tab_id=lambda: self.current_tab_id,
+                                      url=lambda: self.current_url)
+        self.handle_event(BrowserEvents.RECORDS_FOUND, event_data)
+        return records
 
     # action chains
+    @timed
+    @supervised
     def find_and_click_xpath(self, xpath, timeout=10, wait=True):
         if wait:
             element = self.wait_for_xpath(xpath, timeout)
@@ -539,6 +1439,8 @@ class _AbstractBrowser:
             element = self.get_xpath(xpath)
         self.click_element(element, {"xpath": xpath})
 
+    @timed
+    @supervised
     def find_and_click_css_selector(self, css_selector, timeout=10, wait=True):
         if wait:
             element = self.wait_for_css_selector(css_selector, timeout)
@@ -547,6 +1449,8 @@ class _AbstractBrowser:
         self.click_element(element, {"css_selector": css_selector})
         return element
 
+    @timed
+    @supervised
     def find_and_send_keys_xpath(self, keys, xpath, timeout=10, wait=True):
         if wait:
             element = self.wait_for_xpath(xpath, timeout)
@@ -554,6 +1458,8 @@ class _AbstractBrowser:
             element = self.get_xpath(xpath)
         self.send_keys_element(keys, element, {"xpath": xpath})
 
+    @timed
+    @supervised
     def find_and_send_keys_selector(self, keys, css_selector, timeout=10,
                                     wait=True):
         if wait:
@@ -562,6 +1468,8 @@ class _AbstractBrowser:
             element = self.get_css_selector(css_selector)
         self.send_keys_element(keys, element, {"css_selector": css_selector})
 
+    @timed
+    @supervised
     def find_and_submit_xpath(self, xpath, timeout=10, wait=True):
         if wait:
             element = self.wait_for_xpath(xpath, timeout)
@@ -569,6 +1477,8 @@ class _AbstractBrowser:
             element = self.get_xpath(xpath)
         self.submit_element(element, {"xpath": xpath})
 
+    @timed
+    @supervised
     def find_and_submit_css_selector(self, css_selector, timeout=10,
                                      wait=True):
         if wait:
@@ -588,21 +1498,90 @@ class _AbstractBrowser:
         if self._driver is None:
             raise DriverNotSet
 
+    @timed
     def new_session(self):
         self.stop()
-        self.create_driver()
+        started = phase = monotonic()
+        timings = {}
+
+        def _phase(name):
+            nonlocal phase
+            now = monotonic()
+            timings[name] = now - phase
+            phase = now
 
-        extensions = self.load_extensions()
+        self.create_driver()
+        if self.metrics is not None:
+            instrument_driver(self._driver, self.metrics)
+        if self.supervisor is not None and self.supervisor.watchdog is not None:
+            self.supervisor.watchdog.watch(self._driver)
+        self._install_capture_policy()
+        self._install_interceptors()
+        self.request_cursor = RequestCursor(self._driver)
+        _phase("driver_spawn")
+
+        self.load_extensions()
+        _phase("extension_install")
 
         self._driver.get(self.homepage)
+        _phase("homepage_load")
 
         self._driver.maximize_window()
-        sleep(2)
-        event_data = {"open_tabs": self.open_tabs,
-                      "tab_id": self.current_tab_id,
-                      "homepage": self.homepage}
+        ready = self.wait_until_ready(self.startup_timeout)
+        _phase("ready_wait")
+
+        self._current_tab = self.current_tab_id
+        self._tab2url = {self._current_tab: self.current_url}
+        self.startup_time = timings["total"] = monotonic() - started
+        self.startup_timings = timings
+        event_data = self._event_data((BrowserEvents.BROWSER_OPEN,),
+                                      {"homepage": self.homepage,
+                                       "tab_id": self._current_tab,
+                                       "ready": ready,
+                                       "startup_time": self.startup_time,
+                                       "timings": timings},
+                                      open_tabs=lambda: self.open_tabs)
         self.handle_event(BrowserEvents.BROWSER_OPEN, event_data)
-        self._sync_tab2url()
+
+    def document_ready(self) -> bool:
+        """
+        Check if the page in the focused tab finished loading.
+
+        Returns:
+            bool: True if document.readyState is "complete".
+        """
+        try:
+            return self._driver.execute_script("return document.readyState") == "complete"
+        except Exception:
+            return False
+
+    def extensions_ready(self) -> bool:
+        """
+        Check if every extension installed by load_extensions is running.
+
+        Returns:
+            bool: True when extensions report loaded, or when that can not be determined.
+        """
+        return True
+
+    def wait_until_ready(self, timeout: float = 10, interval: float = 0.05) -> bool:
+        """
+        Wait until the page finished loading and extensions are running.
+
+        Args:
+            timeout (float): Upper bound in seconds.
+            interval (float): Seconds between checks.
+
+        Returns:
+            bool: True if the session became ready before the timeout.
+        """
+        deadline = monotonic() + timeout
+        while True:
+            if self.document_ready() and self.extensions_ready():
+                return True
+            if monotonic() >= deadline:
+                return False
+            sleep(interval)
 
     def load_extensions(self):
         return []
@@ -610,10 +1589,26 @@ class _AbstractBrowser:
     def close_extensions_tabs(self):
         pass
 
+    def _load_failed(self, tab: str, url: str, load_time: float) -> None:
+        """ forget a load_many tab that went away before its page loaded"""
+        self._navigated.pop(tab, None)
+        self._forget_navigations(tab)
+        self.tab_elements.invalidate(tab)
+        self._tab2url.pop(tab, None)
+        event_data = {"url": url, "tab_id": tab, "ready": False, "load_time": load_time,
+                      "error": "tab closed"}
+        self.handle_event(BrowserEvents.OPEN_URL, event_data)
+
+    @timed
+    @supervised
     def open_new_tab(self, url, switch=True):
+        # requests captured so far belong to the tab that is still focused
+        self._track_navigations()
         self._driver.execute_script(
             '''window.open("{url}","_blank");'''.format(url=url))
         tab = self.open_tabs[-1]
+        self._tab2url[tab] = url
+        self._expect_navigation(url, tab)
 
         event_data = {"new_url": url,
                       "new_tab_id": tab}
@@ -621,61 +1616,271 @@ class _AbstractBrowser:
 
         if switch:
             self.switch_to_tab(tab)
-
-        self._sync_tab2url()
         return tab
 
+    @timed
+    @supervised
     def switch_to_tab(self, tab_id):
         if not self._driver:
             raise NoSession
-        event_data = {"open_tabs": self.open_tabs,
-                      "old_tab": self.current_tab_id,
-                      "old_url": self.current_url,
-                      "tab_id": tab_id}
+        tab_id = self._resolve_tab(tab_id)
+        event_data = self._event_data((BrowserEvents.SWITCH_TAB,),
+                                      {"tab_id": tab_id},
+                                      open_tabs=lambda: self.open_tabs,
+                                      old_tab=lambda: self.current_tab_id,
+                                      old_url=lambda: self.current_url)
+        # requests captured so far belong to the tab we are leaving
+        self._track_navigations()
         self._driver.switch_to.window(window_name=tab_id)
+        self._current_tab = tab_id
         self.handle_event(BrowserEvents.SWITCH_TAB, event_data)
 
-    def goto_url(self, url, tab_id=None):
+    @timed
+    @supervised
+    def goto_url(self, url, tab_id=None, blocking=None):
+        """
+        Navigate a tab to a URL.
+
+        Args:
+            url (str): The URL to open.
+            tab_id (Optional[str]): Tab to navigate, defaults to the focused tab.
+            blocking: Blocking preset name(s) or BlockRule(s) used for this page load only,
+                see set_blocking(). Defaults to the rules already set.
+        """
         if tab_id:
+            tab_id = self._resolve_tab(tab_id)
             self.switch_to_tab(tab_id)
         else:
-            tab_id = self.current_tab_id
-        event_data = {"url": url,
-                      "old_url": self.current_url,
-                      "tab_id": tab_id}
-        self._driver.get(url)
+            tab_id = self._current_tab or self.current_tab_id
+        event_data = self._event_data((BrowserEvents.OPEN_URL,),
+                                      {"url": url, "tab_id": tab_id},
+                                      old_url=lambda: self.current_url)
+        measure = self.has_handlers(BrowserEvents.OPEN_URL)
+        before = self.blocker.snapshot() if measure else None
+        previous = self.blocker.rules
+        if blocking is not None:
+            self.set_blocking(blocking)
+        try:
+            self._driver.get(url)
+        finally:
+            if blocking is not None:
+                self.set_blocking(previous)
+        self._track_navigations()
+        self._navigated.pop(tab_id, None)
+        self.tab_elements.invalidate(tab_id)
+        self._tab2url[tab_id] = self.current_url
+        if measure:
+            event_data["blocked"] = RequestBlocker.delta(before, self.blocker.snapshot())
         self.handle_event(BrowserEvents.OPEN_URL, event_data)
-        self._sync_tab2url()
 
-    def close_tab(self, tab_id=None):
+    def load_many(self, urls: Iterable[str], max_tabs: int = 4, timeout: float = 30,
+                  poll_interval: float = 0.1, close_tabs: bool = True):
+        """
+        Load pages in parallel tabs, yielding each one as soon as it finished loading.
+
+        Navigation never blocks, up to max_tabs pages load at the same time while the
+        caller processes the ones already loaded. The yielded tab is focused and stays
+        untouched until the caller asks for the next page, then it is reused.
+        A page whose tab is closed while loading is not yielded, an OPEN_URL event
+        with ready False reports it.
 
+        Args:
+            urls (Iterable[str]): Pages to load.
+            max_tabs (int): Pages loading at the same time.
+            timeout (float): Seconds before a slow page is stopped and yielded anyway.
+            poll_interval (float): Seconds between readiness checks while nothing is ready.
+            close_tabs (bool): Close the tabs opened for loading and refocus the original tab when done.
+
+        Yields:
+            Tuple[str, str]: (url, tab_id) in the order pages became ready.
+        """
+        if self._driver is None:
+            raise NoSession
+        pending = deque(urls)
+        home = self._current_tab or self.current_tab_id
+        opened: List[str] = []
+        free: List[str] = []
+        loading: Dict[str, Tuple[str, float]] = {}  # tab -> (url, started)
+        try:
+            while pending or loading:
+                while pending and len(loading) < max_tabs:
+                    url = pending.popleft()
+                    tab = None
+                    while free and tab is None:
+                        tab = free.pop()
+                        try:
+                            self._driver.switch_to.window(tab)
+                            self._current_tab = tab
+                            self._driver.execute_script(NAVIGATE, url)
+                            self._expect_navigation(url, tab)
+                        except NoSuchWindowException:
+                            tab = None  # the caller closed it
+                    if tab is None:
+                        tab = self.open_new_tab(url, switch=False)
+                        opened.append(tab)
+                    loading[tab] = (url, monotonic())
+
+                ready = None
+                for tab, (url, started) in list(loading.items()):
+                    try:
+                        self._driver.switch_to.window(tab)
+                        self._current_tab = tab
+                        done, href = self._driver.execute_script(LOAD_STATE, url)
+                    except NoSuchWindowException:
+                        # closed while loading, by the page or another thread
+                        del loading[tab]
+                        self._load_failed(tab, url, monotonic() - started)
+                        continue
+                    except (JavascriptException, NoSuchFrameException) as e:
+                        if not self._is_unload(e):
+                            raise
+                        done, href = False, url  # between two documents, still loading
+                    timed_out = monotonic() - started > timeout
+                    if done or timed_out:
+                        if timed_out:
+                            try:
+                                self._driver.execute_script("window.stop()")
+                            except (JavascriptException, NoSuchFrameException) as e:
+                                if not self._is_unload(e):
+                                    raise
+                        ready = (tab, url, href, done, monotonic() - started)
+                        break
+                if ready is None:
+                    sleep(poll_interval)
+                    continue
+
+                tab, url, href, done, load_time = ready
+                del loading[tab]
+                self._current_tab = tab
+                self._track_navigations()
+                self._navigated.pop(tab, None)
+                self._forget_navigations(tab)
+                self.tab_elements.invalidate(tab)
+                self._tab2url[tab] = href
+                event_data = {"url": url, "tab_id": tab, "ready": bool(done), "load_time": load_time}
+                self.handle_event(BrowserEvents.OPEN_URL, event_data)
+                yield url, tab
+                free.append(tab)
+        finally:
+            if close_tabs and self._driver is not None:
+                remaining = set(self.open_tabs)
+                for tab in opened:
+                    if tab in remaining and tab != home:
+                        self._driver.switch_to.window(tab)
+                        self._driver.close()
+                        self.tab_elements.invalidate(tab)
+                        self._tab2url.pop(tab, None)
+                        self._navigated.pop(tab, None)
+                        self._forget_navigations(tab)
+                if home in remaining:
+                    self._driver.switch_to.window(home)
+                    self._current_tab = home
+                else:
+                    self._current_tab = self.current_tab_id
+
+    @timed
+    @supervised
+    def close_tab(self, tab_id=None):
+        current = self._current_tab or self.current_tab_id
+        tab_id = self._resolve_tab(tab_id)
         if not tab_id:
             # close the active tab
-            self._driver.close()
-            tab_id = self.current_tab_id
-        else:
+            tab_id = current
+        elif tab_id != current:
             self.switch_to_tab(tab_id)
-            self._driver.close()
-
-        if tab_id in self.tab_elements:
-            self.tab_elements.pop(tab_id)
-        event_data = {"open_tabs": self.open_tabs,
-                      "current_url": self.current_url,
-                      "tab_id": self.current_tab_id,
-                      "closed_tab": tab_id,
-                      "tab2url": self.tab2url}
+        self._track_navigations()
+        self._driver.close()
+
+        # refocus the previous tab, or any tab left if we closed the focused one
+        remaining = self.open_tabs
+        if current != tab_id and current in remaining:
+            self._driver.switch_to.window(current)
+            self._current_tab = current
+        elif remaining:
+            self._driver.switch_to.window(remaining[-1])
+            self._current_tab = remaining[-1]
+        else:
+            self._current_tab = None
+
+        self.tab_elements.invalidate(tab_id)
+        self._tab2url.pop(tab_id, None)
+        self._navigated.pop(tab_id, None)
+        self._forget_navigations(tab_id)
+        event_data = self._event_data((BrowserEvents.TAB_CLOSED,),
+                                      {"closed_tab": tab_id,
+                                       "open_tabs": remaining,
+                                       "tab_id": self._current_tab,
+                                       "tab2url": self.tab2url},
+                                      current_url=lambda: self.current_url)
 
         self.handle_event(BrowserEvents.TAB_CLOSED, event_data)
 
-        self._sync_tab2url()
+    def _capture(self, element=None, format: str = "png", quality: int = 80) -> Screenshot:
+        if format not in FORMATS:
+            raise ValueError(f"unknown screenshot format: {format}")
+        if self._driver is None:
+            raise NoSession
+        if element is None:
+            png = self._driver.get_screenshot_as_png()
+            selector = None
+        else:
+            selector = element if isinstance(element, str) else None
+            png = self._validate_element(element).screenshot_as_png  # cropped by the browser
+        return Screenshot(png, format, quality if format != "png" else None,
+                          url=self._tab2url.get(self._current_tab), tab_id=self._current_tab,
+                          selector=selector)
+
+    @timed
+    @supervised
+    def screenshot(self, element=None, format: str = "png", quality: int = 80,
+                   sink: Optional[Callable[[Screenshot], None]] = None) -> Screenshot:
+        """
+        Capture the viewport, or a single element, into memory.
 
-    def save_screenshot(self, path=None):
-        path = path or join(gettempdir(), "pybrowser_screenshot.png")
-        self._driver.save_screenshot(path)
+        JPEG and WebP encoding (needs Pillow) runs on a background thread pool,
+        the capture returns right away and screenshot.data waits for the encoder.
+
+        Args:
+            element: A WebElement or the selector of cached elements to crop to, None for the viewport.
+            format (str): "png", "jpeg" or "webp".
+            quality (int): Encoder quality 1-100, ignored for PNG.
+            sink (Optional[Callable[[Screenshot], None]]): Called with the screenshot once encoded,
+                e.g. screenshots.DirectorySink or screenshots.QueueSink.
+
+        Returns:
+            Screenshot: The capture, its bytes are in screenshot.data.
+        """
+        shot = self._capture(element, format, quality)
+        if format != "png":
+            (self.screenshot_encoder or ScreenshotEncoder.default()).submit(shot)
+        if sink is not None:
+            shot.add_done_callback(lambda s: self._to_sink(sink, s))
+
+        event_data = self._event_data((BrowserEvents.SCREENSHOT,),
+                                      {"image": None, "screenshot": shot, "tab_id": shot.tab_id},
+                                      url=lambda: self.current_url)
+        self.handle_event(BrowserEvents.SCREENSHOT, event_data)
+        return shot
+
+    @staticmethod
+    def _to_sink(sink: Callable, shot: Screenshot) -> None:
+        try:
+            sink(shot)
+        except Exception as e:
+            print(f"ERROR: screenshot sink {sink} failed")
+            print(str(e))
 
-        event_data = {"image": path,
-                      "tab_id": self.current_tab_id,
-                      "url": self.current_url}
+    @timed
+    @supervised
+    def save_screenshot(self, path=None):
+        # unique per browser, concurrent browsers do not overwrite each other
+        path = path or join(gettempdir(), f"pombo_correio_screenshot_{os.getpid()}_{id(self):x}.png")
+        shot = self._capture()
+        shot.save(path)
+
+        event_data = self._event_data((BrowserEvents.SCREENSHOT,),
+                                      {"image": path, "screenshot": shot, "tab_id": shot.tab_id},
+                                      url=lambda: self.current_url)
         self.handle_event(BrowserEvents.SCREENSHOT, event_data)
 
         return path
@@ -683,16 +1888,78 @@ class _AbstractBrowser:
     def stop(self):
         self.clear_elements()
         if self._driver is not None:
-            event_data = {"open_tabs": self.open_tabs,
-                          "tab_id": self.current_tab_id,
-                          "current_url": self.current_url,
-                          "tab2url": self.tab2url}
+            event_data = self._event_data((BrowserEvents.BROWSER_CLOSED,),
+                                          {"tab2url": self.tab2url},
+                                          open_tabs=lambda: self.open_tabs,
+                                          tab_id=lambda: self.current_tab_id,
+                                          current_url=lambda: self.current_url)
 
             self._driver.quit()
 
             self.handle_event(BrowserEvents.BROWSER_CLOSED, event_data)
         self._driver = None
         self._tab2url = {}
+        self._current_tab = None
+        self._navigated = {}
+        self._opening = {}
+        self.request_cursor = None
+        self._script_timeout = None
+        self._cookie_jar = {}
+        self._tab_aliases = {}
+
+    def is_alive(self) -> bool:
+        """
+        Check if the browser session is still responding.
+
+        Returns:
+            bool: True if the driver answers a cheap command, False otherwise.
+        """
+        if self._driver is None:
+            return False
+        try:
+            return bool(self._driver.window_handles)
+        except Exception:
+            return False
+
+    @timed
+    def reset(self, homepage: bool = False) -> None:
+        """
+        Cheaply return the session to a clean state without restarting the browser.
+
+        Closes every tab except the first one, drops cached elements, tab urls
+        and captured requests.
+
+        Args:
+            homepage (bool): Also navigate the remaining tab back to the homepage.
+
+        Raises:
+            NoSession: If there is no running session.
+        """
+        if self._driver is None:
+            raise NoSession
+        tabs = self.open_tabs
+        main_tab = tabs[0]
+        for tab in tabs[1:]:
+            self._driver.switch_to.window(tab)
+            self._driver.close()
+        self._driver.switch_to.window(main_tab)
+        self._current_tab = main_tab
+
+        self.clear_elements()
+        self._tab2url = {}
+        self._navigated = {}
+        self._opening = {}
+        if self.request_cursor is not None:
+            self.request_cursor.clear()
+
+        if homepage:
+            self._driver.get(self.homepage)
+        self._tab2url[main_tab] = self.current_url
+
+        event_data = {"closed_tabs": tabs[1:],
+                      "tab_id": main_tab,
+                      "url": self._tab2url[main_tab]}
+        self.handle_event(BrowserEvents.BROWSER_RESET, event_data)
 
     # context manager
     def __enter__(self):
@@ -701,13 +1968,170 @@ class _AbstractBrowser:
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.stop()
+        if self.event_bus is not None:
+            self.event_bus.join()  # deliver BROWSER_CLOSED and anything still queued
 
-    def iterate_requests(self):
-        for idx, request in enumerate(self._driver.requests):
-            if idx <= self._req_idx:
-                continue
-            self._req_idx = idx
-            yield request
+    def add_request_interceptor(self, interceptor: Callable) -> None:
+        """
+        Chain a selenium-wire request interceptor, takes effect immediately and for future sessions.
+
+        Interceptors run in the order they were added, the chain stops at the first one
+        that aborts the request or answers it with request.create_response().
+
+        Args:
+            interceptor (Callable): Called with the selenium-wire request.
+        """
+        if interceptor not in self.request_interceptors:
+            self.request_interceptors.append(interceptor)
+            self._install_interceptors()
+
+    def remove_request_interceptor(self, interceptor: Callable) -> None:
+        if interceptor in self.request_interceptors:
+            self.request_interceptors.remove(interceptor)
+            self._install_interceptors()
+
+    def add_response_interceptor(self, interceptor: Callable) -> None:
+        """
+        Chain a selenium-wire response interceptor, takes effect immediately and for future sessions.
+
+        Args:
+            interceptor (Callable): Called with the selenium-wire request and response.
+        """
+        if interceptor not in self.response_interceptors:
+            self.response_interceptors.append(interceptor)
+            self._install_interceptors()
+
+    def remove_response_interceptor(self, interceptor: Callable) -> None:
+        if interceptor in self.response_interceptors:
+            self.response_interceptors.remove(interceptor)
+            self._install_interceptors()
+
+    def _intercept_request(self, request) -> None:
+        for interceptor in list(self.request_interceptors):
+            try:
+                interceptor(request)
+            except Exception as e:
+                print(f"ERROR: request interceptor {interceptor} failed")
+                print(str(e))
+            if request.response is not None:
+                break  # aborted or answered, nothing left to do
+
+    def _intercept_response(self, request, response) -> None:
+        for interceptor in list(self.response_interceptors):
+            try:
+                interceptor(request, response)
+            except Exception as e:
+                print(f"ERROR: response interceptor {interceptor} failed")
+                print(str(e))
+
+    def _install_interceptors(self) -> None:
+        if self._driver is None or not hasattr(self._driver, "backend"):
+            return  # no session or not a selenium-wire driver
+        # an installed interceptor makes selenium-wire hand every request to python, only set them when needed
+        for attr, chain, hook in (("request_interceptor", self.request_interceptors, self._intercept_request),
+                                  ("response_interceptor", self.response_interceptors, self._intercept_response)):
+            if chain:
+                setattr(self._driver, attr, hook)
+            else:
+                try:
+                    delattr(self._driver, attr)
+                except AttributeError:
+                    pass
+
+    def set_blocking(self, rules: Union[None, str, BlockRule, Iterable[Union[str, BlockRule]]]) -> None:
+        """
+        Block requests before they reach the network, takes effect immediately and for future sessions.
+
+        Args:
+            rules: A preset name from blocking.PRESETS (e.g. "text-only", "no-media", "no-trackers"),
+                a BlockRule, a list mixing both, or None to stop blocking.
+
+        Raises:
+            ValueError: If a preset name is unknown.
+        """
+        self.blocker.rules = resolve_rules(rules)
+        if self.blocker.rules:
+            self.add_request_interceptor(self.blocker.intercept_request)
+        else:
+            self.remove_request_interceptor(self.blocker.intercept_request)
+
+    def set_response_cache(self, cache: Optional[ResponseCache]) -> None:
+        """
+        Answer requests from a disk cache shared across sessions and browsers, takes effect immediately and for future sessions.
+
+        Args:
+            cache (Optional[ResponseCache]): The cache to use, None goes back to the network only.
+        """
+        if self.response_cache is not None:
+            self.remove_request_interceptor(self.response_cache.intercept_request)
+            self.remove_response_interceptor(self.response_cache.intercept_response)
+        self.response_cache = cache
+        if cache is not None:
+            self.add_request_interceptor(cache.intercept_request)
+            self.add_response_interceptor(cache.intercept_response)
+
+    @property
+    def blocking_stats(self) -> Dict:
+        """Returns blocked request count, estimated bytes saved and counts per resource type."""
+        return self.blocker.snapshot()
+
+    def set_capture_policy(self, policy: Optional[CapturePolicy]) -> None:
+        """
+        Bound and filter what selenium-wire stores, takes effect immediately and for future sessions.
+
+        Args:
+            policy (Optional[CapturePolicy]): The policy to enforce, None stores everything again.
+        """
+        self.capture_policy = policy
+        self._install_capture_policy()
+
+    def _install_capture_policy(self) -> None:
+        backend = getattr(self._driver, "backend", None)
+        if backend is None:
+            return  # no session or not a selenium-wire driver
+        log = backend.storage if isinstance(backend.storage, NavigationLog) else None
+        storage = capture_storage(backend.storage)
+        if isinstance(storage, CaptureStorage):
+            if self.capture_policy is not None:
+                storage.policy = self.capture_policy
+            else:
+                storage = storage.inner
+        elif self.capture_policy is not None:
+            storage = CaptureStorage(storage, self.capture_policy)
+        # tab2url tracking sees every navigation, whatever the capture policy keeps
+        if log is None:
+            backend.storage = NavigationLog(storage)
+        else:
+            log.inner = storage
+
+    @property
+    def capture_stats(self) -> Dict[str, int]:
+        """Returns counters of captured, dropped, evicted and spilled traffic, empty without a capture policy."""
+        storage = capture_storage(getattr(getattr(self._driver, "backend", None), "storage", None))
+        if isinstance(storage, CaptureStorage):
+            return dict(storage.stats)
+        return {}
+
+    def iterate_requests(self, url_pattern: Optional[str] = None, method: Optional[str] = None,
+                         content_type: Optional[str] = None, prune: bool = True):
+        """
+        Iterate requests captured since the last call.
+
+        Consumed requests are removed from selenium-wire storage unless prune is False,
+        so later calls only touch new requests.
+
+        Args:
+            url_pattern (Optional[str]): Regex the URL must match, checked before the request is loaded.
+            method (Optional[str]): HTTP method the request must use.
+            content_type (Optional[str]): Substring the response Content-Type must contain.
+            prune (bool): Remove consumed requests from storage. Defaults to True.
+
+        Yields:
+            Request: selenium-wire request objects.
+        """
+        if self.request_cursor is None:
+            return
+        yield from self.request_cursor.fetch(url_pattern, method, content_type, prune)
 
 
 class FirefoxBrowser(_AbstractBrowser):
@@ -716,12 +2140,23 @@ class FirefoxBrowser(_AbstractBrowser):
 
     Attributes:
         geckodriver (Optional[str]): Path to the geckodriver executable.
-        preferences (dict): Firefox preferences loaded from a prefs.js file.
+        preferences (dict): Firefox preferences, the preset ones overridden by those loaded from a prefs.js file.
+        preset (Optional[str]): Name of the preferences preset in use, see presets.PRESETS.
+        prefs_js (Optional[str]): Path of the prefs.js file the preferences were loaded from.
         firefox_profile (FirefoxProfile): The Firefox profile used in the session.
         extensions_folder (str): Directory containing Firefox extensions.
+        snapshot (Optional[ProfileSnapshot]): Pre-baked profile new sessions are cloned from.
+        _addon_ids (List[str]): IDs of the extensions loaded in the running session.
+        _profile_dir (Optional[str]): Profile clone used by the running session.
+        fetcher (HttpFetcher): Plain HTTP client sharing the session cookies, used by fetch().
+        fetch_routes (List[FetchRoute]): Per URL pattern rules for fetch(), the first match wins.
+        fetch_default (str): How fetch() handles URLs no route matches, "http" or "browser".
     """
 
-    def __init__(self, geckodriver: Optional[str] = None, headless: bool = False, homepage: str = "https://openvoiceos.org", debug: bool = False, prefs_js: Optional[str] = None, extensions_folder: Optional[str] = None):
+    def __init__(self, geckodriver: Optional[str] = None, headless: bool = False, homepage: str = "https://openvoiceos.org", debug: bool = False, prefs_js: Optional[str] = None, extensions_folder: Optional[str] = None,
+                 offline_extensions: bool = False, profile_snapshot: bool = False,
+                 blocking: Union[None, str, BlockRule, Iterable[Union[str, BlockRule]]] = None,
+                 response_cache: Optional[ResponseCache] = None, preset: Optional[str] = None):
         """
         Initialize the Firefox browser with specific options and profile settings.
 
@@ -732,12 +2167,30 @@ class FirefoxBrowser(_AbstractBrowser):
             debug (bool): Enable debug mode.
             prefs_js (Optional[str]): Path to a prefs.js file to load Firefox preferences.
             extensions_folder (Optional[str]): Path to a folder containing Firefox extensions.
+            offline_extensions (bool): Only use already cached default extensions, never download them.
+            profile_snapshot (bool): Launch sessions from a copy of a pre-baked profile with preferences and extensions installed.
+            blocking: Request blocking preset name(s) or BlockRule(s) applied to every page load, see set_blocking().
+            response_cache (Optional[ResponseCache]): Disk response cache shared across sessions, see set_response_cache().
+            preset (Optional[str]): Curated preferences from presets.PRESETS, e.g. "dense" to fit more browsers
+                per host. Preferences from prefs_js are applied on top.
         """
         super().__init__(headless, homepage, debug)
         self.geckodriver = geckodriver
-        self.preferences = self.parse_prefsjs(prefs_js) if prefs_js else {}
+        self.preset = preset
+        self.prefs_js = prefs_js
+        self.preferences = preset_preferences(preset, self.parse_prefsjs(prefs_js) if prefs_js else None)
         self.firefox_profile = self.create_firefox_profile()
-        self.extensions_folder = extensions_folder or DefaultExtensions.get()
+        self.extensions_folder = extensions_folder or \
+            DefaultExtensions.get(offline=offline_extensions)
+        self.snapshot: Optional[ProfileSnapshot] = ProfileSnapshot(
+            self.preferences, self.extensions_folder) if profile_snapshot else None
+        self._profile_dir: Optional[str] = None
+        self._addon_ids: List[str] = []
+        self.set_blocking(blocking)
+        self.set_response_cache(response_cache)
+        self.fetcher: HttpFetcher = HttpFetcher()
+        self.fetch_routes: List[FetchRoute] = []
+        self.fetch_default: str = "http"
 
     @staticmethod
     def find_firefox() -> list[str]:
@@ -790,28 +2243,142 @@ class FirefoxBrowser(_AbstractBrowser):
             profile.set_preference(pref, self.preferences[pref])
         return profile
 
-    def create_driver(self) -> None:
+    def create_options(self, profile_dir: Optional[str] = None) -> FirefoxOptions:
         """
-        Create a new Firefox WebDriver instance.
+        Create the Firefox options used to launch a session.
+
+        Args:
+            profile_dir (Optional[str]): Launch Firefox with this profile directory instead of a fresh one.
+
+        Returns:
+            FirefoxOptions: The configured options.
         """
-        self.options = FirefoxOptions()
+        options = FirefoxOptions()
         if self.headless:
-            self.options.add_argument("-headless")
+            options.add_argument("-headless")
         if self.geckodriver:
-            self.options.binary_location = self.geckodriver
+            options.binary_location = self.geckodriver
+        if profile_dir:
+            options.add_argument("-profile")
+            options.add_argument(profile_dir)
         # mute sound
-        self.options.set_preference("media.volume_scale", "0.0")
+        options.set_preference("media.volume_scale", "0.0")
         # force popups into a new tab
-        self.options.set_preference("browser.link.open_newwindow.restriction", 0)
-        self.options.set_preference("browser.link.open_newwindow", 3)
+        options.set_preference("browser.link.open_newwindow.restriction", 0)
+        options.set_preference("browser.link.open_newwindow", 3)
+        # extra preferences only when asked for, with a preset or a prefs.js file
+        if self.preset or self.prefs_js:
+            for pref, value in self.preferences.items():
+                options.set_preference(pref, value)
+        return options
+
+    def memory_usage(self) -> Optional[int]:
+        """
+        Resident memory of the running Firefox, its content and utility processes included.
+
+        Returns:
+            Optional[int]: Bytes, None without a session or a way to read process memory (psutil or /proc).
+        """
+        if self._driver is None:
+            return None
+        pid = (self._driver.capabilities or {}).get("moz:processID")
+        return process_tree_rss(int(pid)) if pid else None
+
+    def create_driver(self) -> None:
+        """
+        Create a new Firefox WebDriver instance, from a profile snapshot clone if enabled.
+        """
+        if self.snapshot is not None:
+            if not self.snapshot.is_built:
+                self.snapshot.build(
+                    lambda path: webdriver.Firefox(options=self.create_options(path)))
+            self._profile_dir = self.snapshot.clone()
+        self.options = self.create_options(self._profile_dir)
         self._driver = webdriver.Firefox(options=self.options)
+        self.fetcher.invalidate()
+
+    def add_fetch_route(self, pattern: str, mode: str = "http", ready: Optional[Iterable[str]] = None,
+                        js_markers: Optional[Iterable[str]] = None) -> FetchRoute:
+        """
+        Decide how fetch() loads URLs matching a pattern, routes are tried in the order they were added.
+
+        Args:
+            pattern (str): Regex searched in the URL.
+            mode (str): "http" tries plain HTTP first, "browser" always navigates the browser.
+            ready (Optional[Iterable[str]]): CSS selectors the HTTP response must contain, otherwise the browser is used.
+            js_markers (Optional[Iterable[str]]): Regexes flagging javascript-only pages, defaults to fastpath.JS_MARKERS.
+
+        Returns:
+            FetchRoute: The new route.
+        """
+        route = FetchRoute(pattern, mode, ready, js_markers)
+        self.fetch_routes.append(route)
+        return route
+
+    def _route_for(self, url: str) -> FetchRoute:
+        for route in self.fetch_routes:
+            if route.matches(url):
+                return route
+        return FetchRoute(".*", self.fetch_default)
+
+    @timed
+    @supervised
+    def fetch(self, url: str, ready: Optional[Iterable[str]] = None, timeout: float = 10) -> FetchResult:
+        """
+        Load a page as cheaply as possible, plain HTTP first when routing allows it.
+
+        The HTTP request carries the browser cookies and user agent. The response is only used
+        if it has no javascript-only markers and contains the ready selectors, otherwise the
+        browser navigates the focused tab to the URL and waits for the selectors.
+
+        Args:
+            url (str): The page to load.
+            ready (Optional[Iterable[str]]): CSS selectors the page must contain.
+            timeout (float): Seconds the browser fallback waits for the ready selectors.
+
+        Returns:
+            FetchResult: The page source, parse it with result.select()/result.xpath() (needs lxml).
+        """
+        if self._driver is None:
+            raise NoSession
+        start = perf_counter()
+        route = self._route_for(url)
+        ready = list(ready or [])
+        result = None
+        if route.mode == "http":
+            self.fetcher.sync(self._driver, url)
+            result = self.fetcher.fetch(url, route, ready)
+        if result is None:
+            self.goto_url(url)
+            selectors = route.ready + ready
+            if selectors:
+                self.wait_for_all([("css", s) for s in selectors], timeout)
+            result = FetchResult(self.current_url, self._driver.page_source, "browser")
+        result.elapsed = perf_counter() - start
+
+        event_data = {"url": url, "final_url": result.url, "via": result.via,
+                      "status": result.status, "elapsed": result.elapsed}
+        self.handle_event(BrowserEvents.HTTP_FETCH, event_data)
+        return result
+
+    def stop(self):
+        super().stop()
+        if self._profile_dir:
+            shutil.rmtree(self._profile_dir, ignore_errors=True)
+            self._profile_dir = None
 
     def load_extensions(self):
         if self.extensions_folder and exists(self.extensions_folder):
-            extensions = os.listdir(self.extensions_folder)
+            # skip hidden files, the extension cache keeps its manifest and lock there
+            extensions = [e for e in sorted(os.listdir(self.extensions_folder))
+                          if not e.startswith(".")]
+            baked = self.snapshot.baked_extensions if self._profile_dir else []
+            self._addon_ids = []
             for extension in extensions:
-                self._driver.install_addon(join(self.extensions_folder, extension), temporary=True)
-                event_data = {"extension": extension}
+                if extension not in baked:
+                    self._addon_ids.append(self._driver.install_addon(
+                        join(self.extensions_folder, extension), temporary=True))
+                event_data = {"extension": extension, "snapshot": extension in baked}
                 self.handle_event(BrowserEvents.EXTENSION_LOADED,
                                   event_data)
 
@@ -820,8 +2387,19 @@ class FirefoxBrowser(_AbstractBrowser):
             return extensions
         return []
 
+    def extensions_ready(self) -> bool:
+        if not self._addon_ids:
+            return True
+        # the AddonManager is only reachable from the privileged chrome context,
+        # if marionette does not allow it we can not tell and do not block startup
+        try:
+            with self._driver.context(self._driver.CONTEXT_CHROME):
+                return bool(self._driver.execute_async_script(ADDONS_ACTIVE, self._addon_ids))
+        except Exception:
+            return True
+
     def close_extensions_tabs(self):
-        self._sync_tab2url()
-        for tab in self.tab2url:
-            if self.tab2url[tab].startswith("moz-extension://"):
+        # extensions open their own tabs, only a full sweep can see them
+        for tab, url in list(self.sync_tab2url().items()):
+            if url.startswith("moz-extension://"):
                 self.close_tab(tab)
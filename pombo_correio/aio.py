@@ -0,0 +1,255 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Optional, Dict, Callable, List, Iterable, Type, Tuple
+
+from pombo_correio import _AbstractBrowser, FirefoxBrowser, BrowserEvents
+from pombo_correio.exceptions import NoSession
+from pombo_correio.screenshots import Screenshot
+
+
+class AsyncFirefoxBrowser:
+    """
+    An asyncio front end for FirefoxBrowser, one event loop can drive many browsers and tabs at once.
+
+    Every webdriver call of a browser runs on its own single worker thread, so commands never
+    interleave inside a session. Waits run there too, through the same code as the blocking API,
+    other browsers driven by the event loop keep going meanwhile.
+
+    Attributes:
+        browser_class (Type[_AbstractBrowser]): Browser class instantiated when no browser is given.
+        browser (_AbstractBrowser): The wrapped blocking browser.
+    """
+
+    browser_class: Type[_AbstractBrowser] = FirefoxBrowser
+
+    def __init__(self, *args, browser: Optional[_AbstractBrowser] = None, **kwargs) -> None:
+        """
+        Initialize the async browser.
+
+        Args:
+            *args: Positional arguments for browser_class.
+            browser (Optional[_AbstractBrowser]): An existing browser to wrap instead of creating one.
+            **kwargs: Keyword arguments for browser_class.
+        """
+        self.browser: _AbstractBrowser = browser or self.browser_class(*args, **kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="pombo_correio")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._async_handlers: Dict[Callable, Callable] = {}
+
+    async def _run(self, fn: Callable, *args, **kwargs):
+        """ run a blocking browser call on the worker thread"""
+        self._loop = asyncio.get_running_loop()
+        return await self._loop.run_in_executor(self._executor,
+                                                partial(fn, *args, **kwargs))
+
+    def _call_in_tab(self, tab_id: Optional[str], fn: Callable, *args, **kwargs):
+        # runs on the worker thread, switching and calling is atomic for the session
+        if tab_id and tab_id != self.browser._current_tab:
+            self.browser.switch_to_tab(tab_id)
+        return fn(*args, **kwargs)
+
+    async def _run_in_tab(self, tab_id: Optional[str], fn: Callable, *args, **kwargs):
+        return await self._run(self._call_in_tab, tab_id, fn, *args, **kwargs)
+
+    # events
+    def add_event_handler(self, event: BrowserEvents, handler: Callable,
+                          fields: Optional[Iterable[str]] = None, sync: bool = False) -> None:
+        """
+        Add an event handler, coroutine functions are scheduled on the event loop.
+
+        Args:
+            event (BrowserEvents): The event to handle.
+            handler (Callable): A function or coroutine function receiving the event data.
+            fields (Optional[Iterable[str]]): Payload fields the handler reads, None means all of them.
+            sync (bool): Run a plain function inline even if the browser has an event bus.
+        """
+        if asyncio.iscoroutinefunction(handler):
+            def _schedule(data: Dict):
+                # the payload dict is reused by the browser, hand out a copy
+                asyncio.run_coroutine_threadsafe(handler(dict(data)), self._loop)
+
+            self._async_handlers[handler] = _schedule
+            # scheduling never blocks, no need to go through an event bus
+            self.browser.add_event_handler(event, _schedule, fields, sync=True)
+        else:
+            self.browser.add_event_handler(event, handler, fields, sync=sync)
+
+    def remove_event_handler(self, event: BrowserEvents, handler: Callable) -> None:
+        """
+        Remove a previously added event handler.
+
+        Args:
+            event (BrowserEvents): The event the handler was registered for.
+            handler (Callable): The handler to remove.
+        """
+        handler = self._async_handlers.pop(handler, handler)
+        self.browser.remove_event_handler(event, handler)
+
+    # session
+    async def new_session(self) -> None:
+        await self._run(self.browser.new_session)
+
+    async def stop(self) -> None:
+        await self._run(self.browser.stop)
+
+    async def close(self) -> None:
+        """
+        Stop the browser and release the worker thread.
+        """
+        await self.stop()
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        await self.new_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # tabs
+    async def tab2url(self) -> Dict[str, str]:
+        return dict(await self._run(lambda: self.browser.tab2url))
+
+    async def open_tabs(self) -> List[str]:
+        return await self._run(lambda: self.browser.open_tabs)
+
+    async def current_url(self, tab_id: Optional[str] = None) -> Optional[str]:
+        return await self._run_in_tab(tab_id, lambda: self.browser.current_url)
+
+    async def open_new_tab(self, url: str, switch: bool = True) -> str:
+        return await self._run(self.browser.open_new_tab, url, switch)
+
+    async def switch_to_tab(self, tab_id: str) -> None:
+        await self._run(self.browser.switch_to_tab, tab_id)
+
+    async def close_tab(self, tab_id: Optional[str] = None) -> None:
+        await self._run(self.browser.close_tab, tab_id)
+
+    async def goto_url(self, url: str, tab_id: Optional[str] = None, blocking=None) -> None:
+        await self._run(self.browser.goto_url, url, tab_id, blocking)
+
+    async def execute_script(self, script: str, *args, tab_id: Optional[str] = None):
+        if self.browser._driver is None:
+            raise NoSession
+        return await self._run_in_tab(tab_id, self.browser._driver.execute_script,
+                                      script, *args)
+
+    # element search
+    async def search_css(self, css_selector, source_element=None, filter=None,
+                         bulk=False, tab_id: Optional[str] = None) -> List:
+        return await self._run_in_tab(tab_id, lambda: list(self.browser.search_css(
+            css_selector, source_element, filter, bulk)))
+
+    async def search_xpath(self, xpath, source_element=None, filter=None,
+                           bulk=False, tab_id: Optional[str] = None) -> List:
+        return await self._run_in_tab(tab_id, lambda: list(self.browser.search_xpath(
+            xpath, source_element, filter, bulk)))
+
+    async def bulk_search_css(self, css_selector, source_element=None, filter=None,
+                              attributes: Optional[List[str]] = None,
+                              tab_id: Optional[str] = None) -> List[Dict]:
+        return await self._run_in_tab(tab_id, self.browser.bulk_search_css,
+                                      css_selector, source_element, filter, attributes)
+
+    async def extract_records(self, container_selector: str, fields: Dict,
+                              min_records: int = 0, timeout: float = 10, by: str = "css",
+                              tab_id: Optional[str] = None) -> List[Dict]:
+        return await self._run_in_tab(tab_id, self.browser.extract_records,
+                                      container_selector, fields, min_records, timeout, by)
+
+    async def bulk_search_xpath(self, xpath, source_element=None, filter=None,
+                                attributes: Optional[List[str]] = None,
+                                tab_id: Optional[str] = None) -> List[Dict]:
+        return await self._run_in_tab(tab_id, self.browser.bulk_search_xpath,
+                                      xpath, source_element, filter, attributes)
+
+    async def get_css_selector(self, css_selector, timeout=10, wait=False,
+                               tab_id: Optional[str] = None):
+        if wait:
+            return await self.wait_for_css_selector(css_selector, timeout, tab_id)
+        return await self._run_in_tab(tab_id, self.browser.get_css_selector, css_selector)
+
+    async def get_xpath(self, xpath, timeout=10, wait=False, tab_id: Optional[str] = None):
+        if wait:
+            return await self.wait_for_xpath(xpath, timeout, tab_id)
+        return await self._run_in_tab(tab_id, self.browser.get_xpath, xpath)
+
+    async def wait_for_css_selector(self, css_selector, timeout=30,
+                                    tab_id: Optional[str] = None):
+        return await self._run_in_tab(tab_id, self.browser.wait_for_css_selector,
+                                      css_selector, timeout)
+
+    async def wait_for_xpath(self, xpath, timeout=30, tab_id: Optional[str] = None):
+        return await self._run_in_tab(tab_id, self.browser.wait_for_xpath, xpath, timeout)
+
+    async def wait_for_any(self, selectors: List[Tuple[str, str]], timeout=30,
+                           tab_id: Optional[str] = None) -> List:
+        return await self._run_in_tab(tab_id, self.browser.wait_for_any, selectors, timeout)
+
+    async def wait_for_all(self, selectors: List[Tuple[str, str]], timeout=30,
+                           tab_id: Optional[str] = None) -> List:
+        return await self._run_in_tab(tab_id, self.browser.wait_for_all, selectors, timeout)
+
+    # element interaction
+    async def get_element_attribute(self, element, attr, tab_id: Optional[str] = None):
+        return await self._run_in_tab(tab_id, self.browser.get_element_attribute,
+                                      element, attr)
+
+    async def click_element(self, element, event_data=None, tab_id: Optional[str] = None):
+        await self._run_in_tab(tab_id, self.browser.click_element, element, event_data)
+
+    async def send_keys_element(self, keys, element, event_data=None,
+                                tab_id: Optional[str] = None):
+        await self._run_in_tab(tab_id, self.browser.send_keys_element,
+                               keys, element, event_data)
+
+    async def submit_element(self, element, event_data=None, tab_id: Optional[str] = None):
+        await self._run_in_tab(tab_id, self.browser.submit_element, element, event_data)
+
+    # action chains
+    async def find_and_click_css_selector(self, css_selector, timeout=10, wait=True,
+                                          tab_id: Optional[str] = None):
+        element = await self.get_css_selector(css_selector, timeout, wait, tab_id)
+        await self.click_element(element, {"css_selector": css_selector}, tab_id)
+        return element
+
+    async def find_and_click_xpath(self, xpath, timeout=10, wait=True,
+                                   tab_id: Optional[str] = None):
+        element = await self.get_xpath(xpath, timeout, wait, tab_id)
+        await self.click_element(element, {"xpath": xpath}, tab_id)
+
+    async def find_and_send_keys_selector(self, keys, css_selector, timeout=10,
+                                          wait=True, tab_id: Optional[str] = None):
+        element = await self.get_css_selector(css_selector, timeout, wait, tab_id)
+        await self.send_keys_element(keys, element, {"css_selector": css_selector}, tab_id)
+
+    async def find_and_send_keys_xpath(self, keys, xpath, timeout=10, wait=True,
+                                       tab_id: Optional[str] = None):
+        element = await self.get_xpath(xpath, timeout, wait, tab_id)
+        await self.send_keys_element(keys, element, {"xpath": xpath}, tab_id)
+
+    async def find_and_submit_css_selector(self, css_selector, timeout=10, wait=True,
+                                           tab_id: Optional[str] = None):
+        element = await self.get_css_selector(css_selector, timeout, wait, tab_id)
+        await self.submit_element(element, {"css_selector": css_selector}, tab_id)
+
+    async def find_and_submit_xpath(self, xpath, timeout=10, wait=True,
+                                    tab_id: Optional[str] = None):
+        element = await self.get_xpath(xpath, timeout, wait, tab_id)
+        await self.submit_element(element, {"xpath": xpath}, tab_id)
+
+    # misc
+    async def save_screenshot(self, path=None, tab_id: Optional[str] = None) -> str:
+        return await self._run_in_tab(tab_id, self.browser.save_screenshot, path)
+
+    async def screenshot(self, element=None, format: str = "png", quality: int = 80,
+                         sink: Optional[Callable] = None, tab_id: Optional[str] = None) -> Screenshot:
+        shot = await self._run_in_tab(tab_id, self.browser.screenshot, element, format, quality, sink)
+        if not shot.done():
+            await asyncio.wrap_future(shot._future)  # encode without blocking the loop
+        return shot
+
+    async def iterate_requests(self) -> List:
+        return await self._run(lambda: list(self.browser.iterate_requests()))
@@ -0,0 +1,164 @@
+import re
+import threading
+from typing import Optional, Iterable, List, Union, Pattern, Dict
+from urllib.parse import urlsplit
+
+from pombo_correio.capture import resource_type
+
+TRACKER_HOSTS = {
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com",
+    "doubleclick.net", "googleadservices.com", "facebook.net", "connect.facebook.net",
+    "scorecardresearch.com", "hotjar.com", "criteo.com", "criteo.net", "taboola.com",
+    "outbrain.com", "quantserve.com", "adnxs.com", "amazon-adsystem.com", "chartbeat.com",
+    "newrelic.com", "nr-data.net", "segment.io", "mixpanel.com", "clarity.ms"
+}
+
+
+class BlockRule:
+    """
+    Declarative rule matching requests that should never reach the network.
+
+    Every criterion given must match (AND), a rule with no criteria matches nothing.
+
+    Attributes:
+        resource_types (Optional[set]): Resource types to block, see capture.resource_type().
+        hosts (Optional[set]): Hosts to block, subdomains included.
+        url_pattern (Optional[Pattern]): Regex searched in the full URL.
+    """
+
+    def __init__(self, resource_types: Optional[Iterable[str]] = None,
+                 hosts: Optional[Iterable[str]] = None,
+                 url_pattern: Optional[Union[str, Pattern]] = None) -> None:
+        self.resource_types = set(resource_types) if resource_types else None
+        self.hosts = set(hosts) if hosts else None
+        self.url_pattern = re.compile(url_pattern) if isinstance(url_pattern, str) else url_pattern
+
+    def matches(self, request, rtype: str) -> bool:
+        """
+        Check if the rule blocks a request.
+
+        Args:
+            request: A selenium-wire request.
+            rtype (str): The request resource type.
+
+        Returns:
+            bool: True if the request should be blocked.
+        """
+        if self.resource_types is None and self.hosts is None and self.url_pattern is None:
+            return False
+        if self.resource_types is not None and rtype not in self.resource_types:
+            return False
+        if self.hosts is not None:
+            host = urlsplit(request.url).hostname or ""
+            if not any(host == h or host.endswith("." + h) for h in self.hosts):
+                return False
+        if self.url_pattern is not None and not self.url_pattern.search(request.url):
+            return False
+        return True
+
+
+PRESETS: Dict[str, List[BlockRule]] = {
+    "text-only": [BlockRule(resource_types={"image", "media", "font", "style"})],
+    "no-media": [BlockRule(resource_types={"image", "media"})],
+    "no-fonts": [BlockRule(resource_types={"font"})],
+    "no-trackers": [BlockRule(hosts=TRACKER_HOSTS)],
+}
+
+
+def resolve_rules(rules: Union[None, str, BlockRule, Iterable[Union[str, BlockRule]]]) -> List[BlockRule]:
+    """
+    Turn preset names and rules into a flat list of rules.
+
+    Args:
+        rules: None, a preset name, a rule, or a list mixing both.
+
+    Returns:
+        List[BlockRule]: The rules to enforce.
+
+    Raises:
+        ValueError: If a preset name is unknown.
+    """
+    if rules is None:
+        return []
+    if isinstance(rules, (str, BlockRule)):
+        rules = [rules]
+    resolved = []
+    for rule in rules:
+        if isinstance(rule, str):
+            if rule not in PRESETS:
+                raise ValueError(f"unknown blocking preset: {rule}")
+            resolved += PRESETS[rule]
+        else:
+            resolved.append(rule)
+    return resolved
+
+
+class RequestBlocker:
+    """
+    selenium-wire request interceptor enforcing block rules and measuring what they saved.
+
+    Bytes saved are estimated from a typical transfer size per resource type, blocked
+    requests never reach the network so their real size is unknown. Types without an
+    estimate only count as a blocked request.
+
+    Attributes:
+        rules (List[BlockRule]): The rules currently enforced.
+        stats (Dict): Blocked request count, estimated bytes saved and counts per resource type.
+        typical_sizes (Dict[str, int]): Resource type -> estimated bytes per request, adjust to the sites crawled.
+    """
+
+    # rough median transfer size per request on the web, in bytes
+    TYPICAL_SIZES: Dict[str, int] = {
+        "image": 12000,
+        "media": 250000,
+        "font": 25000,
+        "style": 8000,
+        "script": 15000,
+        "subdocument": 20000,
+        "document": 30000,
+        "xhr": 2000,
+    }
+
+    def __init__(self, rules=None) -> None:
+        self.rules: List[BlockRule] = resolve_rules(rules)
+        self._lock = threading.Lock()
+        self.typical_sizes: Dict[str, int] = dict(self.TYPICAL_SIZES)
+        self.stats: Dict = {"blocked": 0, "bytes_saved": 0, "by_type": {}}
+
+    def snapshot(self) -> Dict:
+        """Returns a copy of the counters."""
+        with self._lock:
+            return {"blocked": self.stats["blocked"],
+                    "bytes_saved": self.stats["bytes_saved"],
+                    "by_type": dict(self.stats["by_type"])}
+
+    @staticmethod
+    def delta(before: Dict, after: Dict) -> Dict:
+        """
+        Difference between two snapshots, e.g. around a page load.
+
+        Args:
+            before (Dict): The earlier snapshot.
+            after (Dict): The later snapshot.
+
+        Returns:
+            Dict: Counters accumulated between the two snapshots.
+        """
+        return {"blocked": after["blocked"] - before["blocked"],
+                "bytes_saved": after["bytes_saved"] - before["bytes_saved"],
+                "by_type": {k: v - before["by_type"].get(k, 0)
+                            for k, v in after["by_type"].items()
+                            if v - before["by_type"].get(k, 0)}}
+
+    def intercept_request(self, request) -> None:
+        rules = self.rules
+        if not rules:
+            return
+        rtype = resource_type(request)
+        if not any(rule.matches(request, rtype) for rule in rules):
+            return
+        request.abort()
+        with self._lock:
+            self.stats["blocked"] += 1
+            self.stats["bytes_saved"] += self.typical_sizes.get(rtype, 0)
+            self.stats["by_type"][rtype] = self.stats["by_type"].get(rtype, 0) + 1
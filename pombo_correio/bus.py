@@ -0,0 +1,206 @@
+import threading
+from collections import deque
+from time import perf_counter, monotonic
+from typing import Optional, Dict, Callable, List, Deque, Tuple
+
+BLOCK = "block"
+DROP_OLDEST = "drop-oldest"
+SAMPLE = "sample"
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, SAMPLE)
+
+
+class _Worker:
+    """ one thread draining its own bounded queue, handlers pinned to it run in order"""
+
+    def __init__(self, bus: "EventBus", idx: int) -> None:
+        self.bus = bus
+        self.queue: Deque[Tuple] = deque()
+        self.cond = threading.Condition()
+        self.busy = False
+        # counters are only touched while holding cond
+        self.enqueued = 0
+        self.processed = 0
+        self.dropped = 0
+        self.overflows = 0
+        self.max_depth = 0
+        self.thread = threading.Thread(target=self.run, daemon=True,
+                                       name=f"pombo_correio-events-{idx}")
+        self.thread.start()
+
+    def run(self) -> None:
+        while True:
+            with self.cond:
+                while not self.queue:
+                    self.cond.wait()
+                item = self.queue.popleft()
+                self.busy = item is not None
+                self.cond.notify_all()  # room for blocked producers
+            if item is None:
+                return
+            event, data, handlers = item
+            for handler in handlers:
+                start = perf_counter()
+                try:
+                    handler(data)
+                except Exception as e:
+                    print("ERROR: exception in event handler")
+                    print(str(e))
+                if self.bus.observe is not None:
+                    self.bus.observe(event, handler, perf_counter() - start)
+            with self.cond:
+                self.busy = False
+                self.processed += 1
+                self.cond.notify_all()
+
+
+class EventBus:
+    """
+    Dispatch events to handlers on worker threads through bounded queues.
+
+    Every handler is pinned to one worker so it sees events in the order they were emitted,
+    handlers on different workers run concurrently. Each event gets a shallow copy of
+    its payload, the browser keeps mutating the original.
+
+    When a worker queue is full the overflow policy decides:
+        "block": the browser thread waits for room, up to block_timeout, then drops the event.
+            Events emitted from a handler never wait, the worker would be waiting on itself
+            (or on a worker waiting on it), they are dropped instead.
+        "drop-oldest": the oldest queued event is dropped.
+        "sample": only one in sample_every overflowing events is kept, replacing the oldest.
+
+    Attributes:
+        max_queue (int): Capacity of each worker queue.
+        overflow (str): The overflow policy.
+        sample_every (int): Keep ratio of the "sample" policy.
+        block_timeout (Optional[float]): Seconds the "block" policy waits, None waits forever.
+        observe (Optional[Callable]): Called with (event, handler, seconds) after each handler runs.
+    """
+
+    def __init__(self, workers: int = 2, max_queue: int = 1000, overflow: str = BLOCK,
+                 sample_every: int = 10, block_timeout: Optional[float] = None,
+                 observe: Optional[Callable] = None) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"unknown overflow policy: {overflow}")
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.sample_every = max(1, sample_every)
+        self.block_timeout = block_timeout
+        self.observe = observe
+        self._assigned: Dict[Callable, int] = {}
+        self._workers: List[_Worker] = [_Worker(self, i) for i in range(max(1, workers))]
+        self._closed = False
+
+    def _worker_for(self, handler: Callable) -> int:
+        idx = self._assigned.get(handler)
+        if idx is None:
+            # spread handlers round robin, a handler keeps its worker for life
+            idx = self._assigned[handler] = len(self._assigned) % len(self._workers)
+        return idx
+
+    def submit(self, event, data: Dict, handlers: List[Callable]) -> None:
+        """
+        Queue an event for its handlers.
+
+        Args:
+            event (BrowserEvents): The event.
+            data (Dict): The payload, copied before it is queued.
+            handlers (List[Callable]): Handlers to run, in order.
+        """
+        if self._closed or not handlers:
+            return
+        data = dict(data)
+        groups: Dict[int, List[Callable]] = {}
+        for handler in handlers:
+            groups.setdefault(self._worker_for(handler), []).append(handler)
+        for idx, group in groups.items():
+            self._put(self._workers[idx], (event, data, group))
+
+    def _put(self, worker: _Worker, item: Tuple) -> None:
+        with worker.cond:
+            if len(worker.queue) >= self.max_queue:
+                worker.overflows += 1
+                if self.overflow == BLOCK:
+                    if self._on_worker():
+                        worker.dropped += 1
+                        return
+                    if not worker.cond.wait_for(lambda: len(worker.queue) < self.max_queue,
+                                                self.block_timeout):
+                        worker.dropped += 1
+                        return
+                elif self.overflow == DROP_OLDEST:
+                    worker.queue.popleft()
+                    worker.dropped += 1
+                elif worker.overflows % self.sample_every:
+                    worker.dropped += 1  # sampled out
+                    return
+                else:
+                    worker.queue.popleft()
+                    worker.dropped += 1
+            worker.queue.append(item)
+            worker.enqueued += 1
+            worker.max_depth = max(worker.max_depth, len(worker.queue))
+            worker.cond.notify_all()
+
+    def _on_worker(self) -> bool:
+        """ the caller is a handler running on one of our workers"""
+        current = threading.current_thread()
+        return any(w.thread is current for w in self._workers)
+
+    @property
+    def depth(self) -> int:
+        """Returns the number of events waiting over all queues."""
+        return sum(len(w.queue) for w in self._workers)
+
+    @property
+    def stats(self) -> Dict:
+        """
+        Returns:
+            Dict: Current "depth" (and "depths" per worker), deepest queue seen ("max_depth"),
+                events "enqueued", "processed" and "dropped", counted once per worker involved.
+        """
+        workers = self._workers
+        return {"depth": self.depth,
+                "depths": [len(w.queue) for w in workers],
+                "max_depth": max(w.max_depth for w in workers),
+                "enqueued": sum(w.enqueued for w in workers),
+                "processed": sum(w.processed for w in workers),
+                "dropped": sum(w.dropped for w in workers)}
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued event was handled.
+
+        Args:
+            timeout (Optional[float]): Upper bound in seconds, None waits forever.
+
+        Returns:
+            bool: True if the queues drained in time.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        for worker in self._workers:
+            with worker.cond:
+                remaining = None if deadline is None else max(deadline - monotonic(), 0)
+                if not worker.cond.wait_for(lambda: not worker.queue and not worker.busy, remaining):
+                    return False
+        return True
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the workers.
+
+        Args:
+            wait (bool): Handle the events already queued first, otherwise drop them.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            with worker.cond:
+                if not wait:
+                    worker.dropped += len(worker.queue)
+                    worker.queue.clear()
+                worker.queue.append(None)
+                worker.cond.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.thread.join()
@@ -0,0 +1,358 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+from email.utils import parsedate_to_datetime
+from os.path import join
+from tempfile import gettempdir
+from time import time
+from typing import Optional, Dict, List, Union, Pattern, Iterable, Tuple
+
+CACHE = "cache"
+RECORD = "record"
+REPLAY = "replay"
+MODES = (CACHE, RECORD, REPLAY)
+
+# statuses worth keeping, per RFC 9111 heuristically cacheable ones minus the rarely useful
+CACHEABLE_STATUS = {200, 203, 204, 300, 301, 308, 404, 410}
+HIT_HEADER = "X-Pombo-Cache"
+
+# bumped whenever the schema changes, older caches are dropped and start empty
+_VERSION = 2
+_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        url TEXT NOT NULL,
+        vary TEXT NOT NULL,
+        status INTEGER NOT NULL,
+        headers TEXT NOT NULL,
+        body BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        expires REAL NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        last_access REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS responses_url ON responses (url)",
+    "CREATE INDEX IF NOT EXISTS responses_lru ON responses (last_access)",
+    # running total of the stored bytes, kept by triggers so every process sharing the cache agrees
+    "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta VALUES ('size', 0)",
+    """CREATE TRIGGER IF NOT EXISTS responses_insert AFTER INSERT ON responses BEGIN
+        UPDATE meta SET value = value + NEW.size WHERE name = 'size';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS responses_delete AFTER DELETE ON responses BEGIN
+        UPDATE meta SET value = value - OLD.size WHERE name = 'size';
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS responses_update AFTER UPDATE OF size ON responses BEGIN
+        UPDATE meta SET value = value + NEW.size - OLD.size WHERE name = 'size';
+    END""",
+]
+
+
+def _cache_control(headers) -> Dict[str, Optional[str]]:
+    directives = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        k, _, v = part.strip().partition("=")
+        if k:
+            directives[k.lower()] = v.strip('"') or None
+    return directives
+
+
+def _vary(headers) -> List[str]:
+    """ request header names a response varies on, lowercase and sorted"""
+    names = {name.strip().lower() for name in (headers.get("Vary") or "").split(",")}
+    return sorted(name for name in names if name and name != "*")
+
+
+def _key(url: str, vary: List[str], request_headers) -> str:
+    """ cache key, the url plus the values of the request headers the response varies on"""
+    if not vary:
+        return url
+    return url + "".join(f"\n{name}: {request_headers.get(name) or ''}" for name in vary)
+
+
+def shareable(request, response) -> bool:
+    """
+    Check if a response may be served to other sessions, the cache is shared by every browser.
+
+    Args:
+        request: The selenium-wire request.
+        response: Its response.
+
+    Returns:
+        bool: False for private, cookie setting or authenticated responses.
+    """
+    if "private" in _cache_control(response.headers):
+        return False
+    if response.headers.get("Set-Cookie") or request.headers.get("Authorization"):
+        return False
+    return True
+
+
+def freshness(headers, now: float) -> Optional[float]:
+    """
+    Compute when a response stops being fresh.
+
+    Args:
+        headers: Response headers.
+        now (float): Current unix time.
+
+    Returns:
+        Optional[float]: Unix time the response expires, None if it must not be stored.
+    """
+    cc = _cache_control(headers)
+    if "no-store" in cc or headers.get("Vary") == "*":
+        return None
+    if "no-cache" in cc:
+        return now  # store, but revalidate before every use
+    for directive in ("s-maxage", "max-age"):
+        if cc.get(directive):
+            try:
+                return now + int(cc[directive])
+            except ValueError:
+                break
+    if headers.get("Expires"):
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now
+    if headers.get("ETag") or headers.get("Last-Modified"):
+        return now
+    return None
+
+
+class ResponseCache:
+    """
+    Disk backed HTTP response cache for selenium-wire, shared by every browser on the host.
+
+    Responses live in a sqlite database in WAL mode, so concurrent browsers, in threads or
+    processes, can read and write the same cache. Cache-Control, Expires, Vary and
+    ETag/Last-Modified revalidation are honoured. Private, cookie setting and authenticated
+    responses are not stored, one session must not see another's pages. URLs matching a
+    forced pattern and the "record" mode store responses regardless.
+
+    Modes:
+        "cache": serve fresh responses, revalidate stale ones, store new ones.
+        "record": store every GET response, whatever its headers say.
+        "replay": serve only from the cache, never touch the network, misses get a 504.
+
+    Attributes:
+        path (str): Directory of the cache database.
+        max_bytes (int): Upper bound of stored bodies, least recently used responses are evicted past it.
+        max_entry_bytes (int): Bodies larger than this are never stored.
+        force (List[Pattern]): URL patterns cached even if their headers forbid it.
+        force_ttl (float): Seconds a forced response stays fresh.
+        mode (str): "cache", "record" or "replay".
+        stats (Dict[str, int]): hits, misses, revalidated, stored and evicted counters of this instance.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_bytes: int = 512 * 1024 * 1024,
+                 max_entry_bytes: int = 16 * 1024 * 1024,
+                 force: Optional[Iterable[Union[str, Pattern]]] = None,
+                 force_ttl: float = 24 * 3600, mode: str = CACHE) -> None:
+        if mode not in MODES:
+            raise ValueError(f"unknown cache mode: {mode}")
+        self.path = path or join(gettempdir(), "pombo_correio_http_cache")
+        os.makedirs(self.path, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.force = [re.compile(p) if isinstance(p, str) else p for p in force or []]
+        self.force_ttl = force_ttl
+        self.mode = mode
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "revalidated": 0,
+                                      "stored": 0, "evicted": 0}
+        self._stats_lock = threading.Lock()
+        self._connections_lock = threading.Lock()
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._migrate()
+
+    def _migrate(self) -> None:
+        db = self._db()
+        db.execute("BEGIN IMMEDIATE")  # one process migrates, the others wait
+        try:
+            if db.execute("PRAGMA user_version").fetchone()[0] != _VERSION:
+                db.execute("DROP TABLE IF EXISTS responses")
+                db.execute("DROP TABLE IF EXISTS meta")
+            for statement in _SCHEMA:
+                db.execute(statement)
+            db.execute(f"PRAGMA user_version = {_VERSION}")
+            db.commit()
+        except BaseException:
+            db.rollback()
+            raise
+
+    def _db(self) -> sqlite3.Connection:
+        """ one connection per thread, selenium-wire runs interceptors on its proxy threads"""
+        thread = threading.current_thread()
+        with self._connections_lock:
+            db = self._connections.get(thread)
+            if db is not None:
+                return db
+            # proxy threads come and go, close the connections of the finished ones
+            for t in [t for t in self._connections if not t.is_alive()]:
+                self._connections.pop(t).close()
+            db = sqlite3.connect(join(self.path, "responses.sqlite"), timeout=30, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._connections[thread] = db
+            return db
+
+    def close(self) -> None:
+        """
+        Close every database connection, the cache can still be used and reconnects.
+        """
+        with self._connections_lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for db in connections:
+            db.close()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        with self._stats_lock:
+            self.stats[key] += n
+
+    def _forced(self, url: str) -> bool:
+        return any(p.search(url) for p in self.force)
+
+    def _find(self, url: str, request_headers) -> Optional[Tuple]:
+        """ (key, status, headers, body, expires, etag, last_modified) of the variant matching the request"""
+        for row in self._db().execute(
+                "SELECT key, vary, status, headers, body, expires, etag, last_modified "
+                "FROM responses WHERE url = ?", (url,)):
+            if row[0] == _key(url, json.loads(row[1]), request_headers):
+                return (row[0],) + row[2:]
+        return None
+
+    def lookup(self, url: str, request_headers=None) -> Optional[Tuple]:
+        """
+        Args:
+            url (str): The request URL.
+            request_headers: The request headers, matched against the Vary header of the stored responses.
+
+        Returns:
+            Optional[Tuple]: (status, headers, body, expires, etag, last_modified) or None if not cached.
+        """
+        entry = self._find(url, request_headers or {})
+        return entry[1:] if entry else None
+
+    def store(self, url: str, status: int, headers: List[Tuple[str, str]], body: bytes,
+              expires: float, etag: Optional[str] = None, last_modified: Optional[str] = None,
+              vary: Iterable[str] = (), request_headers=None) -> None:
+        if len(body) > self.max_entry_bytes:
+            return
+        vary = sorted(vary)
+        with self._db() as db:
+            db.execute("INSERT INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                       "ON CONFLICT (key) DO UPDATE SET status = excluded.status, headers = excluded.headers, "
+                       "body = excluded.body, size = excluded.size, expires = excluded.expires, "
+                       "etag = excluded.etag, last_modified = excluded.last_modified, "
+                       "last_access = excluded.last_access",
+                       (_key(url, vary, request_headers or {}), url, json.dumps(vary), status,
+                        json.dumps(headers), body, len(body), expires, etag, last_modified, time()))
+        self._count("stored")
+        self._evict()
+
+    def _touch(self, key: str, expires: Optional[float] = None) -> None:
+        with self._db() as db:
+            if expires is None:
+                db.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time(), key))
+            else:
+                db.execute("UPDATE responses SET last_access = ?, expires = ? WHERE key = ?",
+                           (time(), expires, key))
+
+    @property
+    def size(self) -> int:
+        """Returns the bytes of stored bodies."""
+        return self._db().execute("SELECT value FROM meta WHERE name = 'size'").fetchone()[0]
+
+    def _evict(self) -> None:
+        if self.size <= self.max_bytes:
+            return
+        with self._db() as db:
+            excess = self.size - self.max_bytes  # again, another process may have evicted meanwhile
+            freed = evicted = 0
+            for key, size in db.execute("SELECT key, size FROM responses ORDER BY last_access"):
+                if freed >= excess:
+                    break
+                db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                freed += size
+                evicted += 1
+        self._count("evicted", evicted)
+
+    def clear(self) -> None:
+        with self._db() as db:
+            db.execute("DELETE FROM responses")
+
+    # selenium-wire interceptors
+    def intercept_request(self, request) -> None:
+        if request.method != "GET":
+            if self.mode == REPLAY:
+                request.create_response(status_code=504, headers=[(HIT_HEADER, "MISS")], body=b"")
+            return
+        entry = self._find(request.url, request.headers)
+        if entry is None:
+            self._count("misses")
+            if self.mode == REPLAY:
+                request.create_response(status_code=504, headers=[(HIT_HEADER, "MISS")],
+                                        body=b"not in replay cache")
+            return
+
+        key, status, headers, body, expires, etag, last_modified = entry
+        if self.mode == REPLAY or expires > time():
+            self._count("hits")
+            self._touch(key)
+            request.create_response(status_code=status,
+                                    headers=json.loads(headers) + [(HIT_HEADER, "HIT")],
+                                    body=body)
+            return
+
+        # stale, ask the server if our copy is still good
+        if self.mode == CACHE and (etag or last_modified) and \
+                "If-None-Match" not in request.headers and "If-Modified-Since" not in request.headers:
+            if etag:
+                request.headers["If-None-Match"] = etag
+            if last_modified:
+                request.headers["If-Modified-Since"] = last_modified
+        else:
+            self._count("misses")
+
+    def intercept_response(self, request, response) -> None:
+        if response.headers.get(HIT_HEADER) or request.method != "GET":
+            return
+        now = time()
+        if response.status_code == 304:
+            # answer to a conditional request, ours if it carries the validators of our copy
+            entry = self._find(request.url, request.headers)
+            if entry is not None and (
+                    (entry[5] and request.headers.get("If-None-Match") == entry[5]) or
+                    (entry[6] and request.headers.get("If-Modified-Since") == entry[6])):
+                key, status, headers, body = entry[:4]
+                self._touch(key, freshness(response.headers, now) or now)
+                self._count("revalidated")
+                response.status_code = status
+                for k in set(response.headers.keys()):  # drop the 304 headers
+                    del response.headers[k]
+                for k, v in json.loads(headers):
+                    response.headers[k] = v
+                response.headers[HIT_HEADER] = "REVALIDATED"
+                response.body = body
+            return
+
+        if self.mode == RECORD:
+            if response.status_code >= 500:
+                return
+            expires = now + 100 * 365 * 24 * 3600  # never stale
+        elif response.status_code not in CACHEABLE_STATUS:
+            return
+        elif self._forced(request.url):
+            expires = now + self.force_ttl
+        elif not shareable(request, response):
+            return
+        else:
+            expires = freshness(response.headers, now)
+            if expires is None:
+                return
+        self.store(request.url, response.status_code, list(response.headers.items()),
+                   response.body or b"", expires, response.headers.get("ETag"),
+                   response.headers.get("Last-Modified"), _vary(response.headers), request.headers)
@@ -0,0 +1,537 @@
+import copy
+import os
+import re
+import shutil
+import threading
+import uuid
+from collections import OrderedDict, deque
+from os.path import join
+from typing import Optional, Callable, List, Set, Tuple, Iterator, Union, Pattern, Dict, Iterable
+from urllib.parse import urlsplit
+
+# Sec-Fetch-Dest -> resource type
+_FETCH_DEST = {
+    "document": "document",
+    "iframe": "subdocument",
+    "frame": "subdocument",
+    "image": "image",
+    "script": "script",
+    "style": "style",
+    "font": "font",
+    "audio": "media",
+    "video": "media",
+    "track": "media",
+    "empty": "xhr",
+}
+# file extension -> resource type, when the browser did not send Sec-Fetch-Dest
+_EXTENSIONS = {
+    "png": "image", "jpg": "image", "jpeg": "image", "gif": "image", "webp": "image",
+    "svg": "image", "ico": "image", "avif": "image",
+    "js": "script", "mjs": "script",
+    "css": "style",
+    "woff": "font", "woff2": "font", "ttf": "font", "otf": "font", "eot": "font",
+    "mp3": "media", "mp4": "media", "webm": "media", "ogg": "media", "m3u8": "media",
+    "aac": "media", "ts": "media",
+}
+
+
+def resource_type(request) -> str:
+    """
+    Classify a captured request.
+
+    Args:
+        request: A selenium-wire request.
+
+    Returns:
+        str: One of document, subdocument, image, script, style, font, media, xhr or other.
+    """
+    dest = request.headers.get("Sec-Fetch-Dest")
+    if dest in _FETCH_DEST:
+        return _FETCH_DEST[dest]
+    path = urlsplit(request.url).path
+    ext = path.rsplit(".", 1)[-1].lower() if "." in path else ""
+    if ext in _EXTENSIONS:
+        return _EXTENSIONS[ext]
+    accept = request.headers.get("Accept", "")
+    if "text/html" in accept:
+        return "document"
+    if accept.startswith("image/"):
+        return "image"
+    return "other"
+
+
+def is_main_frame(request) -> bool:
+    """
+    Check if a captured request loads a top level document.
+
+    Args:
+        request: A selenium-wire request.
+
+    Returns:
+        bool: True for page navigations, False for frames and subresources.
+    """
+    dest = request.headers.get("Sec-Fetch-Dest")
+    if dest:
+        return dest == "document"
+    return request.method == "GET" and "text/html" in request.headers.get("Accept", "")
+
+
+def _prune_storage(storage, ids: Set[str]) -> bool:
+    """
+    Remove requests from a selenium-wire storage.
+
+    Returns:
+        bool: False if the storage type is unknown and nothing was removed.
+    """
+    if hasattr(storage, "_index"):  # disk storage
+        with storage._lock:
+            storage._index[:] = [e for e in storage._index if e.id not in ids]
+        for rid in ids:
+            shutil.rmtree(storage._get_request_dir(rid), ignore_errors=True)
+        return True
+    if hasattr(storage, "_requests"):  # memory storage
+        with storage._lock:
+            for rid in ids:
+                storage._requests.pop(rid, None)
+        return True
+    return False
+
+
+def read_body(response) -> bytes:
+    """
+    Get a response body, reading it back from disk if the capture policy spilled it.
+
+    Args:
+        response: A selenium-wire response.
+
+    Returns:
+        bytes: The response body.
+    """
+    path = getattr(response, "spill_path", None)
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    return response.body
+
+
+class CapturePolicy:
+    """
+    Decides at capture time what selenium-wire stores and for how long.
+
+    Attributes:
+        max_requests (Optional[int]): Keep at most this many requests, oldest are evicted first.
+        max_bytes (Optional[int]): Keep at most this many body bytes, oldest are evicted first.
+        headers_only (bool): Never store request/response bodies.
+        spill_dir (Optional[str]): Write response bodies larger than spill_threshold here instead of keeping them.
+        spill_threshold (int): Body size in bytes above which bodies are spilled.
+        hosts (Optional[Set[str]]): Only capture these hosts (subdomains included).
+        exclude_hosts (Optional[Set[str]]): Never capture these hosts (subdomains included).
+        path_pattern (Optional[Pattern]): Only capture URLs whose path matches.
+        resource_types (Optional[Set[str]]): Only capture these resource types, see resource_type().
+        include (Optional[Callable]): Extra predicate, the request is captured only if it returns True.
+        exclude (Optional[Callable]): Extra predicate, the request is dropped if it returns True.
+    """
+
+    def __init__(self, max_requests: Optional[int] = None, max_bytes: Optional[int] = None,
+                 headers_only: bool = False, spill_dir: Optional[str] = None,
+                 spill_threshold: int = 1024 * 1024,
+                 hosts: Optional[Iterable[str]] = None, exclude_hosts: Optional[Iterable[str]] = None,
+                 path_pattern: Optional[Union[str, Pattern]] = None,
+                 resource_types: Optional[Iterable[str]] = None,
+                 include: Optional[Callable] = None, exclude: Optional[Callable] = None) -> None:
+        self.max_requests = max_requests
+        self.max_bytes = max_bytes
+        self.headers_only = headers_only
+        self.spill_dir = spill_dir
+        self.spill_threshold = spill_threshold
+        self.hosts = set(hosts) if hosts else None
+        self.exclude_hosts = set(exclude_hosts) if exclude_hosts else None
+        self.path_pattern = re.compile(path_pattern) if isinstance(path_pattern, str) else path_pattern
+        self.resource_types = set(resource_types) if resource_types else None
+        self.include = include
+        self.exclude = exclude
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+    @staticmethod
+    def _host_in(host: str, hosts: Set[str]) -> bool:
+        return any(host == h or host.endswith("." + h) for h in hosts)
+
+    def accepts(self, request) -> bool:
+        """
+        Check if a request should be stored at all.
+
+        Args:
+            request: A selenium-wire request.
+
+        Returns:
+            bool: True to store the request.
+        """
+        url = urlsplit(request.url)
+        host = url.hostname or ""
+        if self.hosts is not None and not self._host_in(host, self.hosts):
+            return False
+        if self.exclude_hosts is not None and self._host_in(host, self.exclude_hosts):
+            return False
+        if self.path_pattern is not None and not self.path_pattern.search(url.path):
+            return False
+        if self.resource_types is not None and resource_type(request) not in self.resource_types:
+            return False
+        if self.include is not None and not self.include(request):
+            return False
+        if self.exclude is not None and self.exclude(request):
+            return False
+        return True
+
+
+class CaptureStorage:
+    """
+    Wraps a selenium-wire storage and enforces a CapturePolicy on every save.
+
+    Anything not overridden here is delegated to the wrapped storage, so selenium-wire
+    and RequestCursor keep working unchanged.
+
+    Attributes:
+        inner: The wrapped selenium-wire storage.
+        policy (CapturePolicy): The policy being enforced.
+        stats (Dict[str, int]): Counters of captured, dropped, evicted and spilled requests and bytes.
+    """
+
+    def __init__(self, inner, policy: CapturePolicy) -> None:
+        self.inner = inner
+        self.policy = policy
+        self._stats_lock = threading.Lock()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._dropped: Set[str] = set()
+        self._spilled: Dict[str, str] = {}
+        self.stats: Dict[str, int] = dict.fromkeys((
+            "captured_requests", "captured_bytes", "dropped_requests", "dropped_bytes",
+            "evicted_requests", "evicted_bytes", "spilled_bodies", "spilled_bytes",
+            "stored_requests", "stored_bytes"), 0)
+
+    def __getattr__(self, item):
+        return getattr(self.inner, item)
+
+    def save_request(self, request) -> None:
+        size = len(request.body or b"")
+        if not self.policy.accepts(request):
+            # never stored, the id only lets save_response recognize the request
+            request.id = str(uuid.uuid4())
+            with self._stats_lock:
+                self._dropped.add(request.id)
+                self.stats["dropped_requests"] += 1
+                self.stats["dropped_bytes"] += size
+            return
+        stored = request
+        if self.policy.headers_only and size:
+            stored = copy.copy(request)
+            stored.body = b""
+        self.inner.save_request(stored)  # assigns the request id
+        request.id = stored.id  # selenium-wire saves the response under the id of the original
+        with self._stats_lock:
+            if stored is not request:
+                self.stats["dropped_bytes"] += size
+                size = 0
+            self.stats["captured_requests"] += 1
+            self.stats["captured_bytes"] += size
+            self._sizes[request.id] = size
+        self._enforce_limits()
+
+    def save_response(self, request_id: str, response) -> None:
+        size = len(response.body or b"")
+        with self._stats_lock:
+            if request_id in self._dropped:
+                self._dropped.discard(request_id)
+                self.stats["dropped_bytes"] += size
+                return
+            if request_id not in self._sizes:
+                return  # evicted before its response arrived
+            if size and self.policy.headers_only:
+                response = copy.copy(response)
+                response.body = b""
+                self.stats["dropped_bytes"] += size
+                size = 0
+            elif self.policy.spill_dir and size > self.policy.spill_threshold:
+                path = join(self.policy.spill_dir, request_id)
+                with open(path, "wb") as f:
+                    f.write(response.body)
+                response = copy.copy(response)
+                response.body = b""
+                response.spill_path = path
+                self._spilled[request_id] = path
+                self.stats["spilled_bodies"] += 1
+                self.stats["spilled_bytes"] += size
+                size = 0
+            self.stats["captured_bytes"] += size
+            self._sizes[request_id] += size
+        self.inner.save_response(request_id, response)
+        self._enforce_limits()
+
+    def _enforce_limits(self) -> None:
+        evicted = set()
+        with self._stats_lock:
+            max_requests, max_bytes = self.policy.max_requests, self.policy.max_bytes
+            stored = sum(self._sizes.values())
+            while self._sizes and (
+                    (max_requests is not None and len(self._sizes) > max_requests) or
+                    (max_bytes is not None and stored > max_bytes)):
+                rid, size = self._sizes.popitem(last=False)
+                stored -= size
+                evicted.add(rid)
+                self.stats["evicted_requests"] += 1
+                self.stats["evicted_bytes"] += size
+            self.stats["stored_requests"] = len(self._sizes)
+            self.stats["stored_bytes"] = stored
+            spilled = [self._spilled.pop(rid) for rid in evicted if rid in self._spilled]
+        if evicted:
+            _prune_storage(self.inner, evicted)
+        for path in spilled:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def forget(self, ids: Set[str]) -> None:
+        """
+        Stop accounting for requests removed from the wrapped storage by someone else.
+
+        Args:
+            ids (Set[str]): The removed request ids.
+        """
+        with self._stats_lock:
+            for rid in ids:
+                self._sizes.pop(rid, None)
+                path = self._spilled.pop(rid, None)
+                if path:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            self.stats["stored_requests"] = len(self._sizes)
+            self.stats["stored_bytes"] = sum(self._sizes.values())
+
+    def clear_requests(self) -> None:
+        self.inner.clear_requests()
+        self.forget(set(self._sizes))
+        with self._stats_lock:
+            self._dropped = set()
+
+
+class NavigationLog:
+    """
+    Wraps a selenium-wire storage and notes main frame responses as they are saved.
+
+    Sits outside any CaptureStorage, so navigations are seen even when the capture policy
+    drops or evicts the documents, and only the URL, status and redirect target are kept,
+    reading the log never loads captured requests back.
+
+    Attributes:
+        inner: The wrapped selenium-wire storage.
+    """
+
+    def __init__(self, inner, maxlen: int = 1000) -> None:
+        self.inner = inner
+        self._maxlen = maxlen
+        self._pending: "OrderedDict[str, str]" = OrderedDict()  # request id -> url, waiting for a response
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __getattr__(self, item):
+        return getattr(self.inner, item)
+
+    def save_request(self, request) -> None:
+        self.inner.save_request(request)  # assigns the request id
+        if request.id is not None and is_main_frame(request):
+            with self._lock:
+                self._pending[request.id] = request.url
+                if len(self._pending) > self._maxlen:
+                    self._pending.popitem(last=False)  # never answered, e.g. aborted
+
+    def save_response(self, request_id: str, response) -> None:
+        with self._lock:
+            url = self._pending.pop(request_id, None)
+            if url is not None:
+                self._events.append((url, response.status_code, response.headers.get("Location")))
+        self.inner.save_response(request_id, response)
+
+    def drain(self) -> List[Tuple[str, int, Optional[str]]]:
+        """
+        Returns:
+            List[Tuple[str, int, Optional[str]]]: (url, status, Location header) of the main frame
+                responses saved since the last call, in order.
+        """
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def clear_requests(self) -> None:
+        self.inner.clear_requests()
+        with self._lock:
+            self._pending.clear()
+            self._events.clear()
+
+
+def capture_storage(storage):
+    """ the storage behind a NavigationLog, where CaptureStorage and the request data live"""
+    return storage.inner if isinstance(storage, NavigationLog) else storage
+
+
+class RequestCursor:
+    """
+    Streams requests captured by selenium-wire, only touching the ones newer than the last call.
+
+    selenium-wire rebuilds (and for disk storage unpickles) the whole request list every time
+    `driver.requests` is accessed, the cursor reads the storage index instead, loads only the
+    requests it has not consumed yet and prunes consumed requests from storage so the index stays short.
+
+    Attributes:
+        observers (List[Callable]): Called once with every request the cursor loads, requests rejected by
+            the URL filter are never loaded and so never observed.
+    """
+
+    def __init__(self, driver) -> None:
+        """
+        Initialize the cursor.
+
+        Args:
+            driver: A selenium-wire webdriver.
+        """
+        self._driver = driver
+        self._consumed: Set[str] = set()
+        self._observed: Set[str] = set()
+        self._fallback = {}
+        self.observers: List[Callable] = []
+
+    @property
+    def storage(self):
+        """Returns the selenium-wire request storage of the driver, if any."""
+        backend = getattr(self._driver, "backend", None)
+        return capture_storage(getattr(backend, "storage", None))
+
+    def _entries(self) -> List[Tuple[str, str, bool]]:
+        """ (request id, url, has response) for every request in storage, without loading them"""
+        storage = self.storage
+        if hasattr(storage, "_index"):  # disk storage
+            with storage._lock:
+                return [(e.id, e.url, getattr(e, "has_response", True))
+                        for e in storage._index]
+        if hasattr(storage, "_requests"):  # memory storage
+            with storage._lock:
+                return [(rid, v["request"].url, v["request"].response is not None)
+                        for rid, v in storage._requests.items()]
+        # unknown storage, go through the public (full rebuild) api
+        self._fallback = {r.id: r for r in getattr(self._driver, "requests", [])}
+        return [(r.id, r.url, r.response is not None) for r in self._fallback.values()]
+
+    def _load(self, request_id: str):
+        storage = self.storage
+        if hasattr(storage, "_index"):
+            try:
+                return storage._load_request(request_id)
+            except FileNotFoundError:
+                return None  # pruned or cleared meanwhile
+        if hasattr(storage, "_requests"):
+            return storage._requests.get(request_id, {}).get("request")
+        return self._fallback.get(request_id)
+
+    def _prune(self, ids: Set[str]) -> None:
+        """ remove consumed requests from selenium-wire storage"""
+        if not ids:
+            return
+        storage = self.storage
+        if isinstance(storage, CaptureStorage):
+            storage.forget(ids)
+            storage = storage.inner
+        if not _prune_storage(storage, ids):
+            return  # can not prune, keep remembering what was consumed
+        self._consumed -= ids
+        self._observed -= ids
+
+    def _observe(self, request) -> None:
+        if request.id in self._observed:
+            return
+        self._observed.add(request.id)
+        for observer in self.observers:
+            observer(request)
+
+    def scan(self) -> None:
+        """
+        Load requests not seen yet and hand them to the observers, without consuming them.
+        """
+        if not self.observers:
+            return
+        for rid, _, _ in self._entries():
+            if rid in self._observed or rid in self._consumed:
+                continue
+            request = self._load(rid)
+            if request is not None:
+                self._observe(request)
+
+    def fetch(self, url_pattern: Optional[Union[str, Pattern]] = None,
+              method: Optional[str] = None, content_type: Optional[str] = None,
+              prune: bool = True) -> Iterator:
+        """
+        Yield requests captured since the last call, in capture order.
+
+        Requests rejected by a filter are consumed as well, except requests still waiting
+        for a response when filtering by content type, those are decided on a later call.
+
+        Args:
+            url_pattern (Optional[Union[str, Pattern]]): Regex the URL must match, checked before the request is loaded.
+            method (Optional[str]): HTTP method the request must use.
+            content_type (Optional[str]): Substring the response Content-Type must contain.
+            prune (bool): Remove consumed requests from selenium-wire storage. Defaults to True.
+
+        Yields:
+            Request: selenium-wire request objects.
+        """
+        if isinstance(url_pattern, str):
+            url_pattern = re.compile(url_pattern)
+        method = method.upper() if method else None
+        to_prune = set()
+
+        def _consume(rid, has_response):
+            self._consumed.add(rid)
+            # requests without a response are pruned once it arrives
+            if prune and has_response:
+                to_prune.add(rid)
+
+        try:
+            for rid, url, has_response in self._entries():
+                if rid in self._consumed:
+                    if prune and has_response:
+                        to_prune.add(rid)
+                    continue
+                if url_pattern is not None and not url_pattern.search(url):
+                    _consume(rid, has_response)
+                    continue
+                request = self._load(rid)
+                if request is None:
+                    continue
+                self._observe(request)
+                if method and request.method != method:
+                    _consume(rid, has_response)
+                    continue
+                if content_type:
+                    if request.response is None:
+                        continue
+                    if content_type not in request.response.headers.get("Content-Type", ""):
+                        _consume(rid, has_response)
+                        continue
+                _consume(rid, has_response)
+                yield request
+        finally:
+            self._prune(to_prune)
+
+    def clear(self) -> None:
+        """
+        Drop every captured request and forget the cursor position.
+        """
+        try:
+            del self._driver.requests
+        except AttributeError:
+            pass  # not a selenium-wire driver
+        self._consumed = set()
+        self._observed = set()
+        self._fallback = {}
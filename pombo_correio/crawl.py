@@ -0,0 +1,252 @@
+import json
+import multiprocessing
+import os
+import traceback
+from collections import deque
+from queue import Empty
+from time import monotonic
+from typing import Optional, Dict, Callable, Any, Iterable, List
+
+from pombo_correio.supervisor import driver_pids, kill_process_trees
+
+
+def job_key(job: Any) -> str:
+    """
+    Stable identity of a job, used to de-duplicate and to checkpoint it.
+
+    Args:
+        job: A string (e.g. a URL) or any JSON serializable value.
+
+    Returns:
+        str: The job itself if it is a string, its canonical JSON otherwise.
+    """
+    return job if isinstance(job, str) else json.dumps(job, sort_keys=True)
+
+
+def _worker_main(worker_id: int, factory: Callable, handler: Callable, tasks, results) -> None:
+    """ worker process, owns one browser and runs the jobs the orchestrator hands it"""
+    browser = factory()
+    try:
+        browser.new_session()
+        # the orchestrator kills these if this process dies or hangs, they would be orphaned otherwise
+        results.put(("ready", worker_id, None, driver_pids(getattr(browser, "_driver", None))))
+        while True:
+            item = tasks.get()
+            if item is None:
+                break
+            key, job = item
+            try:
+                results.put(("done", worker_id, key, handler(browser, job)))
+            except Exception:
+                results.put(("error", worker_id, key, traceback.format_exc()))
+                if not browser.is_alive():
+                    # the job took the browser down with it
+                    try:
+                        browser.stop()
+                        browser.new_session()
+                    except Exception as e:
+                        print(f"ERROR: crawl worker {worker_id} could not restart its browser, exiting")
+                        print(str(e))
+                        break
+                    results.put(("ready", worker_id, None, driver_pids(getattr(browser, "_driver", None))))
+    finally:
+        browser.stop()
+
+
+class _Worker:
+    def __init__(self, worker_id: int, process, tasks) -> None:
+        self.id = worker_id
+        self.process = process
+        self.tasks = tasks
+        self.ready = False  # browser session started
+        self.pids: List[int] = []  # geckodriver and firefox of the worker
+        self.job: Optional[str] = None
+        self.started: Optional[float] = None
+
+
+class CrawlOrchestrator:
+    """
+    Run crawl jobs over several worker processes, each owning its own browser.
+
+    Idle workers pull the next job from the orchestrator, so fast workers take over the
+    share of slow ones and throughput scales with the number of browsers the host can run.
+    Results are merged in the parent process and appended to a checkpoint file as they
+    arrive. Running again with the same checkpoint skips the jobs already finished.
+    A job whose worker crashed or hung is handed to another worker, up to max_attempts.
+
+    The factory and handler are sent to the worker processes, they must be picklable,
+    e.g. classes and module level functions.
+
+    Attributes:
+        factory (Callable[[], _AbstractBrowser]): Creates the browser of a worker, new_session() is called for it.
+        handler (Callable[[browser, job], Any]): Runs one job, its return value is the job result.
+        workers (int): Number of worker processes.
+        checkpoint (Optional[str]): JSON lines file recording finished jobs.
+        max_attempts (int): Tries per job before it is recorded as failed.
+        job_timeout (Optional[float]): Seconds before a job's worker is killed and the job retried.
+        results (Dict[str, Any]): job key -> result of every finished job, checkpointed ones included.
+        failed (Dict[str, str]): job key -> last error of jobs that ran out of attempts.
+    """
+
+    def __init__(self, factory: Callable, handler: Callable, workers: Optional[int] = None,
+                 checkpoint: Optional[str] = None, max_attempts: int = 3,
+                 job_timeout: Optional[float] = None, start_method: str = "spawn") -> None:
+        self.factory = factory
+        self.handler = handler
+        self.workers = workers or os.cpu_count() or 1
+        self.checkpoint = checkpoint
+        self.max_attempts = max_attempts
+        self.job_timeout = job_timeout
+        self.results: Dict[str, Any] = {}
+        self.failed: Dict[str, str] = {}
+        self._ctx = multiprocessing.get_context(start_method)
+        self._next_worker_id = 0
+        self._startup_failures = 0
+
+    def load_checkpoint(self) -> None:
+        """Read finished jobs from the checkpoint file, the last record of a job wins."""
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return
+        with open(self.checkpoint) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn write from a crash
+                if record.get("status") == "done":
+                    self.results[record["key"]] = record.get("result")
+                    self.failed.pop(record["key"], None)
+                elif record.get("status") == "failed":
+                    self.failed[record["key"]] = record.get("error")
+
+    def _record(self, f, key: str, status: str, **data) -> None:
+        if f is not None:
+            f.write(json.dumps({"key": key, "status": status, **data}, default=str) + "\n")
+            f.flush()
+
+    @staticmethod
+    def _kill(w: _Worker) -> None:
+        """ kill a worker together with its geckodriver and firefox"""
+        pids = list(w.pids)
+        if w.process.is_alive():
+            pids.insert(0, w.process.pid)
+        kill_process_trees(pids)
+        w.process.join(timeout=5)
+
+    def _spawn(self, results) -> _Worker:
+        worker_id = self._next_worker_id
+        self._next_worker_id += 1
+        tasks = self._ctx.Queue()
+        process = self._ctx.Process(target=_worker_main, name=f"pombo_correio-crawl-{worker_id}",
+                                    args=(worker_id, self.factory, self.handler, tasks, results),
+                                    daemon=True)
+        process.start()
+        return _Worker(worker_id, process, tasks)
+
+    def run(self, jobs: Iterable[Any], on_result: Optional[Callable[[Any, Any], None]] = None,
+            retry_failed: bool = False) -> Dict[str, Any]:
+        """
+        Run every job not finished yet and wait for them.
+
+        Args:
+            jobs (Iterable[Any]): Jobs for the handler, strings or JSON serializable values.
+            on_result (Optional[Callable[[Any, Any], None]]): Called in this process with (job, result) as results arrive.
+            retry_failed (bool): Also retry jobs the checkpoint recorded as failed.
+
+        Returns:
+            Dict[str, Any]: job key -> result of every finished job.
+        """
+        self.load_checkpoint()
+        by_key: Dict[str, Any] = {}
+        for job in jobs:
+            key = job_key(job)
+            if key in self.results or key in by_key or (key in self.failed and not retry_failed):
+                continue
+            by_key[key] = job
+        if not by_key:
+            return self.results
+
+        pending = deque(by_key)
+        attempts: Dict[str, int] = {}
+        results = self._ctx.Queue()
+        workers: Dict[int, _Worker] = {}
+        f = open(self.checkpoint, "a") if self.checkpoint else None
+        try:
+            for _ in range(min(self.workers, len(pending))):
+                w = self._spawn(results)
+                workers[w.id] = w
+
+            while pending or any(w.job is not None for w in workers.values()):
+                self._reap(workers, pending, attempts, results, f)
+                # hand out work to idle workers
+                for w in workers.values():
+                    if w.ready and w.job is None and pending:
+                        w.job = pending.popleft()
+                        w.started = monotonic()
+                        attempts[w.job] = attempts.get(w.job, 0) + 1
+                        w.tasks.put((w.job, by_key[w.job]))
+
+                try:
+                    kind, worker_id, key, payload = results.get(timeout=0.5)
+                except Empty:
+                    continue
+
+                w = workers.get(worker_id)
+                if w is not None and kind == "ready":
+                    w.ready = True
+                    w.pids = payload or []
+                    continue
+                if w is None or w.job != key:
+                    continue  # late message from a replaced worker
+                w.job = None
+                if kind == "done":
+                    self.results[key] = payload
+                    self.failed.pop(key, None)
+                    self._record(f, key, "done", result=payload)
+                    if on_result is not None:
+                        on_result(by_key[key], payload)
+                else:
+                    self._retry(key, payload, pending, attempts, f)
+        finally:
+            for w in workers.values():
+                if w.process.is_alive():
+                    w.tasks.put(None)
+            for w in workers.values():
+                w.process.join(timeout=30)
+                if w.process.is_alive():
+                    self._kill(w)
+            if f is not None:
+                f.close()
+        return self.results
+
+    def _retry(self, key: str, error: str, pending: deque, attempts: Dict[str, int], f) -> None:
+        if attempts.get(key, 0) >= self.max_attempts:
+            self.failed[key] = error
+            self._record(f, key, "failed", error=error)
+        else:
+            pending.append(key)
+
+    def _reap(self, workers: Dict[int, _Worker], pending: deque, attempts: Dict[str, int],
+              results, f) -> None:
+        """ replace workers that died or hang on a job, their job goes back in the queue"""
+        for worker_id, w in list(workers.items()):
+            hung = w.job is not None and self.job_timeout is not None and \
+                monotonic() - w.started > self.job_timeout
+            if w.process.is_alive() and not hung:
+                continue
+            if hung:
+                self._kill(w)
+            else:
+                w.process.join(timeout=5)
+                kill_process_trees(w.pids)  # left behind if the worker crashed
+            del workers[worker_id]
+            if not w.ready:
+                self._startup_failures += 1
+                if self._startup_failures > self.max_attempts * self.workers:
+                    raise RuntimeError("crawl workers keep failing to start their browser")
+            if w.job is not None:
+                reason = "job timed out" if hung else f"worker exited with code {w.process.exitcode}"
+                self._retry(w.job, reason, pending, attempts, f)
+            if pending or any(x.job is not None for x in workers.values()):
+                new = self._spawn(results)
+                workers[new.id] = new
@@ -0,0 +1,180 @@
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Optional, Dict, List, Tuple, Iterator
+
+
+class CachedSelector:
+    """
+    Elements found for one selector in one tab.
+
+    Attributes:
+        by (Optional[str]): "css" or "xpath" if the selector was searched from the document root
+            and can be searched again to re-resolve stale elements, None otherwise.
+        elements (OrderedDict): element id -> WebElement, in the order they were found.
+    """
+
+    def __init__(self, by: Optional[str] = None) -> None:
+        self.by = by
+        self.elements: "OrderedDict[str, object]" = OrderedDict()
+
+    def replace(self, elements: List) -> None:
+        self.elements = OrderedDict((e.id, e) for e in elements)
+
+    def __len__(self) -> int:
+        return len(self.elements)
+
+
+class ElementCache(MutableMapping):
+    """
+    Bounded cache of found elements, tab id -> {selector -> [WebElement]}.
+
+    Reads behave like the plain dict it replaces, elements are de-duplicated by id,
+    the least recently used selectors are evicted once a tab or the whole cache holds
+    too many elements, and a tab is invalidated when it navigates. A selector matching
+    more elements than the limits allow keeps the first ones found, so cached indexes stay valid.
+
+    Attributes:
+        max_per_tab (int): Upper bound of cached elements per tab.
+        max_total (int): Upper bound of cached elements over all tabs.
+        evictions (int): Selectors dropped, or elements not cached, to respect the limits.
+    """
+
+    def __init__(self, max_per_tab: int = 500, max_total: int = 2000) -> None:
+        self.max_per_tab = max_per_tab
+        self.max_total = max_total
+        self.evictions = 0
+        self._tabs: Dict[str, "OrderedDict[str, CachedSelector]"] = {}
+        self._lru: "OrderedDict[Tuple[str, str], None]" = OrderedDict()
+        self._sizes: Dict[str, int] = {}
+        self._total = 0
+
+    # mapping interface, tab id -> {selector -> [elements]}
+    def __getitem__(self, tab_id: str) -> Dict[str, List]:
+        return {selector: list(entry.elements.values())
+                for selector, entry in self._tabs[tab_id].items()}
+
+    def __setitem__(self, tab_id: str, selectors: Dict[str, List]) -> None:
+        self.invalidate(tab_id)
+        for selector, elements in selectors.items():
+            for element in elements:
+                self.add(tab_id, selector, element)
+
+    def __delitem__(self, tab_id: str) -> None:
+        if tab_id not in self._tabs:
+            raise KeyError(tab_id)
+        self.invalidate(tab_id)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._tabs))
+
+    def __len__(self) -> int:
+        return len(self._tabs)
+
+    def __contains__(self, tab_id) -> bool:
+        return tab_id in self._tabs
+
+    def clear(self) -> None:
+        self._tabs = {}
+        self._lru = OrderedDict()
+        self._sizes = {}
+        self._total = 0
+
+    @property
+    def size(self) -> int:
+        """Returns the number of cached elements over all tabs."""
+        return self._total
+
+    def add(self, tab_id: str, selector: str, element, by: Optional[str] = None) -> None:
+        """
+        Cache an element found by a selector, duplicates only refresh its recency.
+
+        Args:
+            tab_id (str): Tab the element lives in.
+            selector (str): The selector that found it.
+            element (WebElement): The element.
+            by (Optional[str]): "css" or "xpath" if the selector can re-resolve the element from the document root.
+        """
+        tab = self._tabs.setdefault(tab_id, OrderedDict())
+        entry = tab.get(selector)
+        if entry is None:
+            entry = tab[selector] = CachedSelector(by)
+        elif by is not None:
+            entry.by = by
+        if element.id not in entry.elements:
+            if len(entry) >= self._limit:
+                self.evictions += 1
+            else:
+                entry.elements[element.id] = element
+                self._resize(tab_id, 1)
+        self._touch(tab_id, selector)
+        self._evict(tab_id)
+
+    def lookup(self, tab_id: str, selector: str) -> Optional[CachedSelector]:
+        """
+        Look up the elements of a selector and mark them as recently used.
+
+        Returns:
+            Optional[CachedSelector]: The cached entry, None if it is not cached.
+        """
+        entry = self._tabs.get(tab_id, {}).get(selector)
+        if entry is not None:
+            self._touch(tab_id, selector)
+        return entry
+
+    def replace(self, tab_id: str, selector: str, elements: List) -> None:
+        """
+        Replace the elements of a cached selector, e.g. after re-resolving stale ones.
+        """
+        entry = self._tabs[tab_id][selector]
+        self._resize(tab_id, -len(entry))
+        entry.replace(elements[:self._limit])
+        self._resize(tab_id, len(entry))
+        self._touch(tab_id, selector)
+        self._evict(tab_id)
+
+    def invalidate(self, tab_id: Optional[str] = None, selector: Optional[str] = None) -> None:
+        """
+        Drop cached elements, of a single selector, of a tab, or everything.
+
+        Args:
+            tab_id (Optional[str]): The tab to invalidate, None drops every tab.
+            selector (Optional[str]): Only drop this selector of the tab.
+        """
+        if tab_id is None:
+            self.clear()
+            return
+        if tab_id not in self._tabs:
+            return
+        selectors = [selector] if selector is not None else list(self._tabs[tab_id])
+        for s in selectors:
+            entry = self._tabs[tab_id].pop(s, None)
+            if entry is not None:
+                self._lru.pop((tab_id, s), None)
+                self._resize(tab_id, -len(entry))
+        if not self._tabs[tab_id]:
+            self._tabs.pop(tab_id)
+            self._sizes.pop(tab_id, None)
+
+    @property
+    def _limit(self) -> int:
+        """ elements a single selector may hold"""
+        return min(self.max_per_tab, self.max_total)
+
+    def _touch(self, tab_id: str, selector: str) -> None:
+        self._lru[(tab_id, selector)] = None
+        self._lru.move_to_end((tab_id, selector))
+
+    def _resize(self, tab_id: str, delta: int) -> None:
+        self._sizes[tab_id] = self._sizes.get(tab_id, 0) + delta
+        self._total += delta
+
+    def _evict(self, tab_id: str) -> None:
+        # never evict the selector that was just used, it is the last one in the lru
+        while self._sizes.get(tab_id, 0) > self.max_per_tab and len(self._tabs[tab_id]) > 1:
+            oldest = next(s for t, s in self._lru if t == tab_id)
+            self.invalidate(tab_id, oldest)
+            self.evictions += 1
+        while self._total > self.max_total and len(self._lru) > 1:
+            t, s = next(iter(self._lru))
+            self.invalidate(t, s)
+            self.evictions += 1
@@ -36,3 +36,23 @@ class PreferencesFileNotFound(FileNotFoundError):
 
 class PreferencesParseError(RuntimeError):
     """ failed to parse prefs.js """
+
+
+class PoolTimeout(TimeoutError):
+    """ no pooled browser became available in time """
+
+
+class PoolClosed(RuntimeError):
+    """ browser pool was already closed """
+
+
+class PoolStartFailed(RuntimeError):
+    """ a pooled browser could not be started, even after retrying """
+
+
+class ExtensionNotCached(FileNotFoundError):
+    """ extension not in the local cache and offline mode forbids downloading it"""
+
+
+class ExtensionChecksumMismatch(ValueError):
+    """ downloaded extension does not match the expected checksum """
@@ -0,0 +1,231 @@
+import re
+from time import monotonic, perf_counter
+from typing import Optional, Dict, List, Union, Pattern, Iterable
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from pombo_correio.scripts import COOKIES_FOR_HOST
+
+try:
+    import lxml.html
+except ImportError:  # optional, pip install lxml cssselect
+    lxml = None
+
+# pages that only render with javascript, served as an empty shell
+JS_MARKERS: List[Pattern] = [re.compile(p, re.I) for p in (
+    r"enable javascript",
+    r"javascript is (required|disabled)",
+    r"<div id=\"(root|app|__next)\">\s*</div>",
+)]
+# most pages carry a <noscript> notice, a marker inside one only counts if nothing else renders
+_NOSCRIPT = re.compile(r"<noscript\b.*?</noscript\s*>", re.I | re.S)
+_INVISIBLE = re.compile(r"<(script|style|template|head)\b.*?</\1\s*>|<!--.*?-->", re.I | re.S)
+_TAG = re.compile(r"<[^>]*>")
+
+
+def needs_javascript(html: str, markers: Iterable[Pattern] = JS_MARKERS) -> bool:
+    """
+    Check if a page fetched over plain HTTP only renders with javascript.
+
+    Markers found inside <noscript> are ignored, unless the page shows no text outside of it.
+
+    Args:
+        html (str): The page source.
+        markers (Iterable[Pattern]): Regexes that flag a javascript-only page.
+
+    Returns:
+        bool: True if the browser is needed.
+    """
+    markers = list(markers)
+    visible = _NOSCRIPT.sub("", html)
+    if any(m.search(visible) for m in markers):
+        return True
+    if visible == html:
+        return False  # no <noscript>
+    text = _TAG.sub("", _INVISIBLE.sub("", visible)).strip()
+    return not text and any(m.search(html) for m in markers)
+
+
+class FetchResult:
+    """
+    A page fetched either over plain HTTP or by the browser.
+
+    Attributes:
+        url (str): The final URL, after redirects.
+        html (str): The page source.
+        status (Optional[int]): HTTP status, None when the browser loaded the page.
+        via (str): "http" or "browser".
+        elapsed (float): Seconds the fetch took, fallback included.
+    """
+
+    def __init__(self, url: str, html: str, via: str, status: Optional[int] = None,
+                 elapsed: float = 0.0) -> None:
+        self.url = url
+        self.html = html
+        self.via = via
+        self.status = status
+        self.elapsed = elapsed
+        self._tree = None
+
+    @property
+    def tree(self):
+        """Returns the lxml document, parsed on first access."""
+        if self._tree is None:
+            if lxml is None:
+                raise ImportError("parsing fetched pages requires lxml, pip install lxml cssselect")
+            self._tree = lxml.html.fromstring(self.html, base_url=self.url)
+            self._tree.make_links_absolute(self.url, handle_failures="ignore")
+        return self._tree
+
+    def select(self, css_selector: str) -> List:
+        """Returns the lxml elements matching a CSS selector, needs cssselect."""
+        return self.tree.cssselect(css_selector)
+
+    def xpath(self, xpath: str) -> List:
+        """Returns the lxml elements (or values) matching an XPath expression."""
+        return self.tree.xpath(xpath)
+
+
+class FetchRoute:
+    """
+    Routing rule deciding how URLs matching a pattern are fetched.
+
+    Attributes:
+        pattern (Pattern): Regex searched in the URL.
+        mode (str): "http" tries plain HTTP first and falls back to the browser, "browser" always uses the browser.
+        ready (List[str]): CSS selectors that must be present in the HTTP response for it to be used.
+        js_markers (List[Pattern]): Regexes that flag a javascript-only page, forcing the browser fallback.
+    """
+
+    def __init__(self, pattern: Union[str, Pattern], mode: str = "http",
+                 ready: Optional[Iterable[str]] = None,
+                 js_markers: Optional[Iterable[Union[str, Pattern]]] = None) -> None:
+        if mode not in ("http", "browser"):
+            raise ValueError(f"unknown fetch mode: {mode}")
+        self.pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+        self.mode = mode
+        self.ready = list(ready or [])
+        self.js_markers = JS_MARKERS if js_markers is None else \
+            [re.compile(m, re.I) if isinstance(m, str) else m for m in js_markers]
+
+    def matches(self, url: str) -> bool:
+        return bool(self.pattern.search(url))
+
+
+class HttpFetcher:
+    """
+    Pooled requests session impersonating a live browser session, same cookies and user agent.
+
+    Attributes:
+        session (requests.Session): Keep-alive session shared by every fetch.
+        timeout (float): Seconds to wait for a response.
+        cookie_ttl (float): Seconds before the browser cookies of a host are copied again.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float = 15, cookie_ttl: float = 5) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.timeout = timeout
+        self.cookie_ttl = cookie_ttl
+        self._synced: Dict[str, float] = {}
+        self._user_agent: Optional[str] = None
+        self._warned = False
+
+    @staticmethod
+    def _domain_matches(host: str, domain: str) -> bool:
+        domain = domain.lstrip(".")
+        return host == domain or host.endswith("." + domain)
+
+    @classmethod
+    def browser_cookies(cls, driver, host: str) -> List[dict]:
+        """
+        Read the cookies the browser would send to a host.
+
+        webdriver get_cookies() only returns the cookies of the focused document, so the
+        cookie store is read from the privileged chrome context. If marionette does not
+        allow it, the focused document cookies are used when they belong to the host.
+
+        Args:
+            driver: The webdriver of the live session.
+            host (str): The host name requests will be sent to.
+
+        Returns:
+            List[dict]: Cookies with name, value, domain, path and secure keys.
+        """
+        try:
+            with driver.context(driver.CONTEXT_CHROME):
+                return driver.execute_script(COOKIES_FOR_HOST, host)
+        except Exception:
+            return [c for c in driver.get_cookies()
+                    if cls._domain_matches(host, c.get("domain") or host)]
+
+    def sync(self, driver, url: str, force: bool = False) -> None:
+        """
+        Copy the cookies of the URL host and the user agent from the browser, at most once per cookie_ttl.
+
+        Args:
+            driver: The webdriver of the live session.
+            url (str): The page about to be fetched.
+            force (bool): Copy even if the last copy is recent.
+        """
+        host = urlsplit(url).hostname or ""
+        synced = self._synced.get(host)
+        if not force and synced is not None and monotonic() - synced < self.cookie_ttl:
+            return
+        if self._user_agent is None:
+            self._user_agent = driver.execute_script("return navigator.userAgent")
+            self.session.headers["User-Agent"] = self._user_agent
+        cookies = self.browser_cookies(driver, host)
+        jar = self.session.cookies
+        for c in list(jar):
+            if self._domain_matches(host, c.domain):
+                jar.clear(c.domain, c.path, c.name)
+        for c in cookies:
+            jar.set(c["name"], c["value"], domain=c.get("domain"),
+                    path=c.get("path", "/"), secure=c.get("secure", False))
+        self._synced[host] = monotonic()
+
+    def invalidate(self) -> None:
+        """Copy cookies and user agent again on the next fetch, e.g. after a new session."""
+        self._synced.clear()
+        self._user_agent = None
+        self.session.cookies.clear()
+
+    def fetch(self, url: str, route: FetchRoute, ready: Optional[Iterable[str]] = None) -> Optional[FetchResult]:
+        """
+        Fetch a page over plain HTTP and check it does not need the browser.
+
+        Args:
+            url (str): The page to fetch.
+            route (FetchRoute): Readiness rules for this URL.
+            ready (Optional[Iterable[str]]): Extra CSS selectors that must be present.
+
+        Returns:
+            Optional[FetchResult]: The page, None if the browser is needed.
+        """
+        start = perf_counter()
+        try:
+            r = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException:
+            return None
+        if r.status_code >= 400 or "html" not in r.headers.get("Content-Type", "html"):
+            return None
+        html = r.text
+        if needs_javascript(html, route.js_markers):
+            return None
+        result = FetchResult(r.url, html, "http", r.status_code)
+        selectors = route.ready + list(ready or [])
+        if selectors:
+            if lxml is None:
+                if not self._warned:
+                    print("WARNING: lxml not installed, can not check readiness selectors, using the browser")
+                    self._warned = True
+                return None
+            if not all(result.select(s) for s in selectors):
+                return None
+        result.elapsed = perf_counter() - start
+        return result
@@ -0,0 +1,235 @@
+"""
+search filters, compiled into the selector whenever possible
+
+    search_css("a", filter="href")                                  # attribute set and not empty
+    search_css("input", filter="required")                          # boolean attribute set
+    search_css("a", filter=["href", "title"])                       # all of them set
+    search_css("a", filter={"rel": "next"})                         # attribute equals
+    search_css("a", filter={"rel": ["next", "prev"]})               # attribute is one of
+    search_css("a", filter={"href": Contains("/radio/")})           # predicates
+    search_css("a", filter={TEXT: Regex(r"^\\d+ FM$")})              # visible text
+
+plain attribute constraints become CSS attribute selectors or XPath predicates, the
+browser then only returns matching elements. Constraints a selector can not express
+(regexes, text, attributes read as live properties like href or value) are evaluated
+in the page, still in the same round trip.
+"""
+import re
+from typing import Optional, Dict, Union, Tuple, Pattern
+
+# filter key matching the visible text of the element instead of an attribute
+TEXT = "::text"
+
+# read through the DOM property by WebElement.get_attribute, the attribute in the markup may differ
+LIVE_ATTRIBUTES = {"href", "src", "action", "value", "checked", "selected", "disabled"}
+
+# boolean attributes as listed by selenium, WebElement.get_attribute returns "true" or None for them
+BOOLEAN_ATTRIBUTES = frozenset({
+    "allowfullscreen", "allowpaymentrequest", "allowusermedia", "async", "autofocus", "autoplay",
+    "checked", "compact", "complete", "controls", "declare", "default", "defaultchecked",
+    "defaultselected", "defer", "disabled", "ended", "formnovalidate", "hidden", "indeterminate",
+    "iscontenteditable", "ismap", "itemscope", "loop", "multiple", "muted", "nohref", "nomodule",
+    "noresize", "noshade", "novalidate", "nowrap", "open", "paused", "playsinline", "pubdate",
+    "readonly", "required", "reversed", "scoped", "seamless", "seeking", "selected", "truespeed",
+    "typemustmatch", "willvalidate"
+})
+
+_NAME = re.compile(r"^[A-Za-z_][\w\-]*$")
+
+
+class Predicate:
+    """
+    Constraint on an attribute value or on the element text.
+
+    Attributes:
+        value (str): The value to compare with.
+        ignore_case (bool): Compare case insensitively.
+    """
+    op: str = ""
+    css_op: Optional[str] = None
+
+    def __init__(self, value: str, ignore_case: bool = False) -> None:
+        self.value = value
+        self.ignore_case = ignore_case
+
+    def css(self, name: str) -> Optional[str]:
+        """Returns the CSS attribute selector, None if CSS can not express it."""
+        if self.css_op is None or not self.value:
+            return None  # [a^=""] never matches in CSS
+        return f"[{name}{self.css_op}{_css_string(self.value)}{' i' if self.ignore_case else ''}]"
+
+    def xpath(self, name: str) -> Optional[str]:
+        """Returns the XPath predicate body, None if XPath 1.0 can not express it."""
+        return None
+
+    def spec(self) -> Dict:
+        """Returns the JSON form evaluated in the page."""
+        return {"op": self.op, "value": self.value, "flags": "i" if self.ignore_case else ""}
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.value!r})"
+
+
+class Contains(Predicate):
+    op = "contains"
+    css_op = "*="
+
+    def xpath(self, name: str) -> Optional[str]:
+        if self.ignore_case or not self.value:
+            return None
+        return f"contains(@{name},{_xpath_string(self.value)})"
+
+
+class StartsWith(Predicate):
+    op = "starts"
+    css_op = "^="
+
+    def xpath(self, name: str) -> Optional[str]:
+        if self.ignore_case or not self.value:
+            return None
+        return f"starts-with(@{name},{_xpath_string(self.value)})"
+
+
+class EndsWith(Predicate):
+    op = "ends"
+    css_op = "$="
+
+    def xpath(self, name: str) -> Optional[str]:
+        if self.ignore_case or not self.value:
+            return None
+        # no ends-with() in XPath 1.0
+        return f"substring(@{name},string-length(@{name})-{len(self.value) - 1})={_xpath_string(self.value)}"
+
+
+class Regex(Predicate):
+    """
+    Javascript regular expression searched in the value, always evaluated in the page.
+    """
+    op = "regex"
+
+    def __init__(self, pattern: Union[str, Pattern], ignore_case: bool = False) -> None:
+        if not isinstance(pattern, str):
+            ignore_case = ignore_case or bool(pattern.flags & re.IGNORECASE)
+            pattern = pattern.pattern
+        super().__init__(pattern, ignore_case)
+
+
+def _css_string(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\a ") + '"'
+
+
+def _xpath_string(value: str) -> str:
+    if '"' not in value:
+        return f'"{value}"'
+    if "'" not in value:
+        return f"'{value}'"
+    return "concat(" + ", '\"', ".join(f'"{part}"' for part in value.split('"')) + ")"
+
+
+def _split_groups(selector: str) -> int:
+    """ number of comma separated groups at the top level of a CSS selector"""
+    depth, quote, groups = 0, None, 1
+    for c in selector:
+        if quote:
+            if c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == "," and depth == 0:
+            groups += 1
+    return groups
+
+
+def _normalize(filter) -> Dict:
+    if isinstance(filter, str):
+        return {filter: None}
+    if isinstance(filter, list):
+        return {name: None for name in filter}
+    if isinstance(filter, dict):
+        for name, want in filter.items():
+            if not isinstance(want, (str, list, Predicate)):
+                raise ValueError(f"invalid filter value for {name}: {want!r}")
+        return filter
+    raise ValueError(f"invalid filter: {filter!r}")
+
+
+def _compile_one(by: str, name: str, want) -> Optional[str]:
+    """ selector piece for one constraint, None if it must run in the page"""
+    if name == TEXT or name in LIVE_ATTRIBUTES or not _NAME.match(name):
+        return None
+    if name.lower() in BOOLEAN_ATTRIBUTES:
+        if want is not None:
+            return None  # compared with "true" like get_attribute does, in the page
+        # <input required> is set with an empty value
+        return f"[{name}]" if by == "css" else (f"@{name}" if name == name.lower() else None)
+    if by == "css":
+        if want is None:
+            return f"[{name}]:not([{name}=\"\"])"
+        if isinstance(want, str):
+            return f"[{name}={_css_string(want)}]"
+        if isinstance(want, list):
+            if not want:
+                return None
+            return ":is(" + ",".join(f"[{name}={_css_string(v)}]" for v in want) + ")"
+        return want.css(name)
+    if name != name.lower():
+        return None  # html attribute names are lowercased by the parser, getAttribute copes with it
+    if want is None:
+        return f"@{name}!=\"\""
+    if isinstance(want, str):
+        return f"@{name}={_xpath_string(want)}"
+    if isinstance(want, list):
+        if not want:
+            return None
+        return " or ".join(f"@{name}={_xpath_string(v)}" for v in want)
+    return want.xpath(name)
+
+
+def _spec(want) -> Dict:
+    if want is None:
+        return {"op": "present"}
+    if isinstance(want, str):
+        return {"op": "eq", "value": want}
+    if isinstance(want, list):
+        return {"op": "in", "value": want}
+    return want.spec()
+
+
+def compile_filter(by: str, selector: str, filter) -> Tuple[str, Optional[Dict[str, Dict]]]:
+    """
+    Fold a search filter into the selector.
+
+    Args:
+        by (str): "css" or "xpath".
+        selector (str): The CSS selector or XPath expression.
+        filter (Union[None, str, list, dict]): The search filter, see the module docstring.
+
+    Returns:
+        Tuple[str, Optional[Dict[str, Dict]]]: The narrowed selector and the constraints left
+            to evaluate in the page (name -> {"op", "value", "flags"}), None if there are none.
+
+    Raises:
+        ValueError: If the filter is malformed.
+    """
+    if not filter:
+        return selector, None
+    pieces, residual = [], {}
+    for name, want in _normalize(filter).items():
+        piece = _compile_one(by, name, want)
+        if piece is None:
+            residual[name] = _spec(want)
+        else:
+            pieces.append(piece)
+    if pieces:
+        if by == "css":
+            if _split_groups(selector) > 1:
+                selector = f":is({selector})"
+            selector += "".join(pieces)
+        else:
+            # a filter expression keeps unions and relative paths intact
+            selector = f"({selector})" + "".join(f"[{p}]" for p in pieces)
+    return selector, residual or None
@@ -0,0 +1,271 @@
+import os
+import threading
+from bisect import bisect_left
+from functools import wraps
+from time import perf_counter, monotonic
+from typing import Optional, Dict, Callable, List
+
+try:
+    import psutil
+except ImportError:  # optional, /proc is read instead on linux
+    psutil = None
+
+# histogram bucket upper bounds, in seconds
+BUCKETS: List[float] = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                        0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float("inf")]
+
+
+class Histogram:
+    """
+    Fixed bucket latency histogram, constant memory and O(log buckets) per observation.
+
+    Attributes:
+        count (int): Number of observations.
+        total (float): Sum of the observed seconds.
+        min (Optional[float]): Fastest observation.
+        max (Optional[float]): Slowest observation.
+        buckets (List[int]): Observations per bucket, see BUCKETS for the upper bounds.
+    """
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self.buckets: List[int] = [0] * len(BUCKETS)
+
+    def observe(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if self.min is None or seconds < self.min:
+            self.min = seconds
+        if self.max is None or seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect_left(BUCKETS, seconds)] += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Estimate a percentile, the upper bound of the bucket it falls in (capped by max).
+
+        Args:
+            q (float): Percentile between 0 and 100.
+
+        Returns:
+            Optional[float]: The estimate in seconds, None without observations.
+        """
+        if not self.count:
+            return None
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def snapshot(self) -> Dict:
+        return {"count": self.count,
+                "total": self.total,
+                "mean": self.total / self.count if self.count else None,
+                "min": self.min,
+                "max": self.max,
+                "p50": self.percentile(50),
+                "p90": self.percentile(90),
+                "p99": self.percentile(99)}
+
+
+class Metrics:
+    """
+    Latency histograms grouped by category, "command" for webdriver round trips,
+    "method" for browser methods and "handler" for event handlers.
+
+    Attributes:
+        histograms (Dict[str, Dict[str, Histogram]]): category -> name -> histogram.
+        interval (Optional[float]): Seconds between METRICS events, None disables them.
+        started (float): monotonic() time the metrics were created or last reset.
+    """
+
+    def __init__(self, interval: Optional[float] = None) -> None:
+        self.interval = interval
+        self.histograms: Dict[str, Dict[str, Histogram]] = {}
+        self.started = monotonic()
+        self._last_emit = self.started
+        self._lock = threading.Lock()
+
+    def observe(self, category: str, name: str, seconds: float) -> None:
+        with self._lock:
+            group = self.histograms.setdefault(category, {})
+            hist = group.get(name)
+            if hist is None:
+                hist = group[name] = Histogram()
+            hist.observe(seconds)
+
+    def due(self) -> bool:
+        """
+        Check if a periodic METRICS event should be emitted, and start a new period if so.
+
+        Returns:
+            bool: True once per interval.
+        """
+        if self.interval is None:
+            return False
+        now = monotonic()
+        if now - self._last_emit < self.interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def snapshot(self) -> Dict:
+        """
+        Returns:
+            Dict: {"uptime": seconds, category: {name: histogram summary}}.
+        """
+        with self._lock:
+            snap = {category: {name: hist.snapshot() for name, hist in group.items()}
+                    for category, group in self.histograms.items()}
+        snap["uptime"] = monotonic() - self.started
+        return snap
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms = {}
+            self.started = monotonic()
+
+
+def instrument_driver(driver, metrics: Metrics) -> None:
+    """
+    Time every webdriver command, element commands included, they go through the same driver.execute().
+
+    Args:
+        driver: The webdriver instance.
+        metrics (Metrics): Where to record "command" latencies.
+    """
+    if getattr(driver.execute, "_pc_metrics", None) is metrics:
+        return
+    execute = getattr(driver.execute, "__wrapped__", driver.execute)
+
+    @wraps(execute)
+    def timed_execute(command, params=None):
+        start = perf_counter()
+        try:
+            return execute(command, params)
+        finally:
+            metrics.observe("command", command, perf_counter() - start)
+
+    timed_execute._pc_metrics = metrics
+    driver.execute = timed_execute
+
+
+def uninstrument_driver(driver) -> None:
+    """Restore the original driver.execute()."""
+    if "execute" in vars(driver) and hasattr(driver.execute, "_pc_metrics"):
+        del driver.execute
+
+
+def timed(method: Callable) -> Callable:
+    """
+    Record the latency of a browser method when its metrics are enabled, near free otherwise.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        metrics = self.metrics
+        if metrics is None:
+            return method(self, *args, **kwargs)
+        start = perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            metrics.observe("method", method.__name__, perf_counter() - start)
+            if metrics.due():
+                self.emit_metrics()
+
+    return wrapper
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # the command name may contain spaces, fields resume after its closing parenthesis
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue  # exited meanwhile
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def process_tree(pid: int) -> List[int]:
+    """
+    A process and all its descendants, e.g. geckodriver, Firefox and its content processes.
+
+    Args:
+        pid (int): The root process.
+
+    Returns:
+        List[int]: The pids, root first, empty if the process is gone. Only the root
+            if neither psutil nor /proc is available to find the descendants.
+    """
+    if psutil is not None:
+        try:
+            return [pid] + [child.pid for child in psutil.Process(pid).children(recursive=True)]
+        except psutil.Error:
+            return []
+    if not os.path.isdir("/proc"):
+        return [pid]
+    if not os.path.isdir(f"/proc/{pid}"):
+        return []
+    children = _proc_children()
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        stack.extend(children.get(p, []))
+    return tree
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """
+    Resident memory of a process and all its descendants, e.g. Firefox and its content processes.
+
+    Pages shared between the processes are counted once per process, compare totals
+    measured the same way rather than reading them as exact memory use.
+
+    Args:
+        pid (int): The root process.
+
+    Returns:
+        Optional[int]: Bytes, None if neither psutil nor /proc is available or the process is gone.
+    """
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            total = root.memory_info().rss
+            for child in root.children(recursive=True):
+                try:
+                    total += child.memory_info().rss
+                except psutil.Error:
+                    pass  # exited meanwhile
+            return total
+        except psutil.Error:
+            return None
+    if not os.path.isdir(f"/proc/{pid}"):
+        return None
+    children = _proc_children()
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        total += _proc_rss(p)
+        stack.extend(children.get(p, []))
+    return total
@@ -0,0 +1,237 @@
+import threading
+from contextlib import contextmanager
+from queue import Queue, Empty
+from time import sleep, monotonic
+from typing import Callable, Optional, List, Iterator
+
+from pombo_correio import _AbstractBrowser
+from pombo_correio.exceptions import PoolTimeout, PoolClosed, PoolStartFailed
+
+# queued in place of a browser, wakes up acquire() once the pool is closed
+_CLOSED = object()
+
+
+class _StartFailure:
+    """ queued in place of a browser that could not be started"""
+
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+
+class BrowserPool:
+    """
+    A pool of warm browser sessions that are leased out and reset instead of being quit.
+
+    Starting a browser (driver spawn, extension install, homepage load) costs seconds,
+    the pool pays that price up front and in the background when a browser has to be replaced.
+
+    Attributes:
+        factory (Callable[[], _AbstractBrowser]): Builds a new, not yet started, browser.
+        size (int): Number of browsers kept warm.
+        max_start_attempts (int): How many times to retry starting a browser before giving up.
+        last_start_error (Optional[Exception]): Why the last browser that gave up could not start.
+    """
+
+    def __init__(self, factory: Callable[[], _AbstractBrowser], size: int = 2,
+                 max_start_attempts: int = 3) -> None:
+        """
+        Initialize the pool, browsers are only started on start() or when entering the context manager.
+
+        Args:
+            factory (Callable[[], _AbstractBrowser]): Callable returning a new browser instance.
+            size (int): Number of browsers to keep warm. Defaults to 2.
+            max_start_attempts (int): Retries when a browser fails to start. Defaults to 3.
+        """
+        self.factory = factory
+        self.size = size
+        self.max_start_attempts = max_start_attempts
+        self._idle: Queue = Queue()
+        self._browsers: List[_AbstractBrowser] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.last_start_error: Optional[Exception] = None
+
+    @property
+    def browsers(self) -> List[_AbstractBrowser]:
+        """Returns all browsers currently owned by the pool, leased or idle."""
+        with self._lock:
+            return list(self._browsers)
+
+    @property
+    def idle(self) -> int:
+        """Returns the number of browsers ready to be leased."""
+        return self._idle.qsize()
+
+    def start(self, wait: bool = True) -> None:
+        """
+        Start warming up the pool browsers.
+
+        Args:
+            wait (bool): Block until every browser finished starting. Defaults to True.
+        """
+        if self._closed:
+            raise PoolClosed
+        threads = [self._spawn() for _ in range(self.size)]
+        if wait:
+            for t in threads:
+                t.join()
+
+    def _spawn(self) -> threading.Thread:
+        t = threading.Thread(target=self._warm_up, daemon=True)
+        t.start()
+        return t
+
+    def _warm_up(self) -> None:
+        error = None
+        for attempt in range(self.max_start_attempts):
+            if self._closed:
+                return
+            browser = None
+            try:
+                browser = self.factory()
+                browser.new_session()
+                break
+            except Exception as e:
+                print("ERROR: failed to start pooled browser")
+                print(str(e))
+                error = e
+                if browser is not None:
+                    try:
+                        browser.stop()  # no half started firefox/geckodriver left behind
+                    except Exception:
+                        pass
+                if attempt + 1 < self.max_start_attempts:
+                    sleep(attempt + 1)
+        else:
+            # let a waiting acquire() raise instead of hanging, it starts a replacement
+            self.last_start_error = error
+            self._idle.put(_StartFailure(error))
+            return
+
+        with self._lock:
+            if self._closed:
+                browser.stop()
+                return
+            self._browsers.append(browser)
+        self._idle.put(browser)
+
+    def _discard(self, browser: _AbstractBrowser) -> None:
+        """ drop an unhealthy browser and start a replacement in the background"""
+        with self._lock:
+            if browser in self._browsers:
+                self._browsers.remove(browser)
+            closed = self._closed
+
+        def _stop():
+            try:
+                browser.stop()
+            except Exception:
+                pass  # already dead
+
+        threading.Thread(target=_stop, daemon=True).start()
+        if not closed:
+            self._spawn()
+
+    def acquire(self, timeout: Optional[float] = None) -> _AbstractBrowser:
+        """
+        Take a healthy browser out of the pool.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a free browser, None waits forever.
+
+        Returns:
+            _AbstractBrowser: A running browser, must be given back with release().
+
+        Raises:
+            PoolTimeout: If no browser became available in time.
+            PoolClosed: If the pool was closed.
+            PoolStartFailed: If a browser could not be started, a replacement is started in the background.
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+        while True:
+            if self._closed:
+                raise PoolClosed
+            remaining = None if deadline is None else max(deadline - monotonic(), 0)
+            try:
+                browser = self._idle.get(timeout=remaining)
+            except Empty:
+                raise PoolTimeout
+            if browser is _CLOSED:
+                self._idle.put(_CLOSED)  # wake up the next waiting acquire() too
+                raise PoolClosed
+            if isinstance(browser, _StartFailure):
+                if not self._closed:
+                    self._spawn()
+                raise PoolStartFailed(str(browser.error)) from browser.error
+            if browser.is_alive():
+                return browser
+            self._discard(browser)
+
+    def release(self, browser: _AbstractBrowser) -> None:
+        """
+        Give a leased browser back, it is reset for the next lease or replaced if it went unhealthy.
+
+        Args:
+            browser (_AbstractBrowser): A browser previously returned by acquire().
+        """
+        if self._closed:
+            with self._lock:
+                if browser in self._browsers:
+                    self._browsers.remove(browser)
+            browser.stop()
+            return
+        try:
+            browser.reset()
+        except Exception as e:
+            print("ERROR: failed to reset pooled browser, replacing it")
+            print(str(e))
+            self._discard(browser)
+            return
+        self._idle.put(browser)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[_AbstractBrowser]:
+        """
+        Context manager that acquires a browser and releases it on exit.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a free browser, None waits forever.
+
+        Yields:
+            _AbstractBrowser: A running browser.
+        """
+        browser = self.acquire(timeout)
+        try:
+            yield browser
+        finally:
+            self.release(browser)
+
+    def close(self) -> None:
+        """
+        Stop every idle browser, leased browsers are stopped when released.
+        """
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except Empty:
+                break
+            if browser is _CLOSED or isinstance(browser, _StartFailure):
+                continue
+            with self._lock:
+                if browser in self._browsers:
+                    self._browsers.remove(browser)
+            try:
+                browser.stop()
+            except Exception:
+                pass
+        self._idle.put(_CLOSED)
+
+    # context manager
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
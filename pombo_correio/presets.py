@@ -0,0 +1,92 @@
+"""
+curated Firefox preference sets, enable one with FirefoxBrowser(preset="dense")
+
+preferences from a prefs.js file are applied on top, they win over the preset
+"""
+from typing import Optional, Dict, Any
+
+# as many browsers per host as RAM allows, for headless crawling
+DENSE: Dict[str, Any] = {
+    # one content process, no process per site, no spare process waiting for the next tab
+    "dom.ipc.processCount": 1,
+    "dom.ipc.processCount.webIsolated": 1,
+    "fission.autostart": False,
+    "dom.ipc.processPrelaunch.enabled": False,
+    # small caches, no back/forward cache
+    "browser.cache.disk.enable": False,
+    "browser.cache.memory.capacity": 16384,  # KiB
+    "image.mem.surfacecache.max_size_kb": 65536,
+    "browser.sessionhistory.max_total_viewers": 0,
+    # short session history (back() still works one page deep), no session restore
+    "browser.sessionhistory.max_entries": 2,
+    "browser.sessionstore.max_tabs_undo": 0,
+    "browser.sessionstore.max_windows_undo": 0,
+    "browser.sessionstore.resume_from_crash": False,
+    # no prefetching or speculative connections
+    "network.prefetch-next": False,
+    "network.dns.disablePrefetch": True,
+    "network.predictor.enabled": False,
+    "network.http.speculative-parallel-limit": 0,
+    "browser.urlbar.speculativeConnect.enabled": False,
+    "browser.places.speculativeConnect.enabled": False,
+    # no telemetry or studies
+    "toolkit.telemetry.enabled": False,
+    "toolkit.telemetry.unified": False,
+    "toolkit.telemetry.archive.enabled": False,
+    "datareporting.healthreport.uploadEnabled": False,
+    "datareporting.policy.dataSubmissionEnabled": False,
+    "app.shield.optoutstudies.enabled": False,
+    "app.normandy.enabled": False,
+    "browser.ping-centre.telemetry": False,
+    "browser.newtabpage.activity-stream.feeds.telemetry": False,
+    "browser.crashReports.unsubmittedCheck.autoSubmit2": False,
+    # no safe browsing lists to download and keep in memory
+    "browser.safebrowsing.malware.enabled": False,
+    "browser.safebrowsing.phishing.enabled": False,
+    "browser.safebrowsing.downloads.enabled": False,
+    "browser.safebrowsing.blockedURIs.enabled": False,
+    # no update checks
+    "app.update.auto": False,
+    "app.update.checkInstallTime": False,
+    "extensions.update.enabled": False,
+    "extensions.update.autoUpdateDefault": False,
+    "extensions.getAddons.cache.enabled": False,
+    "browser.search.update": False,
+    # fewer frames and animations
+    "layout.frame_rate": 15,
+    "toolkit.cosmeticAnimations.enabled": False,
+    "ui.prefersReducedMotion": 1,
+    "image.animation_mode": "once",
+    "general.smoothScroll": False,
+    "media.autoplay.default": 5,  # block audible and inaudible autoplay
+    # no first run pages
+    "browser.shell.checkDefaultBrowser": False,
+    "browser.startup.page": 0,
+    "browser.newtabpage.enabled": False,
+    "browser.aboutwelcome.enabled": False,
+}
+
+PRESETS: Dict[str, Dict[str, Any]] = {
+    "dense": DENSE,
+}
+
+
+def preset_preferences(preset: Optional[str], preferences: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Combine a preset with user preferences.
+
+    Args:
+        preset (Optional[str]): A name from PRESETS, None for no preset.
+        preferences (Optional[Dict[str, Any]]): Preferences applied on top, e.g. parsed from prefs.js.
+
+    Returns:
+        Dict[str, Any]: The merged preferences, user preferences win.
+
+    Raises:
+        ValueError: If the preset name is unknown.
+    """
+    if preset is not None and preset not in PRESETS:
+        raise ValueError(f"unknown preset: {preset}")
+    merged = dict(PRESETS[preset]) if preset else {}
+    merged.update(preferences or {})
+    return merged
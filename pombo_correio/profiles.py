@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+from os.path import join, exists
+from tempfile import gettempdir
+from time import sleep
+from typing import Optional, Dict, Callable, List, Any
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
+
+class ProfileSnapshot:
+    """
+    A "golden" Firefox profile, built once with preferences applied and extensions installed,
+    that new sessions launch from a copy of instead of initialising a profile from scratch.
+
+    Snapshots live in a folder named after a fingerprint of the preferences and extension files,
+    changing either one makes the browser build (and use) a new snapshot.
+
+    Attributes:
+        preferences (Dict[str, Any]): Firefox preferences baked into the profile.
+        extensions_folder (Optional[str]): Folder with the extensions to install permanently.
+        root (str): Directory holding all snapshots.
+        settle_time (float): Seconds the build session is left running so first-run work completes.
+    """
+
+    READY: str = ".ready"
+    # files Firefox keeps for a running instance or can rebuild cheaply
+    IGNORE = ("lock", ".parentlock", "parent.lock", "cache2", "startupCache", READY)
+    _lock = threading.Lock()
+
+    def __init__(self, preferences: Dict[str, Any], extensions_folder: Optional[str] = None,
+                 root: Optional[str] = None, settle_time: float = 2) -> None:
+        """
+        Initialize the snapshot description, nothing is built until build() is called.
+
+        Args:
+            preferences (Dict[str, Any]): Firefox preferences to bake in.
+            extensions_folder (Optional[str]): Folder with the extensions to bake in.
+            root (Optional[str]): Directory holding the snapshots. Defaults to a temp directory.
+            settle_time (float): Seconds to let the build session finish its first-run work.
+        """
+        self.preferences = preferences
+        self.extensions_folder = extensions_folder
+        self.root = root or join(gettempdir(), "pombo_correio_profiles")
+        self.settle_time = settle_time
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def extensions(self) -> List[str]:
+        """Returns the extension files that will be baked in."""
+        if not self.extensions_folder or not exists(self.extensions_folder):
+            return []
+        return [e for e in sorted(os.listdir(self.extensions_folder))
+                if not e.startswith(".")]
+
+    @property
+    def fingerprint(self) -> str:
+        """Returns a hash of the preferences and extension files, it changes when either does."""
+        digest = hashlib.sha256(json.dumps(self.preferences, sort_keys=True).encode())
+        for ext in self.extensions:
+            st = os.stat(join(self.extensions_folder, ext))
+            digest.update(f"{ext}:{st.st_size}:{st.st_mtime}".encode())
+        return digest.hexdigest()[:16]
+
+    @property
+    def path(self) -> str:
+        """Returns the directory of the snapshot matching the current fingerprint."""
+        return join(self.root, self.fingerprint)
+
+    @property
+    def is_built(self) -> bool:
+        return exists(join(self.path, self.READY))
+
+    @property
+    def baked_extensions(self) -> List[str]:
+        """Returns the extensions that were installed permanently in the snapshot."""
+        if not self.is_built:
+            return []
+        with open(join(self.path, self.READY)) as f:
+            return json.load(f).get("extensions", [])
+
+    @contextmanager
+    def _locked(self):
+        """ serialize builds between threads and processes sharing the root folder"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(join(self.root, ".lock"), "w") as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _write_user_js(self, profile_dir: str) -> None:
+        with open(join(profile_dir, "user.js"), "a") as f:
+            for k, v in self.preferences.items():
+                f.write(f'user_pref("{k}", {json.dumps(v)});\n')
+
+    def build(self, launch: Callable[[str], Any]) -> str:
+        """
+        Build the snapshot if it does not exist yet.
+
+        Args:
+            launch (Callable[[str], Any]): Starts a webdriver using the given profile directory.
+
+        Returns:
+            str: The snapshot directory.
+        """
+        with self._locked():
+            if self.is_built:
+                return self.path
+            tmp = tempfile.mkdtemp(dir=self.root, prefix=".build-")
+            try:
+                self._write_user_js(tmp)
+                baked = []
+                driver = launch(tmp)
+                try:
+                    for ext in self.extensions:
+                        try:
+                            driver.install_addon(join(self.extensions_folder, ext), temporary=False)
+                            baked.append(ext)
+                        except Exception as e:
+                            # unsigned extensions can only be installed temporarily, per session
+                            print(f"WARNING: could not bake extension {ext} into profile snapshot")
+                            print(str(e))
+                    driver.get("about:blank")
+                    sleep(self.settle_time)
+                finally:
+                    driver.quit()
+            except BaseException:
+                # a failed launch must not leave a half built profile behind
+                shutil.rmtree(tmp, ignore_errors=True)
+                raise
+
+            path = self.path
+            if exists(path):
+                shutil.rmtree(path)  # leftover from an interrupted build
+            os.replace(tmp, path)
+            with open(join(path, self.READY), "w") as f:
+                json.dump({"extensions": baked}, f)
+            return path
+
+    def clone(self) -> str:
+        """
+        Copy the snapshot into a new throwaway profile directory.
+
+        Returns:
+            str: The new profile directory, the caller removes it when done.
+        """
+        dst = tempfile.mkdtemp(prefix="pombo_correio_profile_")
+        shutil.copytree(self.path, dst, dirs_exist_ok=True,
+                        ignore=shutil.ignore_patterns(*self.IGNORE))
+        return dst
+
+    def invalidate(self) -> None:
+        """
+        Delete the snapshot matching the current fingerprint, the next session rebuilds it.
+        """
+        with self._locked():
+            if exists(self.path):
+                shutil.rmtree(self.path)
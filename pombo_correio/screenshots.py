@@ -0,0 +1,189 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from io import BytesIO
+from itertools import count
+from os.path import join
+from time import time
+from typing import Optional, Callable, List
+
+try:
+    from PIL import Image
+except ImportError:  # optional, pip install Pillow
+    Image = None
+
+FORMATS = ("png", "jpeg", "webp")
+
+
+def encode(png: bytes, format: str, quality: int) -> bytes:
+    """
+    Re-encode a PNG capture, needs Pillow for anything but PNG.
+
+    Args:
+        png (bytes): The PNG the browser returned.
+        format (str): "png", "jpeg" or "webp".
+        quality (int): 1-100, ignored for PNG.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    if format == "png":
+        return png
+    if Image is None:
+        raise ImportError(f"encoding screenshots as {format} requires Pillow, pip install Pillow")
+    img = Image.open(BytesIO(png))
+    if format == "jpeg" and img.mode != "RGB":
+        img = img.convert("RGB")  # no alpha channel in jpeg
+    out = BytesIO()
+    img.save(out, format.upper(), quality=quality)
+    return out.getvalue()
+
+
+class Screenshot:
+    """
+    A capture held in memory, encoding may still be running in the background.
+
+    Attributes:
+        png (bytes): The PNG the browser returned.
+        format (str): Format of data, "png", "jpeg" or "webp".
+        quality (Optional[int]): Encoder quality, None for PNG.
+        url (Optional[str]): Page the capture was taken of.
+        tab_id (Optional[str]): Tab the capture was taken of.
+        selector (Optional[str]): Element the capture was cropped to, None for the viewport.
+        captured (float): Unix time of the capture.
+    """
+
+    def __init__(self, png: bytes, format: str = "png", quality: Optional[int] = None,
+                 url: Optional[str] = None, tab_id: Optional[str] = None,
+                 selector: Optional[str] = None) -> None:
+        self.png = png
+        self.format = format
+        self.quality = quality
+        self.url = url
+        self.tab_id = tab_id
+        self.selector = selector
+        self.captured = time()
+        self._future: Optional[Future] = None
+
+    @property
+    def data(self) -> bytes:
+        """Returns the encoded image, waiting for the encoder if needed."""
+        if self._future is None:
+            return self.png
+        return self._future.result()
+
+    def done(self) -> bool:
+        """Returns True once data is available without waiting."""
+        return self._future is None or self._future.done()
+
+    def add_done_callback(self, fn: Callable[["Screenshot"], None]) -> None:
+        """
+        Call fn with this screenshot once it is encoded, right away if it already is.
+
+        Args:
+            fn (Callable[[Screenshot], None]): Runs on the encoder thread, or the calling one if encoded.
+        """
+        if self._future is None:
+            fn(self)
+        else:
+            self._future.add_done_callback(lambda _: fn(self))
+
+    @property
+    def extension(self) -> str:
+        return "jpg" if self.format == "jpeg" else self.format
+
+    def save(self, path: str) -> str:
+        """
+        Write the encoded image to a file.
+
+        Args:
+            path (str): Destination file.
+
+        Returns:
+            str: The path written.
+        """
+        with open(path, "wb") as f:
+            f.write(self.data)
+        return path
+
+
+class ScreenshotEncoder:
+    """
+    Thread pool re-encoding screenshots, Pillow releases the GIL while encoding
+    so captures keep flowing while earlier ones are compressed.
+
+    Attributes:
+        workers (int): Encoder threads.
+    """
+
+    _default: Optional["ScreenshotEncoder"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, workers: int = 2) -> None:
+        self.workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pombo_correio-encoder")
+
+    @classmethod
+    def default(cls) -> "ScreenshotEncoder":
+        """Returns the encoder shared by every browser in the process."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls()
+            return cls._default
+
+    def submit(self, shot: Screenshot) -> Screenshot:
+        """
+        Encode a capture in the background, shot.data waits for it.
+
+        Args:
+            shot (Screenshot): A capture with a format other than PNG.
+
+        Returns:
+            Screenshot: The same capture.
+        """
+        if shot.format != "png":
+            if Image is None:  # fail now rather than on the encoder thread
+                raise ImportError(f"encoding screenshots as {shot.format} requires Pillow, pip install Pillow")
+            shot._future = self._pool.submit(encode, shot.png, shot.format, shot.quality)
+        return shot
+
+    def close(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+# sinks, called with every encoded Screenshot
+class DirectorySink:
+    """
+    Write every capture to a directory, file names are unique per sink and never overwritten.
+
+    Attributes:
+        path (str): Destination directory.
+        prefix (str): File name prefix.
+        saved (List[str]): Paths written so far.
+    """
+
+    def __init__(self, path: str, prefix: str = "screenshot") -> None:
+        self.path = path
+        self.prefix = f"{prefix}_{os.getpid()}_{id(self):x}"
+        self.saved: List[str] = []
+        self._counter = count()
+        os.makedirs(path, exist_ok=True)
+
+    def __call__(self, shot: Screenshot) -> None:
+        path = join(self.path, f"{self.prefix}_{next(self._counter):06d}.{shot.extension}")
+        self.saved.append(shot.save(path))
+
+
+class QueueSink:
+    """
+    Put every capture in a queue, e.g. a queue.Queue consumed by an uploader thread.
+
+    Attributes:
+        queue: Anything with a put() method.
+    """
+
+    def __init__(self, queue) -> None:
+        self.queue = queue
+
+    def __call__(self, shot: Screenshot) -> None:
+        self.queue.put(shot)
@@ -0,0 +1,285 @@
+"""
+javascript snippets executed in the page through the webdriver
+
+keeping work in the page means a single webdriver round trip per call
+instead of one per element/attribute
+"""
+import json
+
+from pombo_correio.filters import BOOLEAN_ATTRIBUTES
+
+# shared helpers, prepended to the scripts below
+_HELPERS = """
+var __PC_BOOLEAN = """ + json.dumps({name: True for name in sorted(BOOLEAN_ATTRIBUTES)}) + """;
+function __pc_attr(el, name) {
+    // mimic WebElement.get_attribute, urls are returned resolved and form state is read live
+    if ((name === "href" || name === "src" || name === "action") && el[name]) {
+        return String(el[name]);
+    }
+    if (name === "value" && typeof el.value === "string") {
+        return el.value;
+    }
+    if ((name === "checked" || name === "selected" || name === "disabled") && typeof el[name] === "boolean") {
+        return el[name] ? "true" : null;
+    }
+    if (__PC_BOOLEAN[name.toLowerCase()]) {
+        return el.hasAttribute(name) || el[name] === true ? "true" : null;
+    }
+    return el.getAttribute(name);
+}
+function __pc_text(el) {
+    var t = el.innerText !== undefined ? el.innerText : el.textContent;
+    return (t || "").trim();
+}
+function __pc_find(by, selector, root) {
+    root = root || document;
+    if (by === "xpath") {
+        var snap = document.evaluate(selector, root, null,
+            XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var out = [];
+        for (var i = 0; i < snap.snapshotLength; i++) {
+            var node = snap.snapshotItem(i);
+            if (node.nodeType === 1) {
+                out.push(node);
+            }
+        }
+        return out;
+    }
+    return Array.prototype.slice.call(root.querySelectorAll(selector));
+}
+function __pc_visible(el) {
+    // close to WebElement.is_displayed, rendered with a box and not hidden
+    if (!el.isConnected || !(el.offsetWidth || el.offsetHeight || el.getClientRects().length)) {
+        return false;
+    }
+    var style = window.getComputedStyle(el);
+    return style.visibility !== "hidden" && style.visibility !== "collapse" && style.opacity !== "0";
+}
+function __pc_match(v, rule) {
+    var op = rule.op, want = rule.value;
+    if (op === "present") {
+        return !!v;
+    }
+    if (v === null || v === undefined) {
+        return false;
+    }
+    if (op === "eq") {
+        return v === want;
+    }
+    if (op === "in") {
+        return want.indexOf(v) >= 0;
+    }
+    if (op === "regex") {
+        rule.re = rule.re || new RegExp(want, rule.flags);
+        return rule.re.test(v);
+    }
+    if (rule.flags === "i") {
+        v = v.toLowerCase();
+        want = want.toLowerCase();
+    }
+    if (op === "contains") {
+        return v.indexOf(want) >= 0;
+    }
+    if (op === "starts") {
+        return v.slice(0, want.length) === want;
+    }
+    if (op === "ends") {
+        return v.length >= want.length && v.slice(v.length - want.length) === want;
+    }
+    return false;
+}
+function __pc_keep(el, filter) {
+    // filter: what filters.compile_filter could not fold into the selector, name -> rule
+    for (var k in filter || {}) {
+        var v = k === "::text" ? __pc_text(el) : __pc_attr(el, k);
+        if (!__pc_match(v, filter[k])) {
+            return false;
+        }
+    }
+    return true;
+}
+"""
+
+# arguments: by ("css"/"xpath"), selector, root element or null,
+#            list of attribute names, residual filter from filters.compile_filter or null
+# returns: [{"element", "text", "href", "attributes"}]
+BULK_SEARCH = _HELPERS + """
+var by = arguments[0], selector = arguments[1], root = arguments[2],
+    attrs = arguments[3] || [], filter = arguments[4];
+return __pc_find(by, selector, root).filter(function (el) {
+    return __pc_keep(el, filter);
+}).map(function (el) {
+    var values = {};
+    attrs.forEach(function (a) { values[a] = __pc_attr(el, a); });
+    return {
+        "element": el,
+        "text": __pc_text(el),
+        "href": __pc_attr(el, "href") || __pc_attr(el, "src"),
+        "attributes": values
+    };
+});
+"""
+
+# arguments: by ("css"/"xpath"), selector, root element or null,
+#            residual filter from filters.compile_filter
+# returns: [element]
+FIND_FILTERED = _HELPERS + """
+var filter = arguments[3];
+return __pc_find(arguments[0], arguments[1], arguments[2]).filter(function (el) {
+    return __pc_keep(el, filter);
+});
+"""
+
+# async, arguments: list of [by, selector], mode ("any"/"all"), timeout in ms
+# returns: list with the first visible element per selector (null if none),
+#          null on timeout, "unload" if the page navigated away while waiting
+WAIT_VISIBLE = _HELPERS + """
+var specs = arguments[0], mode = arguments[1], timeout = arguments[2],
+    done = arguments[arguments.length - 1], finished = false, observer, timer, poll;
+function firstVisible(spec) {
+    var els = __pc_find(spec[0], spec[1], null);
+    for (var i = 0; i < els.length; i++) {
+        if (__pc_visible(els[i])) {
+            return els[i];
+        }
+    }
+    return null;
+}
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearTimeout(timer);
+    clearInterval(poll);
+    window.removeEventListener("pagehide", onUnload);
+    done(result);
+}
+function onUnload() {
+    finish("unload");
+}
+function check() {
+    var found = specs.map(firstVisible);
+    if (mode === "all" ? found.every(Boolean) : found.some(Boolean)) {
+        finish(found);
+    }
+}
+check();
+if (!finished) {
+    observer = new MutationObserver(check);
+    observer.observe(document, {childList: true, subtree: true, attributes: true});
+    window.addEventListener("pagehide", onUnload);
+    // style sheets and layout can reveal nodes without any mutation
+    poll = setInterval(check, 250);
+    timer = setTimeout(function () { finish(null); }, timeout);
+}
+"""
+
+# async, arguments: container by, container selector,
+#        list of [name, by, selector or null, attribute, all], minimum records, timeout in ms
+# returns: [{name: value}], "unload" if the page navigated away while waiting
+EXTRACT_RECORDS = _HELPERS + """
+var by = arguments[0], selector = arguments[1], fields = arguments[2],
+    minimum = arguments[3], timeout = arguments[4],
+    done = arguments[arguments.length - 1], finished = false, observer, timer;
+function value(el, attr) {
+    if (attr === "text") {
+        return __pc_text(el);
+    }
+    if (attr === "html") {
+        return el.innerHTML;
+    }
+    return __pc_attr(el, attr);
+}
+function record(container) {
+    var out = {};
+    fields.forEach(function (f) {
+        var els = f[2] === null ? [container] : __pc_find(f[1], f[2], container);
+        if (f[4]) {
+            out[f[0]] = els.map(function (el) { return value(el, f[3]); });
+        } else {
+            out[f[0]] = els.length ? value(els[0], f[3]) : null;
+        }
+    });
+    return out;
+}
+function finish(result) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearTimeout(timer);
+    window.removeEventListener("pagehide", onUnload);
+    done(result);
+}
+function onUnload() {
+    finish("unload");
+}
+function check(force) {
+    var containers = __pc_find(by, selector, null);
+    if (force || containers.length >= minimum) {
+        finish(containers.map(record));
+    }
+}
+check(false);
+if (!finished) {
+    observer = new MutationObserver(function () { check(false); });
+    observer.observe(document, {childList: true, subtree: true});
+    window.addEventListener("pagehide", onUnload);
+    timer = setTimeout(function () { check(true); }, timeout);
+}
+"""
+
+# arguments: url
+# navigate without waiting for the load, the old document is marked so it is never
+# mistaken for the new one, unless only the fragment changes and the document stays
+NAVIGATE = """
+var target = new URL(arguments[0], location.href), here = new URL(location.href);
+target.hash = here.hash = "";
+if (!(arguments[0].indexOf("#") >= 0 && target.href === here.href)) {
+    document.__pc_leaving = true;
+}
+window.location.href = arguments[0];
+"""
+
+# arguments: the requested url
+# returns: [loaded, location], the initial about:blank of a tab is only loaded if it was requested
+LOAD_STATE = """
+return [!document.__pc_leaving && document.readyState === "complete" &&
+        (location.href !== "about:blank" || arguments[0] === "about:blank"), location.href];
+"""
+
+# chrome context only
+# arguments: list of addon ids
+# returns: true if every addon is installed and active
+ADDONS_ACTIVE = """
+var ids = arguments[0], done = arguments[arguments.length - 1], mod;
+try {
+    mod = ChromeUtils.importESModule("resource://gre/modules/AddonManager.sys.mjs");
+} catch (e) {
+    mod = ChromeUtils.import("resource://gre/modules/AddonManager.jsm");
+}
+mod.AddonManager.getAddonsByIDs(ids).then(function (addons) {
+    done(addons.every(function (a) { return a && a.isActive; }));
+}, function () { done(true); });
+"""
+
+# chrome context only
+# arguments: host name
+# returns: [{name, value, domain, path, secure}] for every cookie the browser would send to that host,
+#          regardless of which document is focused
+COOKIES_FOR_HOST = """
+var host = arguments[0];
+return Services.cookies.getCookiesFromHost(host, {}).filter(function (c) {
+    var domain = c.host.replace(/^\\./, "");
+    return host === domain || host.endsWith("." + domain);
+}).map(function (c) {
+    return {name: c.name, value: c.value, domain: c.host, path: c.path, secure: c.isSecure};
+});
+"""
@@ -0,0 +1,205 @@
+import os
+import signal
+import threading
+from functools import wraps
+from time import monotonic
+from typing import Optional, Dict, Callable, Tuple, List, Iterable, Set
+
+from pombo_correio.metrics import process_tree
+
+# operations after which the session cookies are remembered, they are the ones that load pages
+COOKIE_OPS = {"goto_url", "fetch", "find_and_click_xpath", "find_and_click_css_selector",
+              "find_and_submit_xpath", "find_and_submit_css_selector"}
+
+# operations with side effects on the site, a crash may hit after the click or submit went
+# through, so they are not run again after a recovery unless opted in with replay
+NON_IDEMPOTENT_OPS = {"find_and_click_xpath", "find_and_click_css_selector",
+                      "find_and_submit_xpath", "find_and_submit_css_selector"}
+
+# selenium command names of async scripts, allowed to run for the script timeout on top of the command timeout
+ASYNC_SCRIPT_COMMANDS = {"w3cExecuteScriptAsync", "executeAsyncScript"}
+
+
+def kill_driver(driver) -> None:
+    """
+    Kill Firefox and geckodriver without talking to them, they may be hung or already gone.
+
+    Args:
+        driver: The webdriver instance.
+    """
+    kill = getattr(signal, "SIGKILL", signal.SIGTERM)
+    capabilities = getattr(driver, "capabilities", None) or {}
+    pid = capabilities.get("moz:processID")
+    if pid:
+        try:
+            os.kill(int(pid), kill)
+        except (OSError, ValueError):
+            pass
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if process is not None:
+        try:
+            process.kill()
+        except OSError:
+            pass
+
+
+def driver_pids(driver) -> List[int]:
+    """
+    Process IDs of geckodriver and Firefox, to kill them from another process.
+
+    Args:
+        driver: The webdriver instance.
+
+    Returns:
+        List[int]: The known pids, geckodriver first.
+    """
+    pids = []
+    process = getattr(getattr(driver, "service", None), "process", None)
+    if getattr(process, "pid", None):
+        pids.append(process.pid)
+    capabilities = getattr(driver, "capabilities", None) or {}
+    try:
+        pids.append(int(capabilities["moz:processID"]))
+    except (KeyError, TypeError, ValueError):
+        pass
+    return pids
+
+
+def kill_process_trees(pids: Iterable[int]) -> None:
+    """
+    Kill processes and all their descendants, e.g. the pids from driver_pids().
+
+    Args:
+        pids (Iterable[int]): Root processes, ones already gone are skipped.
+    """
+    kill = getattr(signal, "SIGKILL", signal.SIGTERM)
+    # collect every tree first, descendants are re-parented once their parent dies
+    tree = []
+    for pid in pids:
+        tree += [p for p in process_tree(pid) if p not in tree]
+    for pid in tree:
+        try:
+            os.kill(pid, kill)
+        except OSError:
+            pass  # exited meanwhile
+
+
+class Watchdog:
+    """
+    Kill the browser when a single webdriver command runs for longer than the timeout.
+
+    A hung command never returns on its own, killing the processes makes it fail with a
+    connection error, which the supervisor then treats as a crash.
+
+    Attributes:
+        timeout (float): Seconds a command may run.
+        slack (Dict[str, float]): Extra seconds allowed per command name, e.g. the async script timeout.
+        interval (float): Seconds between checks.
+        hung (Optional[str]): Name of the last command the watchdog killed the browser for.
+    """
+
+    def __init__(self, timeout: float, on_hang: Callable[[str], None], interval: Optional[float] = None) -> None:
+        self.timeout = timeout
+        self.on_hang = on_hang
+        self.slack: Dict[str, float] = {}
+        self.interval = interval or min(1.0, timeout / 4)
+        self.hung: Optional[str] = None
+        self._inflight: Optional[Tuple[float, str]] = None
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, driver) -> None:
+        """
+        Time every command the driver sends to geckodriver.
+
+        Args:
+            driver: The webdriver instance.
+        """
+        executor = driver.command_executor
+        if getattr(executor.execute, "_pc_watchdog", None) is self:
+            return
+        execute = getattr(executor.execute, "_pc_original", executor.execute)
+
+        def watched_execute(command, params):
+            self._inflight = (monotonic(), command)
+            try:
+                return execute(command, params)
+            finally:
+                self._inflight = None
+
+        watched_execute._pc_watchdog = self
+        watched_execute._pc_original = execute
+        executor.execute = watched_execute
+        self.hung = None
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pombo_correio-watchdog", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            inflight = self._inflight
+            if inflight is None:
+                continue
+            started, command = inflight
+            if monotonic() - started > self.timeout + self.slack.get(command, 0):
+                self._inflight = None
+                self.hung = command
+                try:
+                    self.on_hang(command)
+                except Exception as e:
+                    print(f"ERROR: watchdog failed to kill the browser hung on {command}")
+                    print(str(e))
+
+    def close(self) -> None:
+        self._stopped.set()
+
+
+class Supervisor:
+    """
+    Recovery policy of a supervised browser, see _AbstractBrowser.enable_supervision().
+
+    Attributes:
+        max_retries (int): Restarts tried for a single operation before FireFoxCrashed is raised.
+        backoff (float): Seconds to wait before the first restart of an operation, doubled for each further one.
+        cookies (bool): Remember cookies after page loads and restore them in the new session.
+        watchdog (Optional[Watchdog]): Kills the browser on hung commands, None without a command timeout.
+        restarts (int): Recoveries done so far.
+        total_cost (float): Seconds spent recovering so far.
+        active (bool): A supervised operation is running, nested ones are not supervised again.
+        replay (Set[str]): Operations from NON_IDEMPOTENT_OPS that are retried after a recovery anyway.
+    """
+
+    def __init__(self, max_retries: int = 2, backoff: float = 0.5, cookies: bool = True,
+                 watchdog: Optional[Watchdog] = None, replay: Iterable[str] = ()) -> None:
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.cookies = cookies
+        self.watchdog = watchdog
+        self.replay: Set[str] = set(replay)
+        self.restarts = 0
+        self.total_cost = 0.0
+        self.active = False
+
+    def replays(self, operation: str) -> bool:
+        """Returns True if the operation is run again after the browser was recovered."""
+        return operation not in NON_IDEMPOTENT_OPS or operation in self.replay
+
+    def close(self) -> None:
+        if self.watchdog is not None:
+            self.watchdog.close()
+
+
+def supervised(method: Callable) -> Callable:
+    """
+    Restart the browser and retry the call when it fails because the browser died,
+    only when supervision is enabled, near free otherwise.
+    """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        supervisor = self.supervisor
+        if supervisor is None or supervisor.active:
+            return method(self, *args, **kwargs)
+        return self._supervised_call(method, args, kwargs)
+
+    return wrapper
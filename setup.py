@@ -8,6 +8,7 @@ setup(
     license='Apache',
     author='jarbasAI',
     include_package_data=True,
+    extras_require={"fast": ["lxml", "cssselect"], "screenshots": ["Pillow"], "memory": ["psutil"]},
     author_email='jarbasai@mailfence.com',
     description='simple selenium wrapper'
 )
@@ -0,0 +1,101 @@
+import threading
+import unittest
+
+from pombo_correio.bus import EventBus, BLOCK, DROP_OLDEST, SAMPLE
+
+
+class TestEventBus(unittest.TestCase):
+
+    def make_bus(self, **kwargs):
+        bus = EventBus(**kwargs)
+        self.addCleanup(bus.close, False)
+        return bus
+
+    def test_order_and_copy(self):
+        bus = self.make_bus()
+        seen = []
+        data = {"n": 0}
+
+        def handler(d):
+            seen.append(d["n"])
+
+        for n in range(5):
+            data["n"] = n
+            bus.submit("event", data, [handler])
+        self.assertTrue(bus.join(5))
+        self.assertEqual(seen, [0, 1, 2, 3, 4])
+        self.assertEqual(bus.stats["processed"], 5)
+
+    def test_handler_errors(self):
+        bus = self.make_bus()
+        seen = []
+
+        def broken(data):
+            raise ValueError("boom")
+
+        bus.submit("event", {}, [broken, seen.append])
+        self.assertTrue(bus.join(5))
+        self.assertEqual(seen, [{}])
+
+    def _blocked(self, bus):
+        """ hold the only worker until the returned event is set"""
+        release, started = threading.Event(), threading.Event()
+        bus.submit("event", {}, [lambda d: started.set() or release.wait(5)])
+        started.wait(5)
+        return release
+
+    def test_drop_oldest(self):
+        bus = self.make_bus(workers=1, max_queue=2, overflow=DROP_OLDEST)
+        seen = []
+        release = self._blocked(bus)
+        for n in range(4):
+            bus.submit("event", {"n": n}, [lambda d: seen.append(d["n"])])
+        release.set()
+        self.assertTrue(bus.join(5))
+        self.assertEqual(seen, [2, 3])
+        self.assertEqual(bus.stats["dropped"], 2)
+
+    def test_sample(self):
+        bus = self.make_bus(workers=1, max_queue=1, overflow=SAMPLE, sample_every=2)
+        release = self._blocked(bus)
+        for n in range(5):
+            bus.submit("event", {"n": n}, [lambda d: None])
+        release.set()
+        self.assertTrue(bus.join(5))
+        self.assertEqual(bus.stats["dropped"], 4)
+
+    def test_block_timeout(self):
+        bus = self.make_bus(workers=1, max_queue=1, overflow=BLOCK, block_timeout=0.05)
+        release = self._blocked(bus)
+        bus.submit("event", {}, [lambda d: None])
+        bus.submit("event", {}, [lambda d: None])  # waits for room, then gives up
+        self.assertEqual(bus.stats["dropped"], 1)
+        release.set()
+        self.assertTrue(bus.join(5))
+
+    def test_block_emit_from_handler(self):
+        bus = self.make_bus(workers=1, max_queue=1, overflow=BLOCK)
+        seen = []
+
+        def chatty(data):
+            seen.append(data["n"])
+            if data["n"] == 0:
+                for n in (1, 2, 3):
+                    bus.submit("event", {"n": n}, [chatty])
+
+        bus.submit("event", {"n": 0}, [chatty])
+        self.assertTrue(bus.join(5))  # no deadlock, the overflow is dropped
+        self.assertEqual(seen, [0, 1])
+        self.assertEqual(bus.stats["dropped"], 2)
+
+    def test_close(self):
+        bus = EventBus()
+        seen = []
+        bus.submit("event", {}, [seen.append])
+        bus.close()
+        bus.submit("event", {}, [seen.append])  # ignored once closed
+        self.assertEqual(len(seen), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import shutil
+import tempfile
+import threading
+import unittest
+
+from seleniumwire.request import Request, Response
+
+from pombo_correio.cache import ResponseCache, HIT_HEADER, RECORD, REPLAY
+
+
+def _request(url, headers=()):
+    return Request(method="GET", url=url, headers=list(headers))
+
+
+def _response(status=200, headers=(("Cache-Control", "max-age=60"),), body=b"page"):
+    return Response(status_code=status, reason="", headers=list(headers), body=body)
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.cache = ResponseCache(self.tmp)
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def fetch(self, url, response=None, headers=(), cache=None):
+        """ run a request through the interceptors, response is what the network would answer"""
+        cache = cache or self.cache
+        request = _request(url, headers)
+        cache.intercept_request(request)
+        if request.response is not None:
+            return request.response
+        response = response or _response()
+        cache.intercept_response(request, response)
+        return response
+
+    def test_hit(self):
+        self.fetch("https://example.com/")
+        response = self.fetch("https://example.com/")
+        self.assertEqual(response.headers[HIT_HEADER], "HIT")
+        self.assertEqual(response.body, b"page")
+        self.assertEqual(self.cache.stats["hits"], 1)
+
+    def test_not_stored(self):
+        self.fetch("https://example.com/", _response(headers=[("Cache-Control", "no-store")]))
+        self.fetch("https://example.com/a", _response(status=500))
+        self.assertEqual(self.cache.stats["stored"], 0)
+
+    def test_private_responses(self):
+        self.fetch("https://example.com/private",
+                   _response(headers=[("Cache-Control", "private, max-age=60")]))
+        self.fetch("https://example.com/cookie",
+                   _response(headers=[("Cache-Control", "max-age=60"), ("Set-Cookie", "sid=1")]))
+        self.fetch("https://example.com/auth", headers=[("Authorization", "Bearer x")])
+        self.assertEqual(self.cache.stats["stored"], 0)
+        self.assertIsNone(self.cache.lookup("https://example.com/auth"))
+
+    def test_private_forced_or_recorded(self):
+        forced = ResponseCache(self.tmp, force=[r"/cookie"])
+        self.fetch("https://example.com/cookie", _response(headers=[("Set-Cookie", "sid=1")]), cache=forced)
+        self.assertIsNotNone(forced.lookup("https://example.com/cookie"))
+        recorder = ResponseCache(self.tmp, mode=RECORD)
+        self.fetch("https://example.com/auth", headers=[("Authorization", "Bearer x")], cache=recorder)
+        self.assertIsNotNone(recorder.lookup("https://example.com/auth"))
+        forced.close()
+        recorder.close()
+
+    def test_vary(self):
+        vary = [("Cache-Control", "max-age=60"), ("Vary", "Accept-Language")]
+        self.fetch("https://example.com/", _response(headers=vary, body=b"en"),
+                   headers=[("Accept-Language", "en")])
+        self.fetch("https://example.com/", _response(headers=vary, body=b"pt"),
+                   headers=[("Accept-Language", "pt")])
+        self.assertEqual(self.fetch("https://example.com/", headers=[("Accept-Language", "en")]).body, b"en")
+        self.assertEqual(self.fetch("https://example.com/", headers=[("Accept-Language", "pt")]).body, b"pt")
+        self.assertIsNone(self.cache.lookup("https://example.com/", {"accept-language": "fr"}))
+
+    def test_revalidate(self):
+        headers = [("Cache-Control", "no-cache"), ("ETag", '"v1"')]
+        self.fetch("https://example.com/", _response(headers=headers))
+        request = _request("https://example.com/")
+        self.cache.intercept_request(request)
+        self.assertIsNone(request.response)
+        self.assertEqual(request.headers["If-None-Match"], '"v1"')
+        response = _response(status=304, headers=[("ETag", '"v1"')], body=b"")
+        self.cache.intercept_response(request, response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.body, b"page")
+        self.assertEqual(response.headers[HIT_HEADER], "REVALIDATED")
+
+    def test_foreign_304_untouched(self):
+        self.fetch("https://example.com/", _response(headers=[("Cache-Control", "no-cache"), ("ETag", '"v1"')]))
+        request = _request("https://example.com/", [("If-None-Match", '"browser"')])
+        self.cache.intercept_request(request)
+        response = _response(status=304, headers=[], body=b"")
+        self.cache.intercept_response(request, response)
+        self.assertEqual(response.status_code, 304)
+
+    def test_replay_miss(self):
+        replay = ResponseCache(self.tmp, mode=REPLAY)
+        self.assertEqual(self.fetch("https://example.com/missing", cache=replay).status_code, 504)
+        replay.close()
+
+    def test_size_and_eviction(self):
+        self.cache.max_bytes = 10
+        self.cache.store("https://example.com/1", 200, [], b"x" * 4, 0)
+        self.cache.store("https://example.com/1", 200, [], b"x" * 6, 0)  # replaced, not added
+        self.assertEqual(self.cache.size, 6)
+        self.fetch("https://example.com/2", _response(body=b"x" * 6))
+        self.assertEqual(self.cache.size, 6)
+        self.assertIsNone(self.cache.lookup("https://example.com/1"))
+        self.assertEqual(self.cache.stats["evicted"], 1)
+        self.cache.clear()
+        self.assertEqual(self.cache.size, 0)
+
+    def test_connections(self):
+        threads = [threading.Thread(target=lambda: self.cache.lookup("https://example.com/"))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+            thread.join()
+        # the next thread connecting closes the connection of the finished one
+        self.assertNotIn(threads[0], self.cache._connections)
+        self.assertIn(threads[1], self.cache._connections)
+        self.cache.close()
+        self.assertEqual(self.cache._connections, {})
+        self.assertIsNone(self.cache.lookup("https://example.com/"))  # reconnects
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,226 @@
+import shutil
+import tempfile
+import unittest
+
+from seleniumwire.request import Request, Response
+from seleniumwire.storage import RequestStorage, InMemoryRequestStorage
+
+from pombo_correio.capture import CaptureStorage, CapturePolicy, NavigationLog, RequestCursor, read_body, \
+    resource_type
+
+
+def _request(url, body=b""):
+    return Request(method="GET", url=url, headers=[("Accept", "text/html")], body=body)
+
+
+def _response(body=b""):
+    return Response(status_code=200, reason="OK", headers=[("Content-Type", "text/html")], body=body)
+
+
+class _CaptureStorageTests:
+    """ run against both selenium-wire storages, see the subclasses below"""
+
+    def make_inner(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.inner = self.make_inner()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def capture(self, storage, url, request_body=b"", response_body=b""):
+        # the order selenium-wire calls the storage in
+        request = _request(url, request_body)
+        storage.save_request(request)
+        storage.save_response(request.id, _response(response_body))
+        return request
+
+    def test_ids_assigned(self):
+        storage = CaptureStorage(self.inner, CapturePolicy())
+        request = self.capture(storage, "https://example.com/", response_body=b"hello")
+        self.assertIsNotNone(request.id)
+        stored = storage.load_requests()
+        self.assertEqual([r.id for r in stored], [request.id])
+        self.assertEqual(stored[0].response.body, b"hello")
+
+    def test_max_requests(self):
+        storage = CaptureStorage(self.inner, CapturePolicy(max_requests=2))
+        requests = [self.capture(storage, f"https://example.com/{i}", response_body=b"x")
+                    for i in range(4)]
+        stored = storage.load_requests()
+        self.assertEqual([r.id for r in stored], [r.id for r in requests[2:]])
+        self.assertTrue(all(r.response is not None for r in stored))
+        self.assertEqual(storage.stats["evicted_requests"], 2)
+        self.assertEqual(storage.stats["stored_requests"], 2)
+
+    def test_max_bytes(self):
+        storage = CaptureStorage(self.inner, CapturePolicy(max_bytes=25))
+        for i in range(3):
+            self.capture(storage, f"https://example.com/{i}", response_body=b"x" * 10)
+        self.assertEqual(len(storage.load_requests()), 2)
+        self.assertEqual(storage.stats["stored_bytes"], 20)
+
+    def test_headers_only(self):
+        storage = CaptureStorage(self.inner, CapturePolicy(headers_only=True))
+        request = self.capture(storage, "https://example.com/", request_body=b"form=1",
+                               response_body=b"page")
+        self.assertIsNotNone(request.id)
+        self.assertEqual(request.body, b"form=1")  # the request sent upstream keeps its body
+        stored = storage.load_requests()
+        self.assertEqual([r.id for r in stored], [request.id])
+        self.assertEqual(stored[0].body, b"")
+        self.assertIsNotNone(stored[0].response)
+        self.assertEqual(stored[0].response.body, b"")
+        self.assertEqual(storage.stats["dropped_bytes"], 10)
+
+    def test_dropped(self):
+        storage = CaptureStorage(self.inner, CapturePolicy(hosts={"example.com"}))
+        self.capture(storage, "https://tracker.net/pixel.gif", response_body=b"gif")
+        kept = self.capture(storage, "https://www.example.com/", response_body=b"page")
+        self.assertEqual([r.id for r in storage.load_requests()], [kept.id])
+        self.assertEqual(storage.stats["dropped_requests"], 1)
+        self.assertEqual(storage.stats["dropped_bytes"], 3)
+        self.assertFalse(storage._dropped)
+
+    def test_spill(self):
+        storage = CaptureStorage(self.inner, CapturePolicy(spill_dir=self.tmp + "/spill", spill_threshold=4))
+        self.capture(storage, "https://example.com/big", response_body=b"0123456789")
+        self.capture(storage, "https://example.com/small", response_body=b"ok")
+        big, small = storage.load_requests()
+        self.assertEqual(big.response.body, b"")
+        self.assertEqual(read_body(big.response), b"0123456789")
+        self.assertEqual(read_body(small.response), b"ok")
+        self.assertEqual(storage.stats["spilled_bodies"], 1)
+
+    def test_clear_requests(self):
+        storage = CaptureStorage(self.inner, CapturePolicy(max_requests=10))
+        self.capture(storage, "https://example.com/", response_body=b"x")
+        storage.clear_requests()
+        self.assertEqual(storage.load_requests(), [])
+        self.assertEqual(storage.stats["stored_requests"], 0)
+
+
+class TestCaptureStorageMemory(_CaptureStorageTests, unittest.TestCase):
+    def make_inner(self):
+        return InMemoryRequestStorage(base_dir=self.tmp)
+
+
+class TestCaptureStorageDisk(_CaptureStorageTests, unittest.TestCase):
+    def make_inner(self):
+        storage = RequestStorage(base_dir=self.tmp)
+        self.addCleanup(storage.cleanup)
+        return storage
+
+
+class TestNavigationLog(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        # documents dropped by the capture policy are still logged
+        self.log = NavigationLog(CaptureStorage(InMemoryRequestStorage(base_dir=self.tmp),
+                                                CapturePolicy(resource_types={"image"})))
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def navigate(self, url, status=200, headers=(), dest="document"):
+        request = Request(method="GET", url=url, headers=[("Sec-Fetch-Dest", dest)])
+        self.log.save_request(request)
+        self.log.save_response(request.id, Response(status_code=status, reason="", headers=list(headers)))
+
+    def test_main_frame_only(self):
+        self.navigate("https://example.com/", 301, [("Location", "/home")])
+        self.navigate("https://example.com/home")
+        self.navigate("https://example.com/logo.png", dest="image")
+        self.navigate("https://ads.example.net/", dest="iframe")
+        self.assertEqual(self.log.drain(), [("https://example.com/", 301, "/home"),
+                                            ("https://example.com/home", 200, None)])
+        self.assertEqual(self.log.drain(), [])
+        self.assertEqual(self.log.stats["dropped_requests"], 3)
+
+    def test_clear(self):
+        self.navigate("https://example.com/")
+        self.log.clear_requests()
+        self.assertEqual(self.log.drain(), [])
+
+
+class _Driver:
+    """ the parts of a selenium-wire driver the cursor uses"""
+
+    def __init__(self, storage):
+        self.backend = type("Backend", (), {"storage": storage})()
+
+
+class TestRequestCursor(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.storage = InMemoryRequestStorage(base_dir=self.tmp)
+        self.cursor = RequestCursor(_Driver(self.storage))
+        self.loaded = []
+        load = self.cursor._load
+        self.cursor._load = lambda rid: self.loaded.append(rid) or load(rid)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def capture(self, url, response=True):
+        request = _request(url)
+        self.storage.save_request(request)
+        if response:
+            self.storage.save_response(request.id, _response())
+        return request
+
+    def test_only_new_requests(self):
+        first = self.capture("https://example.com/1")
+        self.assertEqual([r.id for r in self.cursor.fetch()], [first.id])
+        second = self.capture("https://example.com/2")
+        self.assertEqual([r.id for r in self.cursor.fetch()], [second.id])
+        self.assertEqual(self.storage.load_requests(), [])  # consumed requests are pruned
+
+    def test_url_filter_does_not_load(self):
+        observed = []
+        self.cursor.observers.append(observed.append)
+        self.capture("https://example.com/logo.png")
+        page = self.capture("https://example.com/page")
+        self.assertEqual([r.id for r in self.cursor.fetch(r"/page")], [page.id])
+        self.assertEqual(self.loaded, [page.id])
+        self.assertEqual([r.id for r in observed], [page.id])
+        self.assertEqual(list(self.cursor.fetch()), [])  # the rejected request was consumed
+
+    def test_content_type_waits_for_response(self):
+        request = self.capture("https://example.com/", response=False)
+        self.assertEqual(list(self.cursor.fetch(content_type="text/html")), [])
+        self.storage.save_response(request.id, _response())
+        self.assertEqual([r.id for r in self.cursor.fetch(content_type="text/html")], [request.id])
+
+    def test_scan(self):
+        observed = []
+        self.cursor.observers.append(observed.append)
+        request = self.capture("https://example.com/")
+        self.cursor.scan()
+        self.cursor.scan()
+        self.assertEqual([r.id for r in observed], [request.id])
+        self.assertEqual([r.id for r in self.cursor.fetch()], [request.id])  # scan does not consume
+        self.assertEqual(len(observed), 1)
+
+
+class TestResourceType(unittest.TestCase):
+
+    def test_fetch_dest(self):
+        request = Request(method="GET", url="https://example.com/a",
+                          headers=[("Sec-Fetch-Dest", "script")])
+        self.assertEqual(resource_type(request), "script")
+
+    def test_extension(self):
+        self.assertEqual(resource_type(Request(method="GET", url="https://example.com/a.woff2", headers=[])),
+                         "font")
+
+    def test_accept(self):
+        self.assertEqual(resource_type(_request("https://example.com/")), "document")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from pombo_correio.elements import ElementCache
+
+
+class _Element:
+    def __init__(self, id):
+        self.id = id
+
+
+def _elements(*ids):
+    return [_Element(i) for i in ids]
+
+
+class TestElementCache(unittest.TestCase):
+
+    def test_mapping(self):
+        cache = ElementCache()
+        a, b = _elements("a", "b")
+        cache["tab"] = {"div": [a, b, a]}
+        self.assertEqual(cache["tab"], {"div": [a, b]})  # de-duplicated by id
+        self.assertIn("tab", cache)
+        self.assertEqual(cache.size, 2)
+        del cache["tab"]
+        self.assertNotIn("tab", cache)
+        self.assertEqual(cache.size, 0)
+
+    def test_evicts_least_recently_used(self):
+        cache = ElementCache(max_per_tab=2)
+        cache.add("tab", "h1", _Element("1"))
+        cache.add("tab", "h2", _Element("2"))
+        cache.lookup("tab", "h1")
+        cache.add("tab", "h3", _Element("3"))
+        self.assertEqual(sorted(cache["tab"]), ["h1", "h3"])
+        self.assertEqual(cache.evictions, 1)
+
+    def test_max_total(self):
+        cache = ElementCache(max_total=2)
+        cache.add("tab1", "a", _Element("1"))
+        cache.add("tab2", "a", _Element("2"))
+        cache.add("tab2", "b", _Element("3"))
+        self.assertNotIn("tab1", cache)
+        self.assertEqual(cache.size, 2)
+
+    def test_single_selector_bounded(self):
+        cache = ElementCache(max_per_tab=3)
+        elements = _elements(*"abcde")
+        for element in elements:
+            cache.add("tab", "li", element)
+        self.assertEqual(cache["tab"]["li"], elements[:3])  # the first ones, indexes stay valid
+        self.assertEqual(cache.size, 3)
+        self.assertEqual(cache.evictions, 2)
+        cache.replace("tab", "li", _elements(*"vwxyz"))
+        self.assertEqual([e.id for e in cache["tab"]["li"]], ["v", "w", "x"])
+        self.assertEqual(cache.size, 3)
+
+    def test_invalidate(self):
+        cache = ElementCache()
+        cache.add("tab", "a", _Element("1"))
+        cache.add("tab", "b", _Element("2"))
+        cache.invalidate("tab", "a")
+        self.assertEqual(list(cache["tab"]), ["b"])
+        self.assertIsNone(cache.lookup("tab", "a"))
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
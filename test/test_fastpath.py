@@ -0,0 +1,59 @@
+import unittest
+from contextlib import contextmanager
+
+from pombo_correio.fastpath import HttpFetcher, needs_javascript
+
+
+class _Driver:
+    """ a webdriver whose chrome context can read the whole cookie store"""
+    CONTEXT_CHROME = "chrome"
+
+    def __init__(self, cookies):
+        self.cookies = cookies
+        self.reads = []
+
+    @contextmanager
+    def context(self, context):
+        yield
+
+    def execute_script(self, script, *args):
+        if not args:
+            return "Mozilla/5.0"
+        self.reads.append(args[0])
+        return [c for c in self.cookies if HttpFetcher._domain_matches(args[0], c["domain"])]
+
+
+class TestNeedsJavascript(unittest.TestCase):
+
+    def test_markers(self):
+        self.assertTrue(needs_javascript("<body><p>Please enable JavaScript</p></body>"))
+        self.assertTrue(needs_javascript('<body><div id="root"></div></body>'))
+        self.assertFalse(needs_javascript("<body><p>hello</p></body>"))
+
+    def test_noscript(self):
+        page = "<body><noscript>Please enable javascript</noscript><article>{}</article></body>"
+        self.assertFalse(needs_javascript(page.format("the news")))
+        self.assertTrue(needs_javascript(page.format("")))
+
+
+class TestHttpFetcher(unittest.TestCase):
+
+    def test_cookies_per_host(self):
+        driver = _Driver([{"name": "a", "value": "1", "domain": ".example.com", "path": "/"},
+                          {"name": "b", "value": "2", "domain": "other.org", "path": "/"}])
+        fetcher = HttpFetcher()
+        fetcher.sync(driver, "https://www.example.com/page")
+        fetcher.sync(driver, "https://www.example.com/other")  # within the ttl
+        fetcher.sync(driver, "https://other.org/")
+        self.assertEqual(driver.reads, ["www.example.com", "other.org"])
+        self.assertEqual(fetcher.session.headers["User-Agent"], "Mozilla/5.0")
+        self.assertEqual(sorted(c.name for c in fetcher.session.cookies), ["a", "b"])
+        driver.cookies[0]["value"] = "3"
+        fetcher.sync(driver, "https://www.example.com/", force=True)
+        self.assertEqual(fetcher.session.cookies.get("a"), "3")
+        fetcher.invalidate()
+        self.assertEqual(len(fetcher.session.cookies), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import unittest
+
+from pombo_correio.filters import compile_filter, Contains, StartsWith, EndsWith, Regex, TEXT
+
+
+class TestCompileFilter(unittest.TestCase):
+
+    def test_no_filter(self):
+        self.assertEqual(compile_filter("css", "a", None), ("a", None))
+        self.assertEqual(compile_filter("xpath", "//a", {}), ("//a", None))
+
+    def test_presence(self):
+        self.assertEqual(compile_filter("css", "a", "title"),
+                         ('a[title]:not([title=""])', None))
+        self.assertEqual(compile_filter("xpath", "//a", "title"),
+                         ('(//a)[@title!=""]', None))
+
+    def test_boolean_presence(self):
+        # <input required> has an empty value, it must still match
+        self.assertEqual(compile_filter("css", "input", "required"), ("input[required]", None))
+        self.assertEqual(compile_filter("xpath", "//input", ["readonly", "autofocus"]),
+                         ("(//input)[@readonly][@autofocus]", None))
+        self.assertEqual(compile_filter("css", "details", ["open", "hidden"]),
+                         ("details[open][hidden]", None))
+
+    def test_boolean_value_in_page(self):
+        selector, residual = compile_filter("css", "select", {"multiple": "true"})
+        self.assertEqual(selector, "select")
+        self.assertEqual(residual, {"multiple": {"op": "eq", "value": "true"}})
+
+    def test_equals(self):
+        self.assertEqual(compile_filter("css", "a", {"rel": "next"}), ('a[rel="next"]', None))
+        self.assertEqual(compile_filter("xpath", "//a", {"rel": "next"}), ('(//a)[@rel="next"]', None))
+
+    def test_one_of(self):
+        self.assertEqual(compile_filter("css", "a", {"rel": ["next", "prev"]}),
+                         ('a:is([rel="next"],[rel="prev"])', None))
+        self.assertEqual(compile_filter("xpath", "//a", {"rel": ["next", "prev"]}),
+                         ('(//a)[@rel="next" or @rel="prev"]', None))
+
+    def test_predicates(self):
+        self.assertEqual(compile_filter("css", "a", {"title": Contains("radio")}),
+                         ('a[title*="radio"]', None))
+        self.assertEqual(compile_filter("css", "a", {"title": StartsWith("A", ignore_case=True)}),
+                         ('a[title^="A" i]', None))
+        self.assertEqual(compile_filter("xpath", "//a", {"title": StartsWith("A")}),
+                         ('(//a)[starts-with(@title,"A")]', None))
+        self.assertEqual(compile_filter("xpath", "//a", {"title": EndsWith("FM")}),
+                         ('(//a)[substring(@title,string-length(@title)-1)="FM"]', None))
+
+    def test_in_page(self):
+        selector, residual = compile_filter("css", "a", {"href": Contains("/radio/"),
+                                                         TEXT: Regex(r"^\d+ FM$"),
+                                                         "title": "x"})
+        self.assertEqual(selector, 'a[title="x"]')
+        self.assertEqual(residual, {
+            "href": {"op": "contains", "value": "/radio/", "flags": ""},
+            TEXT: {"op": "regex", "value": r"^\d+ FM$", "flags": ""},
+        })
+
+    def test_empty_predicate_in_page(self):
+        # [a^=""] never matches in CSS
+        self.assertEqual(compile_filter("css", "a", {"title": StartsWith("")})[0], "a")
+
+    def test_selector_groups(self):
+        self.assertEqual(compile_filter("css", "a, area", {"rel": "next"}),
+                         (':is(a, area)[rel="next"]', None))
+        self.assertEqual(compile_filter("css", "a[data-x='1,2']", {"rel": "next"}),
+                         ('a[data-x=\'1,2\'][rel="next"]', None))
+        self.assertEqual(compile_filter("xpath", "//a | //area", "title"),
+                         ('(//a | //area)[@title!=""]', None))
+
+    def test_quoting(self):
+        self.assertEqual(compile_filter("css", "a", {"title": 'say "hi"'}),
+                         ('a[title="say \\"hi\\""]', None))
+        self.assertEqual(compile_filter("xpath", "//a", {"title": 'say "hi"'}),
+                         ("(//a)[@title='say \"hi\"']", None))
+        self.assertEqual(compile_filter("xpath", "//a", {"title": 'it\'s "x"'}),
+                         ('(//a)[@title=concat("it\'s ", \'"\', "x", \'"\', "")]', None))
+
+    def test_uppercase_xpath_in_page(self):
+        selector, residual = compile_filter("xpath", "//a", {"dataId": "1"})
+        self.assertEqual(selector, "//a")
+        self.assertEqual(residual, {"dataId": {"op": "eq", "value": "1"}})
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            compile_filter("css", "a", {"title": 1})
+        with self.assertRaises(ValueError):
+            compile_filter("css", "a", 42)
+
+
+if __name__ == "__main__":
+    unittest.main()
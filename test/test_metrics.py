@@ -0,0 +1,74 @@
+import unittest
+
+from pombo_correio.metrics import Histogram, Metrics, instrument_driver, uninstrument_driver, timed
+
+
+class _Driver:
+    def execute(self, command, params=None):
+        return {"value": command}
+
+
+class _Browser:
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.emitted = 0
+
+    def emit_metrics(self):
+        self.emitted += 1
+
+    @timed
+    def work(self):
+        return "done"
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_empty(self):
+        hist = Histogram()
+        self.assertIsNone(hist.percentile(50))
+        self.assertIsNone(hist.snapshot()["mean"])
+
+    def test_percentiles(self):
+        hist = Histogram()
+        for seconds in [0.001] * 90 + [0.2] * 9 + [3]:
+            hist.observe(seconds)
+        snap = hist.snapshot()
+        self.assertEqual(snap["count"], 100)
+        self.assertEqual((snap["min"], snap["max"]), (0.001, 3))
+        self.assertEqual(snap["p50"], 0.001)
+        self.assertEqual(snap["p90"], 0.001)
+        self.assertEqual(snap["p99"], 0.25)
+        self.assertEqual(hist.percentile(100), 3)  # capped by the slowest observation
+
+    def test_overflow_bucket(self):
+        hist = Histogram()
+        hist.observe(60)
+        self.assertEqual(hist.buckets[-1], 1)
+        self.assertEqual(hist.percentile(50), 60)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_instrument_driver(self):
+        metrics = Metrics()
+        driver = _Driver()
+        instrument_driver(driver, metrics)
+        instrument_driver(driver, metrics)  # not wrapped twice
+        self.assertEqual(driver.execute("getTitle"), {"value": "getTitle"})
+        self.assertEqual(metrics.snapshot()["command"]["getTitle"]["count"], 1)
+        uninstrument_driver(driver)
+        driver.execute("getTitle")
+        self.assertEqual(metrics.snapshot()["command"]["getTitle"]["count"], 1)
+
+    def test_timed(self):
+        self.assertEqual(_Browser(None).work(), "done")
+        browser = _Browser(Metrics(interval=0))
+        browser.work()
+        self.assertEqual(browser.metrics.snapshot()["method"]["work"]["count"], 1)
+        self.assertEqual(browser.emitted, 1)
+        browser.metrics.reset()
+        self.assertNotIn("method", browser.metrics.snapshot())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from pombo_correio.exceptions import PoolTimeout, PoolClosed, PoolStartFailed
+from pombo_correio.pool import BrowserPool
+
+
+class _Browser:
+    """ the parts of a browser the pool uses"""
+
+    def __init__(self, fail_start=False):
+        self.fail_start = fail_start
+        self.alive = False
+        self.resets = 0
+        self.stopped = False
+
+    def new_session(self):
+        if self.fail_start:
+            raise RuntimeError("no geckodriver")
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def reset(self):
+        self.resets += 1
+
+    def stop(self):
+        self.alive = False
+        self.stopped = True
+
+
+class TestBrowserPool(unittest.TestCase):
+
+    def make_pool(self, factory=_Browser, size=1, **kwargs):
+        pool = BrowserPool(factory, size=size, **kwargs)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_lease_and_reset(self):
+        pool = self.make_pool(size=2)
+        pool.start()
+        self.assertEqual(pool.idle, 2)
+        with pool.lease(timeout=1) as browser:
+            self.assertTrue(browser.is_alive())
+            self.assertEqual(pool.idle, 1)
+        self.assertEqual(browser.resets, 1)
+        self.assertEqual(pool.idle, 2)
+
+    def test_timeout(self):
+        pool = self.make_pool()
+        pool.start()
+        pool.acquire(timeout=1)
+        self.assertRaises(PoolTimeout, pool.acquire, 0.05)
+
+    def test_dead_browser_replaced(self):
+        pool = self.make_pool()
+        pool.start()
+        browser = pool.acquire(timeout=1)
+        pool.release(browser)
+        browser.alive = False
+        replacement = pool.acquire(timeout=5)
+        self.assertIsNot(replacement, browser)
+        self.assertNotIn(browser, pool.browsers)
+
+    def test_start_failure(self):
+        pool = self.make_pool(factory=lambda: _Browser(fail_start=True), max_start_attempts=1)
+        pool.start()
+        with self.assertRaises(PoolStartFailed):
+            pool.acquire(timeout=1)
+        self.assertIsInstance(pool.last_start_error, RuntimeError)
+
+    def test_close(self):
+        pool = self.make_pool()
+        pool.start()
+        leased = pool.acquire(timeout=1)
+        pool.close()
+        self.assertRaises(PoolClosed, pool.acquire, 1)
+        pool.release(leased)
+        self.assertTrue(leased.stopped)
+        self.assertEqual(pool.browsers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()